@@ -186,6 +186,10 @@ VALID_OPTS = {
     # '': Disable the key cache [default]
     'key_cache': six.string_types,
 
+    # Detect changes to the key directories with inotify instead of polling their mtime before
+    # reusing the in-memory listing of the keys
+    'pki_dir_inotify': bool,
+
     # The user under which the daemon should run
     'user': six.string_types,
 
@@ -357,6 +361,12 @@ VALID_OPTS = {
     # Maximum number of concurrently active processes at any given point in time
     'process_count_max': int,
 
+    # Number of processes forked once, with the modules loaded, which run the
+    # jobs of the functions matching the job_pool_functions globs instead of
+    # forking a new process for each of them
+    'job_pool_size': int,
+    'job_pool_functions': list,
+
     # Whether or not the salt minion should run scheduled mine updates
     'mine_enabled': bool,
 
@@ -375,6 +385,18 @@ VALID_OPTS = {
     # The chunk size to use when streaming files with the file server
     'file_buffer_size': int,
 
+    # The number of file_buffer_size chunks a minion asks for, and a master
+    # serves, in a single file server request
+    'file_transfer_window': int,
+
+    # The minimum size in bytes of an outdated cached file for the minion to
+    # only fetch the blocks of it which changed on the master, 0 disables it
+    'file_delta_min_size': int,
+
+    # The most bytes of small files the minion fetches in a single request when
+    # caching a directory or a whole environment, 0 fetches them one by one
+    'file_bundle_size': int,
+
     # The TCP port on which minion events should be published if ipc_mode is TCP
     'tcp_pub_port': int,
 
@@ -469,6 +491,19 @@ VALID_OPTS = {
     # Fire events as state chunks are processed by the state compiler
     'state_events': bool,
 
+    # Run up to this many independent state chunks at once in parallel processes, once the chunks
+    # they require have finished. 0 or 1 runs the chunks one after the other.
+    'state_concurrency': int,
+
+    # Reuse the render of a SLS file from the previous state run as long as
+    # the SLS file, the templates it loads and the grains and pillar it uses
+    # did not change
+    'state_render_cache': bool,
+
+    # Do not run the states which succeeded without changes in the previous
+    # state run with the same data
+    'state_assume_converged': bool,
+
     # The number of seconds a minion should wait before retry when attempting authentication
     'acceptance_wait_time': float,
 
@@ -591,6 +626,10 @@ VALID_OPTS = {
     # the number of connected minions increases.
     'worker_threads': int,
 
+    # Named pools of MWorker processes, each serving the requests of the commands listed in its
+    # commands option. The requests of the other commands are served by the default pool.
+    'worker_pools': dict,
+
     # The port for the master to listen to returns on. The minion needs to connect to this port
     # to send returns.
     'ret_port': int,
@@ -650,6 +689,11 @@ VALID_OPTS = {
     's3fs_update_interval': int,
     'svnfs_update_interval': int,
 
+    # Maintain the file lists of the roots fileserver backend from inotify
+    # events, and walk the file_roots again every roots_inotify_rescan seconds
+    'roots_inotify': bool,
+    'roots_inotify_rescan': int,
+
     'git_pillar_base': six.string_types,
     'git_pillar_branch': six.string_types,
     'git_pillar_env': six.string_types,
@@ -727,6 +771,23 @@ VALID_OPTS = {
     # Pillar cache backend. Defaults to `disk` which stores caches in the master cache
     'pillar_cache_backend': six.string_types,
 
+    # Cache the compiled pillars in the master cache until the pillar_roots files or the inputs
+    # sent by the minion change, for at most pillar_compiled_cache_ttl seconds. Pillars using
+    # an ext_pillar are only cached if the ext_pillar has a TTL in
+    # pillar_compiled_cache_ext_pillar_ttl.
+    'pillar_compiled_cache': bool,
+    'pillar_compiled_cache_ttl': int,
+    'pillar_compiled_cache_ext_pillar_ttl': dict,
+
+    # Share the renders of the pillar SLS files which do not use any minion specific data between
+    # the minions, in an in-memory cache of pillar_render_cache_size renders
+    'pillar_render_cache': bool,
+    'pillar_render_cache_size': int,
+
+    # The number of seconds each process reuses the digest of the pillar_roots files used by the
+    # pillar_compiled_cache and pillar_render_cache before walking the pillar_roots again
+    'pillar_roots_fingerprint_interval': int,
+
     'pillar_safe_render_error': bool,
 
     # When creating a pillar, there are several strategies to choose from when
@@ -776,6 +837,10 @@ VALID_OPTS = {
     'fileserver_limit_traversal': bool,
     'fileserver_verify_config': bool,
 
+    # The number of file hashes kept in the hash cache shared by the processes
+    # serving files, 0 disables the cache
+    'fileserver_hash_cache_size': int,
+
     # Optionally apply '*' permissioins to any user. By default '*' is a fallback case that is
     # applied only if the user didn't matched by other matchers.
     'permissive_acl': bool,
@@ -825,12 +890,24 @@ VALID_OPTS = {
     # Specify whether the master should store end times for jobs as returns come in
     'job_cache_store_endtime': bool,
 
+    # Acknowledge minion returns immediately and store them in the master_job_cache in batches
+    # of at most return_batch_size returns, flushed at least every return_batch_latency seconds
+    'return_batching': bool,
+    'return_batch_size': int,
+    'return_batch_latency': float,
+
     # The minion data cache is a cache of information about the minions stored on the master.
     # This information is primarily the pillar and grains data. The data is cached in the master
     # cachedir under the name of the minion and used to predetermine what minions are expected to
     # reply from executions.
     'minion_data_cache': bool,
 
+    # Keep an in-memory inverted index of the grains and pillar in the minion data cache and use
+    # it to resolve grain and pillar targets. The index is rebuilt from the cache every
+    # minion_data_index_refresh seconds.
+    'minion_data_index': bool,
+    'minion_data_index_refresh': int,
+
     # The number of seconds between AES key rotations on the master
     'publish_session': int,
 
@@ -878,6 +955,10 @@ VALID_OPTS = {
     # at once and attempt to all connect immediately to the master
     'random_startup_delay': int,
 
+    # Keep the list of installed packages in the cachedir across jobs until the
+    # package database changes (used by yumpkg.py and aptpkg.py, minion only)
+    'pkg_list_cache': bool,
+
     # The source location for the winrepo sls files
     # (used by win_pkg.py, minion only)
     'winrepo_source_dir': six.string_types,
@@ -905,6 +986,16 @@ VALID_OPTS = {
     # The number of minutes between the minion refreshing its cache of grains
     'grains_refresh_every': int,
 
+    # The globs of the expensive grain functions whose results are kept in the
+    # cachedir, mapped to the number of seconds they are kept for
+    'grains_lazy': dict,
+
+    # The number of threads running the grain functions concurrently, and the
+    # number of seconds after which the result of a grain function is not
+    # waited for anymore
+    'grains_workers': int,
+    'grains_timeout': int,
+
     # Use lspci to gather system data for grains on a minion
     'enable_lspci': bool,
 
@@ -925,6 +1016,10 @@ VALID_OPTS = {
     # If this is set to True the first newline after a Jinja block is removed
     'jinja_trim_blocks': bool,
 
+    # Keep the compiled Jinja templates in memory and under the cachedir, so
+    # templates are only compiled again once their source changed
+    'jinja_bytecode_cache': bool,
+
     # Cache minion ID to file
     'minion_id_caching': bool,
 
@@ -1029,6 +1124,10 @@ VALID_OPTS = {
     # Use zmq.SUSCRIBE to limit listening sockets to only process messages bound for them
     'zmq_filtering': bool,
 
+    # Resolve list, glob and pcre targets on the master and only send their publishes to the
+    # connections of the matched minions (TCP transport)
+    'publish_topic_targeting': bool,
+
     # Connection caching. Can greatly speed up salt performance.
     'con_cache': bool,
     'rotate_aes_key': bool,
@@ -1216,6 +1315,9 @@ DEFAULT_MINION_OPTS = {
     'cache_jobs': False,
     'grains_cache': False,
     'grains_cache_expiration': 300,
+    'grains_lazy': {},
+    'grains_workers': 0,
+    'grains_timeout': 0,
     'grains_deep_merge': False,
     'conf_file': os.path.join(salt.syspaths.CONFIG_DIR, 'minion'),
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'minion'),
@@ -1224,6 +1326,7 @@ DEFAULT_MINION_OPTS = {
     'renderer': 'yaml_jinja',
     'renderer_whitelist': [],
     'renderer_blacklist': [],
+    'jinja_bytecode_cache': True,
     'random_startup_delay': 0,
     'failhard': False,
     'autoload_dynamic_modules': True,
@@ -1237,6 +1340,9 @@ DEFAULT_MINION_OPTS = {
     'pillar_cache': False,
     'pillar_cache_ttl': 3600,
     'pillar_cache_backend': 'disk',
+    'pillar_render_cache': False,
+    'pillar_render_cache_size': 1000,
+    'pillar_roots_fingerprint_interval': 10,
     'extension_modules': os.path.join(salt.syspaths.CACHE_DIR, 'minion', 'extmods'),
     'state_top': 'top.sls',
     'state_top_saltenv': None,
@@ -1265,6 +1371,7 @@ DEFAULT_MINION_OPTS = {
     'fileserver_backend': ['roots'],
     'fileserver_followsymlinks': True,
     'fileserver_ignoresymlinks': False,
+    'fileserver_hash_cache_size': 0,
     'pillar_roots': {
         'base': [salt.syspaths.BASE_PILLAR_ROOTS_DIR,
                  salt.syspaths.SPM_PILLAR_PATH]
@@ -1339,6 +1446,15 @@ DEFAULT_MINION_OPTS = {
     'autosign_timeout': 120,
     'multiprocessing': True,
     'process_count_max': -1,
+    'job_pool_size': 0,
+    'job_pool_functions': [
+        'test.ping',
+        'saltutil.find_job',
+        'saltutil.running',
+        'grains.get',
+        'grains.item',
+        'grains.items',
+    ],
     'mine_enabled': True,
     'mine_return_job': False,
     'mine_interval': 60,
@@ -1346,6 +1462,9 @@ DEFAULT_MINION_OPTS = {
     'ipc_write_buffer': _DFLT_IPC_WBUFFER,
     'ipv6': False,
     'file_buffer_size': 262144,
+    'file_transfer_window': 8,
+    'file_delta_min_size': 10485760,
+    'file_bundle_size': 1048576,
     'tcp_pub_port': 4510,
     'tcp_pull_port': 4511,
     'tcp_authentication_retries': 5,
@@ -1370,6 +1489,9 @@ DEFAULT_MINION_OPTS = {
     'state_auto_order': True,
     'state_events': False,
     'state_aggregate': False,
+    'state_concurrency': 0,
+    'state_render_cache': False,
+    'state_assume_converged': False,
     'snapper_states': False,
     'snapper_states_config': 'root',
     'acceptance_wait_time': 10,
@@ -1390,6 +1512,7 @@ DEFAULT_MINION_OPTS = {
     'return_retry_timer': 5,
     'return_retry_timer_max': 10,
     'random_reauth_delay': 10,
+    'pkg_list_cache': True,
     'winrepo_source_dir': 'salt://win/repo-ng/',
     'winrepo_dir': os.path.join(salt.syspaths.BASE_FILE_ROOTS_DIR, 'win', 'repo'),
     'winrepo_dir_ng': os.path.join(salt.syspaths.BASE_FILE_ROOTS_DIR, 'win', 'repo-ng'),
@@ -1491,6 +1614,7 @@ DEFAULT_MASTER_OPTS = {
     'auth_mode': 1,
     'user': _MASTER_USER,
     'worker_threads': 5,
+    'worker_pools': {},
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'master'),
     'sock_pool_size': 1,
     'ret_port': 4506,
@@ -1500,6 +1624,7 @@ DEFAULT_MASTER_OPTS = {
     'root_dir': salt.syspaths.ROOT_DIR,
     'pki_dir': os.path.join(salt.syspaths.CONFIG_DIR, 'pki', 'master'),
     'key_cache': '',
+    'pki_dir_inotify': False,
     'cachedir': os.path.join(salt.syspaths.CACHE_DIR, 'master'),
     'file_roots': {
         'base': [salt.syspaths.BASE_FILE_ROOTS_DIR,
@@ -1538,6 +1663,8 @@ DEFAULT_MASTER_OPTS = {
     'minionfs_update_interval': DEFAULT_INTERVAL,
     's3fs_update_interval': DEFAULT_INTERVAL,
     'svnfs_update_interval': DEFAULT_INTERVAL,
+    'roots_inotify': False,
+    'roots_inotify_rescan': 3600,
 
     'git_pillar_base': 'master',
     'git_pillar_branch': 'master',
@@ -1612,6 +1739,12 @@ DEFAULT_MASTER_OPTS = {
     'pillar_cache': False,
     'pillar_cache_ttl': 3600,
     'pillar_cache_backend': 'disk',
+    'pillar_compiled_cache': False,
+    'pillar_compiled_cache_ttl': 3600,
+    'pillar_compiled_cache_ext_pillar_ttl': {},
+    'pillar_render_cache': False,
+    'pillar_render_cache_size': 1000,
+    'pillar_roots_fingerprint_interval': 10,
     'ping_on_rotate': False,
     'peer': {},
     'preserve_minion_cache': False,
@@ -1638,6 +1771,7 @@ DEFAULT_MASTER_OPTS = {
     'file_recv': False,
     'file_recv_max_size': 100,
     'file_buffer_size': 1048576,
+    'file_transfer_window': 16,
     'file_ignore_regex': [],
     'file_ignore_glob': [],
     'fileserver_backend': ['roots'],
@@ -1645,6 +1779,7 @@ DEFAULT_MASTER_OPTS = {
     'fileserver_ignoresymlinks': False,
     'fileserver_limit_traversal': False,
     'fileserver_verify_config': True,
+    'fileserver_hash_cache_size': 65536,
     'max_open_files': 100000,
     'hash_type': 'sha256',
     'conf_file': os.path.join(salt.syspaths.CONFIG_DIR, 'master'),
@@ -1662,7 +1797,12 @@ DEFAULT_MASTER_OPTS = {
     'ext_job_cache': '',
     'master_job_cache': 'local_cache',
     'job_cache_store_endtime': False,
+    'return_batching': False,
+    'return_batch_size': 100,
+    'return_batch_latency': 0.5,
     'minion_data_cache': True,
+    'minion_data_index': False,
+    'minion_data_index_refresh': 60,
     'enforce_mine_cache': False,
     'ipc_mode': _DFLT_IPC_MODE,
     'ipc_write_buffer': _DFLT_IPC_WBUFFER,
@@ -1703,6 +1843,9 @@ DEFAULT_MASTER_OPTS = {
     'state_auto_order': True,
     'state_events': False,
     'state_aggregate': False,
+    'state_concurrency': 0,
+    'state_render_cache': False,
+    'state_assume_converged': False,
     'search': '',
     'loop_interval': 60,
     'nodegroups': {},
@@ -1736,6 +1879,7 @@ DEFAULT_MASTER_OPTS = {
     'jinja_sls_env': {},
     'jinja_lstrip_blocks': False,
     'jinja_trim_blocks': False,
+    'jinja_bytecode_cache': True,
     'tcp_keepalive': True,
     'tcp_keepalive_idle': 300,
     'tcp_keepalive_cnt': -1,
@@ -1784,6 +1928,7 @@ DEFAULT_MASTER_OPTS = {
     'master_pubkey_signature': 'master_pubkey_signature',
     'master_use_pubkey_signature': False,
     'zmq_filtering': False,
+    'publish_topic_targeting': True,
     'zmq_monitor': False,
     'con_cache': False,
     'rotate_aes_key': True,
@@ -10,6 +10,7 @@ import fnmatch
 import logging
 import os
 import re
+import shutil
 import time
 import stat
 
@@ -127,6 +128,24 @@ def clean_fsbackend(opts):
                         cache_file, exc
                     )
 
+    # The file hashes are kept in the shared hash cache of the fileserver, remove
+    # the hash files the backends used to write
+    for backend in ('roots', 'minionfs'):
+        hash_dir = os.path.join(opts['cachedir'], backend, 'hash')
+        if os.path.isdir(hash_dir):
+            log.debug('Clearing %s hash cache', backend)
+            shutil.rmtree(hash_dir, ignore_errors=True)
+    # The gitfs hash directory also holds the blob hashes and the locks
+    gitfs_hash_dir = os.path.join(opts['cachedir'], 'gitfs', 'hash')
+    for root, _, files in salt.utils.path.os_walk(gitfs_hash_dir):
+        for name in fnmatch.filter(files, '*.hash.*'):
+            if name.endswith('.hash.blob_sha1'):
+                continue
+            try:
+                os.remove(os.path.join(root, name))
+            except OSError:
+                pass
+
 
 def clean_expired_tokens(opts):
     '''
@@ -434,6 +453,9 @@ class RemoteFuncs(object):
         '''
         fs_ = salt.fileserver.Fileserver(self.opts)
         self._serve_file = fs_.serve_file
+        self._serve_file_delta = fs_.serve_file_delta
+        self._serve_file_bundle = fs_.serve_file_bundle
+        self._file_manifest = fs_.file_manifest
         self._file_find = fs_._find_file
         self._file_hash = fs_.file_hash
         self._file_list = fs_.file_list
@@ -713,9 +735,13 @@ class RemoteFuncs(object):
                 pillar_override=load.get('pillar_override', {}))
         data = pillar.compile_pillar()
         if self.opts.get('minion_data_cache', False):
+            mdata = {'grains': load['grains'], 'pillar': data}
             self.cache.store('minions/{0}'.format(load['id']),
                              'data',
-                             {'grains': load['grains'], 'pillar': data})
+                             mdata)
+            salt.utils.minions.MinionDataIndex.update_minion(self.opts,
+                                                             load['id'],
+                                                             mdata)
             if self.opts.get('minion_data_cache_events') is True:
                 self.event.fire_event({'comment': 'Minion data cache refresh'}, salt.utils.event.tagify(load['id'], 'refresh', 'minion'))
         return data
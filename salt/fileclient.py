@@ -7,6 +7,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 # Import python libs
 import contextlib
 import errno
+import hashlib
 import logging
 import os
 import string
@@ -206,10 +207,69 @@ class Client(object):
             ret.append(self.cache_file(path, saltenv, cachedir=cachedir))
         return ret
 
+    def _cache_manifest(self, manifest, saltenv='base', cachedir=None):
+        '''
+        Cache the files of a manifest of the file server, only fetching the
+        ones missing from the cache or changed on the file server. The small
+        files are fetched several at a time.
+        '''
+        cached = {}
+        stale = []
+        for path in manifest:
+            with self._cache_loc(path, saltenv, cachedir=cachedir) as dest:
+                if os.path.isfile(dest) and salt.utils.hashutils.get_hash(
+                        dest, manifest[path]['hash_type']) == manifest[path]['hsum']:
+                    cached[path] = dest
+                else:
+                    stale.append(path)
+
+        bundle_size = self.opts.get('file_bundle_size', 0)
+        max_size = min(bundle_size, self.opts['file_buffer_size'])
+        batches = []
+        batch_size = 0
+        for path in stale:
+            size = manifest[path]['size']
+            if size > max_size:
+                continue
+            if not batches or batch_size + size > bundle_size:
+                batches.append([])
+                batch_size = 0
+            batches[-1].append(path)
+            batch_size += size
+        for batch in batches:
+            bundle = self._get_file_bundle(batch, saltenv, cachedir=cachedir)
+            for path, dest in six.iteritems(bundle):
+                if salt.utils.hashutils.get_hash(
+                        dest, manifest[path]['hash_type']) == manifest[path]['hsum']:
+                    cached[path] = dest
+
+        for path in stale:
+            if path not in cached:
+                cached[path] = self.cache_file(
+                    salt.utils.url.create(path), saltenv, cachedir=cachedir)
+        return [cached[path] for path in sorted(cached) if cached[path]]
+
+    def _get_file_bundle(self, paths, saltenv='base', cachedir=None):
+        '''
+        Cache several small files at once, return a dict mapping the paths of
+        the files which were cached to their location in the cache
+        '''
+        return {}
+
+    def file_manifest(self, saltenv='base', prefix=''):
+        '''
+        Return the hash, mode and size of the files on the file server, or None
+        if the file server can not list them this way
+        '''
+        return None
+
     def cache_master(self, saltenv='base', cachedir=None):
         '''
         Download and cache all files on a master in a specified environment
         '''
+        manifest = self.file_manifest(saltenv)
+        if manifest is not None:
+            return self._cache_manifest(manifest, saltenv, cachedir=cachedir)
         ret = []
         for path in self.file_list(saltenv):
             ret.append(
@@ -235,17 +295,27 @@ class Client(object):
         log.info(
             'Caching directory \'%s\' for environment \'%s\'', path, saltenv
         )
-        # go through the list of all files finding ones that are in
-        # the target directory and caching them
-        for fn_ in self.file_list(saltenv):
-            fn_ = sdecode(fn_)
-            if fn_.strip() and fn_.startswith(path):
-                if salt.utils.stringutils.check_include_exclude(
-                        fn_, include_pat, exclude_pat):
-                    fn_ = self.cache_file(
-                        salt.utils.url.create(fn_), saltenv, cachedir=cachedir)
-                    if fn_:
-                        ret.append(fn_)
+        manifest = self.file_manifest(saltenv, path)
+        if manifest is not None:
+            ret.extend(self._cache_manifest(
+                dict((fn_, manifest[fn_]) for fn_ in manifest
+                     if fn_.startswith(path) and
+                     salt.utils.stringutils.check_include_exclude(
+                         fn_, include_pat, exclude_pat)),
+                saltenv,
+                cachedir=cachedir))
+        else:
+            # go through the list of all files finding ones that are in
+            # the target directory and caching them
+            for fn_ in self.file_list(saltenv):
+                fn_ = sdecode(fn_)
+                if fn_.strip() and fn_.startswith(path):
+                    if salt.utils.stringutils.check_include_exclude(
+                            fn_, include_pat, exclude_pat):
+                        fn_ = self.cache_file(
+                            salt.utils.url.create(fn_), saltenv, cachedir=cachedir)
+                        if fn_:
+                            ret.append(fn_)
 
         if include_empty:
             # Break up the path into a list containing the bottom-level
@@ -1071,6 +1141,83 @@ class RemoteClient(Client):
         self.channel = salt.transport.Channel.factory(self.opts)
         return self.channel
 
+    def _get_file_delta(self, path, saltenv, dest, hash_server, gzip=None):
+        '''
+        Update the outdated copy of a file at dest with only the blocks which
+        differ from the file on the master. Return False when the delta can
+        not be used, in which case the whole file has to be fetched.
+        '''
+        min_size = self.opts.get('file_delta_min_size', 0)
+        try:
+            if not min_size or os.path.getsize(dest) < min_size:
+                return False
+        except OSError:
+            return False
+
+        block_size = self.opts['file_buffer_size']
+        hash_type = self.opts['hash_type']
+        hashes = []
+        with salt.utils.files.fopen(dest, 'rb') as fp_:
+            while True:
+                block = fp_.read(block_size)
+                if not block:
+                    break
+                hashes.append(hashlib.new(hash_type, block).hexdigest())
+        load = {'path': self._check_proto(path),
+                'saltenv': saltenv,
+                'cmd': '_serve_file_delta',
+                'block_size': block_size,
+                'hash_type': hash_type,
+                'hashes': hashes,
+                'loc': 0}
+        if gzip:
+            load['gzip'] = int(gzip)
+
+        log.debug(
+            'Fetching file from saltenv \'%s\', ** attempting delta ** \'%s\'',
+            saltenv, path
+        )
+        tmp = salt.utils.files.mkstemp(prefix='.__delta_', dir=os.path.dirname(dest))
+        try:
+            with salt.utils.files.fopen(dest, 'rb') as ofile, \
+                    salt.utils.files.fopen(tmp, 'wb') as nfile:
+                while True:
+                    data = self.channel.send(load, raw=True)
+                    if six.PY3 and isinstance(data, dict):
+                        data = decode_dict_keys_to_str(data)
+                    if not isinstance(data, dict) or 'blocks' not in data:
+                        # An older master, or one refusing the delta
+                        return False
+                    if not data['blocks']:
+                        break
+                    for block in data['blocks']:
+                        if isinstance(block, six.integer_types):
+                            ofile.seek(block * block_size)
+                            block = ofile.read(block_size)
+                        elif data.get('gzip', None):
+                            block = salt.utils.gzip_util.uncompress(block)
+                        nfile.write(block)
+                    load['loc'] += len(data['blocks'])
+            hsum = salt.utils.hashutils.get_hash(
+                tmp,
+                salt.utils.stringutils.to_str(hash_server.get('hash_type', 'md5')))
+            if hsum != hash_server.get('hsum'):
+                log.warning('Bad delta download of file %s', path)
+                return False
+            shutil.copymode(dest, tmp)
+            salt.utils.files.rename(tmp, dest)
+        except (TypeError, KeyError, IOError, OSError) as exc:
+            log.warning('Delta download of file %s failed: %s', path, exc)
+            return False
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        log.info(
+            'Fetching file from saltenv \'%s\', ** done with delta ** \'%s\'',
+            saltenv, path
+        )
+        return True
+
     def get_file(self,
                  path,
                  dest='',
@@ -1149,6 +1296,8 @@ class RemoteClient(Client):
 
             if hash_local == hash_server:
                 return dest2check
+            if self._get_file_delta(path, saltenv, dest2check, hash_server, gzip):
+                return dest2check
 
         log.debug(
             'Fetching file from saltenv \'%s\', ** attempting ** \'%s\'',
@@ -1163,6 +1312,11 @@ class RemoteClient(Client):
         if gzip:
             gzip = int(gzip)
             load['gzip'] = gzip
+        window = self.opts.get('file_transfer_window', 1)
+        if window > 1:
+            # Masters that predate windowed transfers ignore this and
+            # answer with a single chunk
+            load['window'] = window
 
         fn_ = None
         if dest:
@@ -1225,13 +1379,12 @@ class RemoteClient(Client):
                         if os.path.isdir(dest):
                             salt.utils.files.rm_rf(dest)
                         fn_ = salt.utils.files.fopen(dest, 'wb+')
-                if data.get('gzip', None):
-                    data = salt.utils.gzip_util.uncompress(data['data'])
-                else:
-                    data = data['data']
-                if six.PY3 and isinstance(data, str):
-                    data = data.encode()
-                fn_.write(data)
+                for chunk in [data['data']] + list(data.get('chunks') or []):
+                    if data.get('gzip', None):
+                        chunk = salt.utils.gzip_util.uncompress(chunk)
+                    if six.PY3 and isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    fn_.write(chunk)
             except (TypeError, KeyError) as exc:
                 try:
                     data_type = type(data).__name__
@@ -1267,6 +1420,50 @@ class RemoteClient(Client):
 
         return dest
 
+    def file_manifest(self, saltenv='base', prefix=''):
+        '''
+        Return the hash, mode and size of the files on the master, or None if
+        the master does not support manifests
+        '''
+        load = {'saltenv': saltenv,
+                'prefix': prefix,
+                'cmd': '_file_manifest'}
+        ret = self.channel.send(load)
+        if not isinstance(ret, dict):
+            return None
+        return salt.utils.data.decode(ret) if six.PY2 else ret
+
+    def _get_file_bundle(self, paths, saltenv='base', cachedir=None):
+        '''
+        Cache several small files from the master in one request, return a
+        dict mapping the paths of the files which were cached to their
+        location in the cache
+        '''
+        load = {'paths': paths,
+                'saltenv': saltenv,
+                'cmd': '_serve_file_bundle'}
+        data = self.channel.send(load, raw=True)
+        if six.PY3 and isinstance(data, dict):
+            data = decode_dict_keys_to_str(data)
+        try:
+            files = data['files']
+        except (KeyError, TypeError):
+            return {}
+        ret = {}
+        for path, contents in six.iteritems(files):
+            path = salt.utils.stringutils.to_unicode(path)
+            if path not in paths:
+                continue
+            with self._cache_loc(path, saltenv, cachedir=cachedir) as dest:
+                # If a directory was formerly cached at this path, then
+                # remove it to avoid a traceback trying to write the file
+                if os.path.isdir(dest):
+                    salt.utils.files.rm_rf(dest)
+                with salt.utils.files.fopen(dest, 'wb+') as ofile:
+                    ofile.write(contents)
+            ret[path] = dest
+        return ret
+
     def file_list(self, saltenv='base', prefix=''):
         '''
         List the files on the master
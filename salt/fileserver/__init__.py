@@ -8,16 +8,24 @@ from __future__ import absolute_import, print_function, unicode_literals
 import collections
 import errno
 import fnmatch
+import hashlib
 import logging
+import mmap
 import os
 import re
+import stat
+import struct
 import time
+import zlib
 
 # Import salt libs
 import salt.loader
 import salt.utils.data
 import salt.utils.files
+import salt.utils.gzip_util
+import salt.utils.hashutils
 import salt.utils.path
+import salt.utils.stringutils
 import salt.utils.url
 import salt.utils.versions
 from salt.utils.args import get_function_argspec as _argspec
@@ -25,6 +33,7 @@ from salt.utils.decorators import ensure_unicode_args
 
 # Import 3rd-party libs
 from salt.ext import six
+from salt.ext.six.moves import range
 
 
 log = logging.getLogger(__name__)
@@ -286,6 +295,138 @@ def is_file_ignored(opts, fname):
     return False
 
 
+class HashCache(object):
+    '''
+    A table of file hashes in a memory mapped file under the cachedir, shared
+    by all the processes serving files, such as the MWorkers of a master.
+
+    Every slot holds the hash of one file along with the mtime, size and inode
+    the file had when it was hashed. Files whose keys land on the same slot
+    evict each other, and a slot read while another process writes it fails
+    its checksum and counts as a miss.
+    '''
+    # key digest, mtime in ns, size, inode, hash length, hash, crc32
+    record = struct.Struct(str('<16sqQQB128sI'))
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        size = slots * self.record.size
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        fd_ = os.open(path,
+                      os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0),
+                      0o600)
+        try:
+            if os.fstat(fd_).st_size != size:
+                os.ftruncate(fd_, size)
+            self.map = mmap.mmap(fd_, size)
+        finally:
+            os.close(fd_)
+
+    @staticmethod
+    def signature(st_):
+        '''
+        Return the mtime (in nanoseconds), size and inode of a stat result
+        '''
+        mtime = getattr(st_, 'st_mtime_ns', None)
+        if mtime is None:
+            mtime = int(st_.st_mtime * 1000000000)
+        return mtime, st_.st_size, st_.st_ino & 0xffffffffffffffff
+
+    def _slot(self, key):
+        '''
+        Return the digest of the key and the offset of its slot
+        '''
+        digest = hashlib.sha256(salt.utils.stringutils.to_bytes(key)).digest()[:16]
+        index = struct.unpack(str('<Q'), digest[:8])[0] % self.slots
+        return digest, index * self.record.size
+
+    def get(self, key, st_):
+        '''
+        Return the cached hash of key, or None if it is missing or the file
+        changed since it was hashed
+        '''
+        digest, offset = self._slot(key)
+        data = self.map[offset:offset + self.record.size]
+        record = self.record.unpack(data)
+        if record[0] != digest or record[1:4] != self.signature(st_):
+            return None
+        if zlib.crc32(data[:-4]) & 0xffffffff != record[6]:
+            return None
+        return salt.utils.stringutils.to_unicode(record[5][:record[4]])
+
+    def set(self, key, st_, hsum):
+        '''
+        Cache the hash of key for the file described by the stat result
+        '''
+        hsum = salt.utils.stringutils.to_bytes(hsum)
+        if len(hsum) > 128:
+            return
+        digest, offset = self._slot(key)
+        data = self.record.pack(
+            digest, *(self.signature(st_) + (len(hsum), hsum, 0)))[:-4]
+        data += struct.pack(str('<I'), zlib.crc32(data) & 0xffffffff)
+        self.map[offset:offset + self.record.size] = data
+
+
+_HASH_CACHES = {}
+
+
+def _hash_cache(opts):
+    '''
+    Return the HashCache of this process, or None if it is disabled or could
+    not be mapped
+    '''
+    slots = opts.get('fileserver_hash_cache_size', 0)
+    if not slots:
+        return None
+    path = os.path.join(opts['cachedir'],
+                        'fileserver',
+                        'hash_cache.{0}'.format(slots))
+    if path not in _HASH_CACHES:
+        try:
+            _HASH_CACHES[path] = HashCache(path, slots)
+        except (EnvironmentError, ValueError) as exc:
+            log.error('Unable to map the file hash cache %s: %s', path, exc)
+            _HASH_CACHES[path] = None
+    return _HASH_CACHES[path]
+
+
+def cached_file_hash(opts, backend, saltenv, rel, path):
+    '''
+    Return the hash of the file at path, of the hash_type set in opts, or None
+    if it is not a regular file. The hash is served from the shared hash cache
+    for as long as the mtime, size and inode of the file do not change.
+    '''
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st_.st_mode):
+        return None
+
+    cache = _hash_cache(opts)
+    key = '\0'.join((backend, saltenv, rel, opts['hash_type']))
+    if cache is not None:
+        hsum = cache.get(key, st_)
+        if hsum is not None:
+            return hsum
+
+    hsum = salt.utils.hashutils.get_hash(path, opts['hash_type'])
+    if cache is not None:
+        try:
+            # Only cache the hash if the file did not change while hashing it
+            if HashCache.signature(os.stat(path)) == HashCache.signature(st_):
+                cache.set(key, st_, hsum)
+        except OSError:
+            pass
+    return hsum
+
+
 def clear_lock(clear_func, role, remote=None, lock_type='update'):
     '''
     Function to allow non-fileserver functions to clear update locks
@@ -592,6 +733,10 @@ class Fileserver(object):
     def serve_file(self, load):
         '''
         Serve up a chunk of a file
+
+        When the load asks for a ``window`` of more than one chunk, the chunks
+        following the first one are returned in the ``chunks`` list of the
+        return, up to ``file_transfer_window`` chunks in total.
         '''
         ret = {'data': '',
                'dest': ''}
@@ -609,8 +754,163 @@ class Fileserver(object):
         if not fnd.get('back'):
             return ret
         fstr = '{0}.serve_file'.format(fnd['back'])
-        if fstr in self.servers:
-            return self.servers[fstr](load, fnd)
+        if fstr not in self.servers:
+            return ret
+        ret = self.servers[fstr](load, fnd)
+        try:
+            window = min(int(load.get('window', 1)),
+                         self.opts.get('file_transfer_window', 1))
+        except (TypeError, ValueError):
+            window = 1
+        if window > 1 and ret.get('data'):
+            # Every backend reads file_buffer_size bytes per chunk, so the
+            # following chunks start at fixed offsets from the first one.
+            ret['chunks'] = []
+            chunk_load = dict(load)
+            for idx in range(1, window):
+                chunk_load['loc'] = load['loc'] + idx * self.opts['file_buffer_size']
+                chunk = self.servers[fstr](chunk_load, fnd)
+                if not chunk.get('data'):
+                    break
+                ret['chunks'].append(chunk['data'])
+        return ret
+
+    def serve_file_delta(self, load):
+        '''
+        Serve up the differences between a file and the copy a minion has
+
+        The load carries the ``hashes`` of the ``block_size`` blocks of the
+        copy of the minion. Starting at block ``loc`` of the file, every entry
+        of the ``blocks`` list of the return is either the index of the block
+        of the copy with the same contents, or the contents of the block. The
+        list is empty past the end of the file. An empty return means the
+        delta can not be served and the whole file has to be fetched.
+        '''
+        if 'env' in load:
+            # "env" is not supported; Use "saltenv".
+            load.pop('env')
+
+        for key in ('path', 'loc', 'saltenv', 'block_size', 'hashes'):
+            if key not in load:
+                return {}
+        if not isinstance(load['saltenv'], six.string_types):
+            load['saltenv'] = six.text_type(load['saltenv'])
+
+        # The literal blocks of a reply are bounded like a windowed transfer
+        max_size = self.opts['file_buffer_size'] * \
+            max(self.opts.get('file_transfer_window', 1), 1)
+        try:
+            block_size = int(load['block_size'])
+            loc = int(load['loc'])
+            hash_type = salt.utils.stringutils.to_str(
+                load.get('hash_type', self.opts['hash_type']))
+            hashlib.new(hash_type)
+        except (TypeError, ValueError):
+            return {}
+        if not 4096 <= block_size <= max_size or loc < 0:
+            return {}
+
+        fnd = self.find_file(load['path'], load['saltenv'])
+        if not fnd.get('path') or not os.path.isfile(fnd['path']):
+            return {}
+
+        index = {}
+        for idx, hsum in enumerate(load['hashes']):
+            index.setdefault(salt.utils.stringutils.to_str(hsum), idx)
+        gzip = load.get('gzip', None)
+        ret = {'blocks': [],
+               'dest': fnd['rel']}
+        literal = 0
+        with salt.utils.files.fopen(fnd['path'], 'rb') as fp_:
+            fp_.seek(loc * block_size)
+            # Copied blocks cost a few bytes in the reply, cap them as well
+            while literal < max_size and len(ret['blocks']) < 4096:
+                block = fp_.read(block_size)
+                if not block:
+                    break
+                match = index.get(hashlib.new(hash_type, block).hexdigest())
+                if match is not None:
+                    ret['blocks'].append(match)
+                    continue
+                literal += len(block)
+                if gzip:
+                    block = salt.utils.gzip_util.compress(block, gzip)
+                    ret['gzip'] = gzip
+                ret['blocks'].append(block)
+        return ret
+
+    def serve_file_bundle(self, load):
+        '''
+        Serve up the whole contents of several small files in one reply
+
+        The files larger than ``file_buffer_size`` are left out, as are the
+        files past the ``file_buffer_size`` times ``file_transfer_window``
+        bytes a reply may carry. They have to be fetched one at a time.
+        '''
+        if 'env' in load:
+            # "env" is not supported; Use "saltenv".
+            load.pop('env')
+
+        ret = {'files': {}}
+        if 'paths' not in load or 'saltenv' not in load:
+            return ret
+        if not isinstance(load['saltenv'], six.string_types):
+            load['saltenv'] = six.text_type(load['saltenv'])
+
+        max_size = self.opts['file_buffer_size'] * \
+            max(self.opts.get('file_transfer_window', 1), 1)
+        size = 0
+        for path in load['paths']:
+            path = salt.utils.stringutils.to_unicode(path)
+            fnd = self.find_file(path, load['saltenv'])
+            if not fnd.get('path'):
+                continue
+            try:
+                fsize = os.path.getsize(fnd['path'])
+            except OSError:
+                continue
+            if fsize > self.opts['file_buffer_size'] or size + fsize > max_size:
+                continue
+            with salt.utils.files.fopen(fnd['path'], 'rb') as fp_:
+                ret['files'][path] = fp_.read()
+            size += fsize
+        return ret
+
+    @ensure_unicode_args
+    def file_manifest(self, load):
+        '''
+        Return the hash, mode and size of the files of an environment, keyed
+        by their path, for the files starting with the optional prefix
+        '''
+        if 'env' in load:
+            # "env" is not supported; Use "saltenv".
+            load.pop('env')
+
+        ret = {}
+        if 'saltenv' not in load:
+            return ret
+        if not isinstance(load['saltenv'], six.string_types):
+            load['saltenv'] = six.text_type(load['saltenv'])
+
+        for path in self.file_list(dict(load)):
+            fnd = self.find_file(path, load['saltenv'])
+            if not fnd.get('back') or not fnd.get('path'):
+                continue
+            fstr = '{0}.file_hash'.format(fnd['back'])
+            if fstr not in self.servers:
+                continue
+            hsum = self.servers[fstr]({'path': path, 'saltenv': load['saltenv']}, fnd)
+            if not hsum:
+                continue
+            stat_result = fnd.get('stat')
+            try:
+                size = stat_result[6] if stat_result else os.path.getsize(fnd['path'])
+            except OSError:
+                continue
+            ret[path] = {'hsum': hsum['hsum'],
+                         'hash_type': hsum['hash_type'],
+                         'mode': stat_result[0] if stat_result else None,
+                         'size': size}
         return ret
 
     def __file_hash_and_stat(self, load):
@@ -37,7 +37,6 @@ import logging
 import salt.fileserver
 import salt.utils.files
 import salt.utils.gzip_util
-import salt.utils.hashutils
 import salt.utils.path
 import salt.utils.stringutils
 import salt.utils.url
@@ -154,15 +153,10 @@ def serve_file(load, fnd):
 
 def update():
     '''
-    When we are asked to update (regular interval) lets reap the cache
+    When we are asked to update (regular interval) there is nothing to do, the
+    file hashes are kept in the shared hash cache of the fileserver
     '''
-    try:
-        salt.fileserver.reap_fileserver_cache_dir(
-            os.path.join(__opts__['cachedir'], 'minionfs/hash'),
-            find_file)
-    except os.error:
-        # Hash file won't exist if no files have yet been served up
-        pass
+    pass
 
 
 def file_hash(load, fnd):
@@ -180,57 +174,16 @@ def file_hash(load, fnd):
         return {}
 
     # if the file doesn't exist, we can't get a hash
-    if not path or not os.path.isfile(path):
+    if not path:
+        return ret
+    hsum = salt.fileserver.cached_file_hash(
+        __opts__, 'minionfs', load['saltenv'], fnd['rel'], path)
+    if hsum is None:
         return ret
 
     # set the hash_type as it is determined by config-- so mechanism won't change that
     ret['hash_type'] = __opts__['hash_type']
-
-    # check if the hash is cached
-    # cache file's contents should be "hash:mtime"
-    cache_path = os.path.join(
-        __opts__['cachedir'],
-        'minionfs',
-        'hash',
-        load['saltenv'],
-        '{0}.hash.{1}'.format(fnd['rel'], __opts__['hash_type'])
-    )
-    # if we have a cache, serve that if the mtime hasn't changed
-    if os.path.exists(cache_path):
-        try:
-            with salt.utils.files.fopen(cache_path, 'rb') as fp_:
-                try:
-                    hsum, mtime = salt.utils.stringutils.to_unicode(fp_.read()).split(':')
-                except ValueError:
-                    log.debug(
-                        'Fileserver attempted to read incomplete cache file. '
-                        'Retrying.'
-                    )
-                    file_hash(load, fnd)
-                    return ret
-                if os.path.getmtime(path) == mtime:
-                    # check if mtime changed
-                    ret['hsum'] = hsum
-                    return ret
-        # Can't use Python select() because we need Windows support
-        except os.error:
-            log.debug(
-                'Fileserver encountered lock when reading cache file. '
-                'Retrying.'
-            )
-            file_hash(load, fnd)
-            return ret
-
-    # if we don't have a cache entry-- lets make one
-    ret['hsum'] = salt.utils.hashutils.get_hash(path, __opts__['hash_type'])
-    cache_dir = os.path.dirname(cache_path)
-    # make cache directory if it doesn't exist
-    if not os.path.exists(cache_dir):
-        os.makedirs(cache_dir)
-    # save the cache object "hash:mtime"
-    cache_object = '{0}:{1}'.format(ret['hsum'], os.path.getmtime(path))
-    with salt.utils.files.flopen(cache_path, 'w') as fp_:
-        fp_.write(cache_object)
+    ret['hsum'] = hsum
     return ret
 
 
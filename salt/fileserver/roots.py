@@ -18,22 +18,32 @@ configuration option.
 from __future__ import absolute_import, print_function, unicode_literals
 
 # Import python libs
+import collections
 import os
-import errno
 import logging
+import posixpath
+import time
 
 # Import salt libs
 import salt.fileserver
+import salt.payload
+import salt.utils.atomicfile
 import salt.utils.event
 import salt.utils.files
 import salt.utils.gzip_util
-import salt.utils.hashutils
 import salt.utils.path
 import salt.utils.platform
 import salt.utils.stringutils
 import salt.utils.versions
 from salt.ext import six
 
+# Import third party libs
+try:
+    import pyinotify
+    HAS_PYINOTIFY = True
+except ImportError:
+    HAS_PYINOTIFY = False
+
 log = logging.getLogger(__name__)
 
 
@@ -138,18 +148,34 @@ def serve_file(load, fnd):
     return ret
 
 
+def _fire_update_event(data):
+    '''
+    Fire the event of an update if fileserver_events is enabled
+    '''
+    if __opts__.get('fileserver_events', False):
+        # if there is a change, fire an event
+        event = salt.utils.event.get_event(
+                'master',
+                __opts__['sock_dir'],
+                __opts__['transport'],
+                opts=__opts__,
+                listen=False)
+        event.fire_event(data,
+                         salt.utils.event.tagify(['roots', 'update'], prefix='fileserver'))
+
+
 def update():
     '''
     When we are asked to update (regular interval) lets reap the cache
     '''
-    try:
-        salt.fileserver.reap_fileserver_cache_dir(
-            os.path.join(__opts__['cachedir'], 'roots', 'hash'),
-            find_file
-        )
-    except (IOError, OSError):
-        # Hash file won't exist if no files have yet been served up
-        pass
+    # Only the FileserverUpdate process maintains the file lists from the
+    # inotify events, other processes like fileserver.update walk the roots
+    if _inotify_configured() and __opts__.get('__fileserver_update') \
+            and not __context__.get('roots.inotify_failed'):
+        data = _update_from_events()
+        if data is not None:
+            _fire_update_event(data)
+            return
 
     mtime_map_path = os.path.join(__opts__['cachedir'], 'roots', 'mtime_map')
     # data to send on event
@@ -199,16 +225,225 @@ def update():
                 )
             )
 
-    if __opts__.get('fileserver_events', False):
-        # if there is a change, fire an event
-        event = salt.utils.event.get_event(
-                'master',
-                __opts__['sock_dir'],
-                __opts__['transport'],
-                opts=__opts__,
-                listen=False)
-        event.fire_event(data,
-                         salt.utils.event.tagify(['roots', 'update'], prefix='fileserver'))
+    _fire_update_event(data)
+
+
+def _inotify_configured():
+    return HAS_PYINOTIFY and __opts__.get('roots_inotify', False)
+
+
+def _inotify_failed_path():
+    return os.path.join(__opts__['cachedir'], 'roots', 'inotify_failed')
+
+
+def _inotify_enabled():
+    '''
+    Return whether the file lists are maintained from inotify events. This
+    stops when some directory of the file_roots could not be watched.
+    '''
+    return _inotify_configured() and not os.path.exists(_inotify_failed_path())
+
+
+def _env_rel_paths(path):
+    '''
+    Yield the environments whose file_roots contain the absolute path, along
+    with the path relative to the root
+    '''
+    for saltenv in __opts__['file_roots']:
+        for root in __opts__['file_roots'][saltenv]:
+            rel_path = os.path.relpath(path, root)
+            if rel_path != os.curdir and not rel_path.startswith(os.pardir):
+                yield saltenv, _translate_sep(rel_path)
+                break
+
+
+class _RootsWatcher(object):
+    '''
+    Maintain the file lists of every environment from the inotify events of
+    the file_roots
+    '''
+    def __init__(self):
+        self.queue = collections.deque()
+        self.manager = pyinotify.WatchManager()
+        self.notifier = pyinotify.Notifier(self.manager, self.queue.append)
+        self.file_lists = {}
+        self.last_rescan = 0
+        # Set when a directory could not be watched
+        self.failed = False
+        roots = set()
+        for saltenv in __opts__['file_roots']:
+            roots.update(__opts__['file_roots'][saltenv])
+        for root in roots:
+            self.watch(root)
+
+    def watch(self, path):
+        '''
+        Watch a directory and the directories created under it
+        '''
+        if os.path.isdir(path):
+            wds = self.manager.add_watch(
+                path,
+                pyinotify.IN_CREATE | pyinotify.IN_DELETE |
+                pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO |
+                pyinotify.IN_CLOSE_WRITE,
+                rec=True,
+                auto_add=True)
+            # pyinotify returns a negative watch descriptor for the
+            # directories it could not watch, e.g. past max_user_watches
+            if any(wd < 0 for wd in six.itervalues(wds)):
+                self.failed = True
+
+    def stop(self):
+        '''
+        Stop watching the file_roots
+        '''
+        try:
+            self.notifier.stop()
+        except (IOError, OSError) as exc:
+            log.debug('roots: Unable to close the inotify instance: %s', exc)
+
+    def rescan(self):
+        '''
+        Walk the file_roots of every environment, return the update event
+        data and the environments whose file lists changed
+        '''
+        self.queue.clear()
+        changed = set()
+        for saltenv in __opts__['file_roots']:
+            file_lists = _walk_file_roots(saltenv)
+            if file_lists != self.file_lists.get(saltenv):
+                changed.add(saltenv)
+            self.file_lists[saltenv] = file_lists
+        self.last_rescan = time.time()
+        return ({'changed': bool(changed),
+                 'files': {'changed': [], 'removed': [], 'added': []},
+                 'backend': 'roots'},
+                changed)
+
+    def process_events(self):
+        '''
+        Apply the pending inotify events to the file lists, return the
+        update event data and the environments whose file lists changed
+        '''
+        while self.notifier.check_events(timeout=0):
+            self.notifier.read_events()
+            self.notifier.process_events()
+
+        paths = {}
+        updates = set()
+        while self.queue:
+            event = self.queue.popleft()
+            if event.mask & pyinotify.IN_Q_OVERFLOW:
+                log.warning(
+                    'roots: The inotify event queue overflowed, walking '
+                    'the file_roots again'
+                )
+                return self.rescan()
+            rel_paths = list(_env_rel_paths(event.pathname))
+            if not rel_paths:
+                continue
+            if event.mask & pyinotify.IN_MOVED_TO and event.dir:
+                self.watch(event.pathname)
+            elif event.mask & pyinotify.IN_CREATE and event.dir \
+                    and self.manager.get_wd(event.pathname) is None \
+                    and os.path.isdir(event.pathname):
+                # pyinotify could not watch the new directory
+                self.failed = True
+            if not event.dir:
+                paths[event.pathname] = rel_paths
+            if not event.mask & pyinotify.IN_CLOSE_WRITE:
+                updates.update(rel_paths)
+
+        def _served(rel_paths):
+            return any(rel_path in self.file_lists[saltenv]['files']
+                       for saltenv, rel_path in rel_paths)
+
+        before = dict((path, _served(rel_paths))
+                      for path, rel_paths in six.iteritems(paths))
+        for saltenv, rel_path in updates:
+            _update_file_lists(self.file_lists[saltenv], saltenv, rel_path)
+
+        files = {'changed': [], 'removed': [], 'added': []}
+        for path in sorted(paths):
+            after = _served(paths[path])
+            if before[path] and after:
+                files['changed'].append(path)
+            elif after:
+                files['added'].append(path)
+            elif before[path]:
+                files['removed'].append(path)
+        changed = set(saltenv for saltenv, _ in updates)
+        return ({'changed': bool(changed) or bool(files['changed']),
+                 'files': files,
+                 'backend': 'roots'},
+                changed)
+
+
+def _disable_inotify(watcher):
+    '''
+    Stop maintaining the file lists from inotify events, in this process and
+    in the processes serving the files
+    '''
+    log.error(
+        'roots: Unable to watch all the directories of the file_roots, '
+        'fs.inotify.max_user_watches may be too low. Walking the file_roots '
+        'at every update instead.'
+    )
+    __context__['roots.inotify_failed'] = True
+    __context__.pop('roots.watcher', None)
+    watcher.stop()
+    failed_path = _inotify_failed_path()
+    try:
+        if not os.path.isdir(os.path.dirname(failed_path)):
+            os.makedirs(os.path.dirname(failed_path))
+        with salt.utils.files.fopen(failed_path, 'w'):
+            pass
+    except (IOError, OSError) as exc:
+        log.error('roots: Unable to write %s: %s', failed_path, exc)
+
+
+def _update_from_events():
+    '''
+    Update the file lists cache from the inotify events, walking the
+    file_roots again every roots_inotify_rescan seconds. Return None if the
+    file_roots could not all be watched.
+    '''
+    watcher = __context__.get('roots.watcher')
+    if watcher is None:
+        watcher = __context__['roots.watcher'] = _RootsWatcher()
+        if not watcher.failed:
+            try:
+                os.remove(_inotify_failed_path())
+            except OSError:
+                pass
+    if watcher.failed:
+        _disable_inotify(watcher)
+        return None
+    if time.time() - watcher.last_rescan >= __opts__['roots_inotify_rescan']:
+        data, changed = watcher.rescan()
+    else:
+        data, changed = watcher.process_events()
+        if watcher.failed:
+            _disable_inotify(watcher)
+            return None
+
+    serial = salt.payload.Serial(__opts__)
+    for saltenv in watcher.file_lists:
+        try:
+            list_cache, _ = _list_cache_paths(saltenv)
+            if saltenv in changed or not os.path.isfile(list_cache):
+                with salt.utils.atomicfile.atomic_open(list_cache, 'wb') as fp_:
+                    fp_.write(serial.dumps(
+                        _sorted_file_lists(watcher.file_lists[saltenv])))
+            else:
+                # Keep the cache fresh for the workers
+                os.utime(list_cache, None)
+        except (IOError, OSError) as exc:
+            log.error(
+                'roots: Unable to write the file lists cache of saltenv '
+                '\'%s\': %s', saltenv, exc
+            )
+    return data
 
 
 def file_hash(load, fnd):
@@ -225,66 +460,183 @@ def file_hash(load, fnd):
     ret = {}
 
     # if the file doesn't exist, we can't get a hash
-    if not path or not os.path.isfile(path):
+    if not path:
+        return ret
+    hsum = salt.fileserver.cached_file_hash(
+        __opts__, 'roots', load['saltenv'], fnd['rel'], path)
+    if hsum is None:
         return ret
 
     # set the hash_type as it is determined by config-- so mechanism won't change that
     ret['hash_type'] = __opts__['hash_type']
+    ret['hsum'] = hsum
+    return ret
+
+
+def _translate_sep(path):
+    '''
+    Translate path separators for Windows masterless minions
+    '''
+    return path.replace('\\', '/') if os.path.sep == '\\' else path
+
 
-    # check if the hash is cached
-    # cache file's contents should be "hash:mtime"
-    cache_path = os.path.join(__opts__['cachedir'],
-                              'roots',
-                              'hash',
-                              load['saltenv'],
-                              '{0}.hash.{1}'.format(fnd['rel'],
-                              __opts__['hash_type']))
-    # if we have a cache, serve that if the mtime hasn't changed
-    if os.path.exists(cache_path):
+def _add_to(ret, tgt, fs_root, parent_dir, items):
+    '''
+    Add the files to the target set of the file lists
+    '''
+    for item in items:
+        abs_path = os.path.join(parent_dir, item)
+        log.trace('roots: Processing %s', abs_path)
+        is_link = salt.utils.path.islink(abs_path)
+        log.trace(
+            'roots: %s is %sa link',
+            abs_path, 'not ' if not is_link else ''
+        )
+        if is_link and __opts__['fileserver_ignoresymlinks']:
+            continue
+        rel_path = _translate_sep(os.path.relpath(abs_path, fs_root))
+        log.trace('roots: %s relative path is %s', abs_path, rel_path)
+        if salt.fileserver.is_file_ignored(__opts__, rel_path):
+            continue
+        tgt.add(rel_path)
         try:
-            with salt.utils.files.fopen(cache_path, 'r') as fp_:
-                try:
-                    hsum, mtime = salt.utils.stringutils.to_unicode(fp_.read()).split(':')
-                except ValueError:
-                    log.debug('Fileserver attempted to read incomplete cache file. Retrying.')
-                    # Delete the file since its incomplete (either corrupted or incomplete)
-                    try:
-                        os.unlink(cache_path)
-                    except OSError:
-                        pass
-                    return file_hash(load, fnd)
-                if os.path.getmtime(path) == mtime:
-                    # check if mtime changed
-                    ret['hsum'] = hsum
-                    return ret
-        except (os.error, IOError):  # Can't use Python select() because we need Windows support
-            log.debug("Fileserver encountered lock when reading cache file. Retrying.")
-            # Delete the file since its incomplete (either corrupted or incomplete)
+            if not os.listdir(abs_path):
+                ret['empty_dirs'].add(rel_path)
+        except Exception:
+            # Generic exception because running os.listdir() on a
+            # non-directory path raises an OSError on *NIX and a
+            # WindowsError on Windows.
+            pass
+        if is_link:
+            link_dest = salt.utils.path.readlink(abs_path)
+            log.trace(
+                'roots: %s symlink destination is %s',
+                abs_path, link_dest
+            )
+            if salt.utils.platform.is_windows() \
+                    and link_dest.startswith('\\\\'):
+                # Symlink points to a network path. Since you can't
+                # join UNC and non-UNC paths, just assume the original
+                # path.
+                log.trace(
+                    'roots: %s is a UNC path, using %s instead',
+                    link_dest, abs_path
+                )
+                link_dest = abs_path
+            if link_dest.startswith('..'):
+                joined = os.path.join(abs_path, link_dest)
+            else:
+                joined = os.path.join(
+                    os.path.dirname(abs_path), link_dest
+                )
+            rel_dest = _translate_sep(
+                os.path.relpath(
+                    os.path.realpath(os.path.normpath(joined)),
+                    fs_root
+                )
+            )
+            log.trace(
+                'roots: %s relative path is %s',
+                abs_path, rel_dest
+            )
+            if not rel_dest.startswith('..'):
+                # Only count the link if it does not point
+                # outside of the root dir of the fileserver
+                # (i.e. the "path" variable)
+                ret['links'][rel_path] = link_dest
+
+
+def _walk(ret, fs_root, path):
+    '''
+    Add the files and directories under path to the file lists
+    '''
+    for root, dirs, files in salt.utils.path.os_walk(
+            path,
+            followlinks=__opts__['fileserver_followsymlinks']):
+        _add_to(ret, ret['dirs'], fs_root, root, dirs)
+        _add_to(ret, ret['files'], fs_root, root, files)
+
+
+def _walk_file_roots(saltenv):
+    '''
+    Walk the file_roots of an environment and return its file lists
+    '''
+    ret = {
+        'files': set(),
+        'dirs': set(),
+        'empty_dirs': set(),
+        'links': {}
+    }
+    for path in __opts__['file_roots'][saltenv]:
+        _walk(ret, path, path)
+    return ret
+
+
+def _sorted_file_lists(ret):
+    '''
+    Return the file lists in the form they are cached and served in
+    '''
+    return {
+        'files': sorted(ret['files']),
+        'dirs': sorted(ret['dirs']),
+        'empty_dirs': sorted(ret['empty_dirs']),
+        'links': dict(ret['links'])
+    }
+
+
+def _update_file_lists(ret, saltenv, rel_path):
+    '''
+    Update the file lists of an environment after rel_path was created,
+    changed or removed in one of its file_roots
+    '''
+    if rel_path in ret['dirs']:
+        prefix = rel_path + '/'
+        for key in ('files', 'dirs', 'empty_dirs'):
+            ret[key] = set(item for item in ret[key] if not item.startswith(prefix))
+        for link in [link for link in ret['links'] if link.startswith(prefix)]:
+            ret['links'].pop(link)
+    for key in ('files', 'dirs', 'empty_dirs'):
+        ret[key].discard(rel_path)
+    ret['links'].pop(rel_path, None)
+
+    roots = __opts__['file_roots'][saltenv]
+    for root in roots:
+        abs_path = os.path.join(root, rel_path)
+        parent_dir, item = os.path.split(abs_path)
+        if os.path.isdir(abs_path):
+            _add_to(ret, ret['dirs'], root, parent_dir, [item])
+            if __opts__['fileserver_followsymlinks'] \
+                    or not salt.utils.path.islink(abs_path):
+                _walk(ret, root, abs_path)
+        elif os.path.lexists(abs_path):
+            _add_to(ret, ret['files'], root, parent_dir, [item])
+
+    # The parent directory may have become empty, or no longer be
+    parent = posixpath.dirname(rel_path)
+    if parent in ret['dirs']:
+        ret['empty_dirs'].discard(parent)
+        for root in roots:
             try:
-                os.unlink(cache_path)
+                if not os.listdir(os.path.join(root, parent)):
+                    ret['empty_dirs'].add(parent)
             except OSError:
                 pass
-            return file_hash(load, fnd)
 
-    # if we don't have a cache entry-- lets make one
-    ret['hsum'] = salt.utils.hashutils.get_hash(path, __opts__['hash_type'])
-    cache_dir = os.path.dirname(cache_path)
-    # make cache directory if it doesn't exist
-    if not os.path.exists(cache_dir):
+
+def _list_cache_paths(saltenv):
+    '''
+    Return the paths of the file lists cache of an environment and of its
+    lock, creating the cache directory if needed
+    '''
+    list_cachedir = os.path.join(__opts__['cachedir'], 'file_lists', 'roots')
+    if not os.path.isdir(list_cachedir):
         try:
-            os.makedirs(cache_dir)
-        except OSError as err:
-            if err.errno == errno.EEXIST:
-                # rarely, the directory can be already concurrently created between
-                # the os.path.exists and the os.makedirs lines above
-                pass
-            else:
-                raise
-    # save the cache object "hash:mtime"
-    cache_object = '{0}:{1}'.format(ret['hsum'], os.path.getmtime(path))
-    with salt.utils.files.flopen(cache_path, 'w') as fp_:
-        fp_.write(cache_object)
-    return ret
+            os.makedirs(list_cachedir)
+        except os.error:
+            log.critical('Unable to make cachedir %s', list_cachedir)
+            raise
+    return (os.path.join(list_cachedir, '{0}.p'.format(saltenv)),
+            os.path.join(list_cachedir, '.{0}.w'.format(saltenv)))
 
 
 def _file_lists(load, form):
@@ -298,111 +650,26 @@ def _file_lists(load, form):
     if load['saltenv'] not in __opts__['file_roots']:
         return []
 
-    list_cachedir = os.path.join(__opts__['cachedir'], 'file_lists', 'roots')
-    if not os.path.isdir(list_cachedir):
-        try:
-            os.makedirs(list_cachedir)
-        except os.error:
-            log.critical('Unable to make cachedir %s', list_cachedir)
-            return []
-    list_cache = os.path.join(list_cachedir, '{0}.p'.format(load['saltenv']))
-    w_lock = os.path.join(list_cachedir, '.{0}.w'.format(load['saltenv']))
+    try:
+        list_cache, w_lock = _list_cache_paths(load['saltenv'])
+    except os.error:
+        return []
+    opts = __opts__
+    if _inotify_enabled():
+        # The lists are kept up to date by the fileserver update process,
+        # which refreshes the cache at every roots_update_interval
+        opts = dict(__opts__)
+        opts['fileserver_list_cache_time'] = max(
+            __opts__.get('fileserver_list_cache_time', 20),
+            2 * __opts__['roots_update_interval'])
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
-            __opts__, form, list_cache, w_lock
+            opts, form, list_cache, w_lock
         )
     if cache_match is not None:
         return cache_match
     if refresh_cache:
-        ret = {
-            'files': set(),
-            'dirs': set(),
-            'empty_dirs': set(),
-            'links': {}
-        }
-
-        def _add_to(tgt, fs_root, parent_dir, items):
-            '''
-            Add the files to the target set
-            '''
-            def _translate_sep(path):
-                '''
-                Translate path separators for Windows masterless minions
-                '''
-                return path.replace('\\', '/') if os.path.sep == '\\' else path
-
-            for item in items:
-                abs_path = os.path.join(parent_dir, item)
-                log.trace('roots: Processing %s', abs_path)
-                is_link = salt.utils.path.islink(abs_path)
-                log.trace(
-                    'roots: %s is %sa link',
-                    abs_path, 'not ' if not is_link else ''
-                )
-                if is_link and __opts__['fileserver_ignoresymlinks']:
-                    continue
-                rel_path = _translate_sep(os.path.relpath(abs_path, fs_root))
-                log.trace('roots: %s relative path is %s', abs_path, rel_path)
-                if salt.fileserver.is_file_ignored(__opts__, rel_path):
-                    continue
-                tgt.add(rel_path)
-                try:
-                    if not os.listdir(abs_path):
-                        ret['empty_dirs'].add(rel_path)
-                except Exception:
-                    # Generic exception because running os.listdir() on a
-                    # non-directory path raises an OSError on *NIX and a
-                    # WindowsError on Windows.
-                    pass
-                if is_link:
-                    link_dest = salt.utils.path.readlink(abs_path)
-                    log.trace(
-                        'roots: %s symlink destination is %s',
-                        abs_path, link_dest
-                    )
-                    if salt.utils.platform.is_windows() \
-                            and link_dest.startswith('\\\\'):
-                        # Symlink points to a network path. Since you can't
-                        # join UNC and non-UNC paths, just assume the original
-                        # path.
-                        log.trace(
-                            'roots: %s is a UNC path, using %s instead',
-                            link_dest, abs_path
-                        )
-                        link_dest = abs_path
-                    if link_dest.startswith('..'):
-                        joined = os.path.join(abs_path, link_dest)
-                    else:
-                        joined = os.path.join(
-                            os.path.dirname(abs_path), link_dest
-                        )
-                    rel_dest = _translate_sep(
-                        os.path.relpath(
-                            os.path.realpath(os.path.normpath(joined)),
-                            fs_root
-                        )
-                    )
-                    log.trace(
-                        'roots: %s relative path is %s',
-                        abs_path, rel_dest
-                    )
-                    if not rel_dest.startswith('..'):
-                        # Only count the link if it does not point
-                        # outside of the root dir of the fileserver
-                        # (i.e. the "path" variable)
-                        ret['links'][rel_path] = link_dest
-
-        for path in __opts__['file_roots'][load['saltenv']]:
-            for root, dirs, files in salt.utils.path.os_walk(
-                    path,
-                    followlinks=__opts__['fileserver_followsymlinks']):
-                _add_to(ret['dirs'], path, root, dirs)
-                _add_to(ret['files'], path, root, files)
-
-        ret['files'] = sorted(ret['files'])
-        ret['dirs'] = sorted(ret['dirs'])
-        ret['empty_dirs'] = sorted(ret['empty_dirs'])
-
+        ret = _sorted_file_lists(_walk_file_roots(load['saltenv']))
         if save_cache:
             try:
                 salt.fileserver.write_file_list_cache(
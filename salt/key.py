@@ -22,6 +22,7 @@ import salt.daemons.masterapi
 import salt.exceptions
 import salt.minion
 import salt.utils.args
+import salt.utils.cache
 import salt.utils.crypt
 import salt.utils.data
 import salt.utils.event
@@ -605,12 +606,12 @@ class Key(object):
                 continue
             ret[os.path.basename(dir_)] = []
             try:
-                for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(dir_)):
-                    if not fn_.startswith('.'):
-                        if os.path.isfile(os.path.join(dir_, fn_)):
-                            ret[os.path.basename(dir_)].append(
-                                salt.utils.stringutils.to_unicode(fn_)
-                            )
+                listing = salt.utils.cache.ListdirCache.get(
+                    dir_, self.opts.get('pki_dir_inotify', False))
+                for fn_ in listing.list():
+                    ret[os.path.basename(dir_)].append(
+                        salt.utils.stringutils.to_unicode(fn_)
+                    )
             except (OSError, IOError):
                 # key dir kind is not created yet, just skip
                 continue
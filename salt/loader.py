@@ -10,6 +10,8 @@ from __future__ import absolute_import, print_function, unicode_literals
 import os
 import sys
 import time
+import fnmatch
+import threading
 import logging
 import inspect
 import tempfile
@@ -35,7 +37,7 @@ from salt.utils.decorators import Depends
 
 # Import 3rd-party libs
 from salt.ext import six
-from salt.ext.six.moves import reload_module
+from salt.ext.six.moves import queue, range, reload_module  # pylint: disable=redefined-builtin
 
 if sys.version_info[:2] >= (3, 5):
     import importlib.machinery  # pylint: disable=no-name-in-module,import-error
@@ -661,6 +663,173 @@ def _load_cached_grains(opts, cfn):
         return None
 
 
+class _LazyGrainsCache(object):
+    '''
+    The results of the grain functions matching the ``grains_lazy`` minion
+    option, kept in the cachedir for the number of seconds set for them, so
+    that the expensive grain functions do not run on every grains load.
+    '''
+    def __init__(self, opts):
+        self.opts = opts
+        self.ttls = opts.get('grains_lazy') or {}
+        self.path = os.path.join(opts['cachedir'], 'grains_lazy.p')
+        self.cache = {}
+        self.changed = False
+        if self.ttls:
+            # Loaded upfront, the grain functions may run in several threads
+            self._load()
+
+    def ttl(self, key):
+        '''
+        Return the number of seconds the result of the grain function key is
+        cached for, or None if it is not cached
+        '''
+        for pattern, ttl in six.iteritems(self.ttls):
+            if fnmatch.fnmatch(key, pattern):
+                return ttl
+        return None
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with salt.utils.files.fopen(self.path, 'rb') as fp_:
+                cache = salt.payload.Serial(self.opts).load(fp_)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug('Unable to read the lazy grains cache: %s', exc)
+            return
+        if isinstance(cache, dict):
+            self.cache = cache
+
+    def call(self, key, func, *args):
+        '''
+        Return the result of the grain function func named key, from the
+        cache when it is fresh enough
+        '''
+        ttl = self.ttl(key)
+        if ttl is None:
+            return func(*args)
+        entry = self.cache.get(key)
+        if entry and not self.opts.get('refresh_grains_cache', False):
+            age = time.time() - entry['time']
+            if 0 <= age < ttl:
+                log.trace('Using the %s grain computed %d seconds ago', key, age)
+                return entry['grains']
+        ret = func(*args)
+        if isinstance(ret, dict):
+            self.cache[key] = {'time': time.time(), 'grains': ret}
+            self.changed = True
+        return ret
+
+    def save(self):
+        '''
+        Write the cache when grain functions were run
+        '''
+        if not self.changed:
+            return
+        cumask = os.umask(0o77)
+        try:
+            with salt.utils.files.fopen(self.path, 'w+b') as fp_:
+                salt.payload.Serial(self.opts).dump(self.cache, fp_)
+            self.changed = False
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error('Unable to write the lazy grains cache %s: %s', self.path, exc)
+            if os.path.isfile(self.path):
+                os.unlink(self.path)
+        finally:
+            os.umask(cumask)
+
+
+# The number of seconds each grain function took the last time the grains were
+# loaded in this process
+GRAINS_TIMINGS = {}
+
+
+def _call_grain_func(funcs, key, lazy_cache, proxy):
+    '''
+    Run the grain function key and return a tuple of the status, the result
+    or the exception info, and the number of seconds it took
+    '''
+    start = time.time()
+    try:
+        log.trace('Loading %s grain', key)
+        # Grains are loaded too early to take advantage of the injected
+        # __proxy__ variable.  Pass an instance of that LazyLoader
+        # here instead to grains functions if the grains functions take
+        # one parameter.  Then the grains can have access to the
+        # proxymodule for retrieving information from the connected
+        # device.
+        if not key.startswith('core.') and funcs[key].__code__.co_argcount == 1:
+            ret = lazy_cache.call(key, funcs[key], proxy)
+        else:
+            ret = lazy_cache.call(key, funcs[key])
+    except Exception:  # pylint: disable=broad-except
+        return 'error', sys.exc_info(), time.time() - start
+    return 'ok', ret, time.time() - start
+
+
+def _run_grain_funcs(opts, funcs, keys, lazy_cache, proxy):
+    '''
+    Run the grain functions keys and return a dict mapping them to the tuple
+    returned by _call_grain_func.
+
+    With grains_workers set, the grain functions run concurrently in that many
+    threads. A grain function still running grains_timeout seconds after it
+    started is given up on: its result is ignored and a new thread takes its
+    place, since the thread running it can not be stopped.
+    '''
+    workers = min(opts.get('grains_workers', 0), len(keys))
+    if workers < 2:
+        return dict((key, _call_grain_func(funcs, key, lazy_cache, proxy))
+                    for key in keys)
+
+    todo = queue.Queue()
+    for key in keys:
+        todo.put(key)
+    done = queue.Queue()
+    started = {}
+
+    def _worker():
+        while True:
+            try:
+                key = todo.get_nowait()
+            except queue.Empty:
+                return
+            started[key] = time.time()
+            done.put((key, _call_grain_func(funcs, key, lazy_cache, proxy)))
+
+    def _start_worker():
+        thread = threading.Thread(target=_worker, name='GrainsWorker')
+        thread.daemon = True
+        thread.start()
+
+    for _ in range(workers):
+        _start_worker()
+
+    timeout = opts.get('grains_timeout', 0)
+    results = {}
+    while len(results) < len(keys):
+        try:
+            key, result = done.get(timeout=0.1)
+        except queue.Empty:
+            pass
+        else:
+            if key not in results:
+                results[key] = result
+        if not timeout:
+            continue
+        now = time.time()
+        for key, start in list(started.items()):
+            if key not in results and now - start > timeout:
+                log.error(
+                    'The grain function %s did not return within %s seconds, '
+                    'its grains are skipped', key, timeout
+                )
+                results[key] = ('timeout', None, now - start)
+                _start_worker()
+    return results
+
+
 def grains(opts, force_refresh=False, proxy=None):
     '''
     Return the functions for the dynamic grains and the values for the static
@@ -724,42 +893,25 @@ def grains(opts, force_refresh=False, proxy=None):
     funcs = grain_funcs(opts, proxy=proxy)
     if force_refresh:  # if we refresh, lets reload grain modules
         funcs.clear()
-    # Run core grains
-    for key in funcs:
-        if not key.startswith('core.'):
-            continue
-        log.trace('Loading %s grain', key)
-        ret = funcs[key]()
-        if not isinstance(ret, dict):
-            continue
-        if grains_deep_merge:
-            salt.utils.dictupdate.update(grains_data, ret)
-        else:
-            grains_data.update(ret)
-
-    # Run the rest of the grains
-    for key in funcs:
-        if key.startswith('core.') or key == '_errors':
-            continue
-        try:
-            # Grains are loaded too early to take advantage of the injected
-            # __proxy__ variable.  Pass an instance of that LazyLoader
-            # here instead to grains functions if the grains functions take
-            # one parameter.  Then the grains can have access to the
-            # proxymodule for retrieving information from the connected
-            # device.
-            log.trace('Loading %s grain', key)
-            if funcs[key].__code__.co_argcount == 1:
-                ret = funcs[key](proxy)
-            else:
-                ret = funcs[key]()
-        except Exception:
+    lazy_cache = _LazyGrainsCache(opts)
+    # Run the core grains first, then the rest of the grains
+    keys = [key for key in funcs if key.startswith('core.')]
+    keys.extend(key for key in funcs
+                if not key.startswith('core.') and key != '_errors')
+    results = _run_grain_funcs(opts, funcs, keys, lazy_cache, proxy)
+    GRAINS_TIMINGS.clear()
+    for key in keys:
+        status, ret, duration = results[key]
+        GRAINS_TIMINGS[key] = duration
+        if status == 'error':
+            if key.startswith('core.'):
+                six.reraise(*ret)
             if salt.utils.platform.is_proxy():
                 log.info('The following CRITICAL message may not be an error; the proxy may not be completely established yet.')
             log.critical(
                 'Failed to load grains defined in grain file %s in '
                 'function %s, error:\n', key, funcs[key],
-                exc_info=True
+                exc_info=ret
             )
             continue
         if not isinstance(ret, dict):
@@ -788,6 +940,8 @@ def grains(opts, force_refresh=False, proxy=None):
         except KeyError:
             pass
 
+    lazy_cache.save()
+
     grains_data.update(opts['grains'])
     # Write cache if enabled
     if opts.get('grains_cache', False):
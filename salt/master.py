@@ -28,6 +28,7 @@ from salt.utils.zeromq import zmq, ZMQDefaultLoop, install_zmq, ZMQ_VERSION_INFO
 # pylint: enable=import-error,no-name-in-module,redefined-builtin
 
 import tornado.gen  # pylint: disable=F0401
+import tornado.ioloop  # pylint: disable=F0401
 
 # Import salt libs
 import salt.crypt
@@ -69,7 +70,7 @@ import salt.utils.verify
 import salt.utils.zeromq
 from salt.config import DEFAULT_INTERVAL
 from salt.defaults import DEFAULT_TARGET_DELIM
-from salt.transport import iter_transport_opts
+from salt.transport import iter_transport_opts, iter_worker_pools
 from salt.utils.debug import (
     enable_sigusr1_handler, enable_sigusr2_handler, inspect_stack
 )
@@ -348,7 +349,10 @@ class FileserverUpdate(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.update_threads = {}
         # Avoid circular import
         import salt.fileserver
-        self.fileserver = salt.fileserver.Fileserver(self.opts)
+        # Let the backends know they are updated from this process
+        fileserver_opts = dict(self.opts)
+        fileserver_opts['__fileserver_update'] = True
+        self.fileserver = salt.fileserver.Fileserver(fileserver_opts)
         self.fill_buckets()
 
     # __setstate__ and __getstate__ are only used on Windows.
@@ -875,16 +879,22 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
         # manager. We don't want the processes being started to inherit those
         # signal handlers
         with salt.utils.process.default_signals(signal.SIGINT, signal.SIGTERM):
-            for ind in range(int(self.opts['worker_threads'])):
-                name = 'MWorker-{0}'.format(ind)
-                self.process_manager.add_process(MWorker,
-                                                 args=(self.opts,
-                                                       self.master_key,
-                                                       self.key,
-                                                       req_channels,
-                                                       name),
-                                                 kwargs=kwargs,
-                                                 name=name)
+            for pool, worker_threads, _ in iter_worker_pools(self.opts):
+                if self.opts['worker_pools']:
+                    kwargs['pool'] = pool
+                for ind in range(worker_threads):
+                    if pool == salt.transport.DEFAULT_WORKER_POOL:
+                        name = 'MWorker-{0}'.format(ind)
+                    else:
+                        name = 'MWorker-{0}-{1}'.format(pool, ind)
+                    self.process_manager.add_process(MWorker,
+                                                     args=(self.opts,
+                                                           self.master_key,
+                                                           self.key,
+                                                           req_channels,
+                                                           name),
+                                                     kwargs=dict(kwargs),
+                                                     name=name)
         self.process_manager.run()
 
     def run(self):
@@ -914,6 +924,7 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
                  key,
                  req_channels,
                  name,
+                 pool=None,
                  **kwargs):
         '''
         Create a salt master worker process
@@ -921,6 +932,8 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         :param dict opts: The salt options
         :param dict mkey: The user running the salt master and the AES key
         :param dict key: The user running the salt master and the RSA key
+        :param str pool: The worker pool serving the worker, if worker_pools
+                         are configured
 
         :rtype: MWorker
         :return: Master worker
@@ -930,11 +943,13 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         super(MWorker, self).__init__(**kwargs)
         self.opts = opts
         self.req_channels = req_channels
+        self.pool = pool
 
         self.mkey = mkey
         self.key = key
         self.k_mtime = 0
         self.stats = collections.defaultdict(lambda: {'mean': 0, 'runs': 0})
+        self.queue_stats = {'depth': 0, 'wait': 0, 'runs': 0}
         self.stat_clock = time.time()
 
     # We need __setstate__ and __getstate__ to also pickle 'SMaster.secrets'.
@@ -947,6 +962,7 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         super(MWorker, self).__init__(log_queue=state['log_queue'])
         self.opts = state['opts']
         self.req_channels = state['req_channels']
+        self.pool = state['pool']
         self.mkey = state['mkey']
         self.key = state['key']
         self.k_mtime = state['k_mtime']
@@ -955,6 +971,7 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
     def __getstate__(self):
         return {'opts': self.opts,
                 'req_channels': self.req_channels,
+                'pool': self.pool,
                 'mkey': self.mkey,
                 'key': self.key,
                 'k_mtime': self.k_mtime,
@@ -964,6 +981,10 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
     def _handle_signals(self, signum, sigframe):
         for channel in getattr(self, 'req_channels', ()):
             channel.close()
+        # Do not lose the returns which are still queued for ingestion
+        return_batcher = getattr(getattr(self, 'aes_funcs', None), 'return_batcher', None)
+        if return_batcher is not None:
+            return_batcher.stop()
         super(MWorker, self)._handle_signals(signum, sigframe)
 
     def __bind(self):
@@ -974,8 +995,18 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         install_zmq()
         self.io_loop = ZMQDefaultLoop()
         self.io_loop.make_current()
+        kwargs = {}
+        if self.pool is not None:
+            kwargs['worker_pool'] = self.pool
         for req_channel in self.req_channels:
-            req_channel.post_fork(self._handle_payload, io_loop=self.io_loop)  # TODO: cleaner? Maybe lazily?
+            req_channel.post_fork(self._handle_payload, io_loop=self.io_loop, **kwargs)  # TODO: cleaner? Maybe lazily?
+        if self.opts['return_batching']:
+            self.aes_funcs.return_batcher = ReturnBatcher(
+                self.opts,
+                self.aes_funcs.event,
+                self.aes_funcs.mminion,
+                io_loop=self.io_loop)
+            self.aes_funcs.return_batcher.start()
         try:
             self.io_loop.start()
         except (KeyboardInterrupt, SystemExit):
@@ -1006,10 +1037,23 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         '''
         key = payload['enc']
         load = payload['load']
+        if self.opts['master_stats'] and 'route' in payload:
+            self._update_queue_stats(payload['route'])
         ret = {'aes': self._handle_aes,
                'clear': self._handle_clear}[key](load)
         raise tornado.gen.Return(ret)
 
+    def _update_queue_stats(self, route):
+        '''
+        Calculate the mean queue depth and queue latency of the worker pool
+        from the routing information of a request
+        '''
+        wait = max(0, time.time() - route.get('time', 0))
+        self.queue_stats['runs'] += 1
+        runs = self.queue_stats['runs']
+        for key, value in (('depth', route.get('depth', 0)), ('wait', wait)):
+            self.queue_stats[key] = (self.queue_stats[key] * (runs - 1) + value) / runs
+
     def _post_stats(self, start, cmd):
         '''
         Calculate the master stats and fire events with stat info
@@ -1019,8 +1063,13 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.stats[cmd]['mean'] = (self.stats[cmd]['mean'] * (self.stats[cmd]['runs'] - 1) + duration) / self.stats[cmd]['runs']
         if end - self.stat_clock > self.opts['master_stats_event_iter']:
             # Fire the event with the stats and wipe the tracker
-            self.aes_funcs.event.fire_event({'time': end - self.stat_clock, 'worker': self.name, 'stats': self.stats}, tagify(self.name, 'stats'))
+            data = {'time': end - self.stat_clock, 'worker': self.name, 'stats': self.stats}
+            if self.pool is not None:
+                data['pool'] = self.pool
+                data['queue'] = self.queue_stats
+            self.aes_funcs.event.fire_event(data, tagify(self.name, 'stats'))
             self.stats = collections.defaultdict(lambda: {'mean': 0, 'runs': 0})
+            self.queue_stats = {'depth': 0, 'wait': 0, 'runs': 0}
             self.stat_clock = end
 
     def _handle_clear(self, load):
@@ -1080,6 +1129,82 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.__bind()
 
 
+class ReturnBatcher(object):
+    '''
+    Queue the minion returns received by a worker in memory and store them
+    in the master_job_cache in batches, outside of the request handler.
+
+    A batch is flushed as soon as it holds ``return_batch_size`` returns, or
+    at the latest every ``return_batch_latency`` seconds.
+    '''
+    def __init__(self, opts, event, mminion, io_loop=None):
+        '''
+        Create a new ReturnBatcher
+
+        :param dict opts: The salt options
+        :param event: The master event bus to fire the returns on
+        :param mminion: The MasterMinion used to access the job cache
+        :param io_loop: The IOLoop of the worker
+
+        :rtype: ReturnBatcher
+        :returns: Instance batching the minion returns
+        '''
+        self.opts = opts
+        self.event = event
+        self.mminion = mminion
+        self.io_loop = io_loop or tornado.ioloop.IOLoop.current()
+        self.batch_size = max(1, opts['return_batch_size'])
+        self.queue = []
+        self._flush_scheduled = False
+        self._flush_timer = tornado.ioloop.PeriodicCallback(
+            self.flush,
+            opts['return_batch_latency'] * 1000,
+            io_loop=self.io_loop)
+
+    def start(self):
+        '''
+        Start flushing the queued returns periodically
+        '''
+        self._flush_timer.start()
+
+    def stop(self):
+        '''
+        Stop the periodic flush and store the returns still queued
+        '''
+        self._flush_timer.stop()
+        self.flush()
+
+    def put(self, load):
+        '''
+        Queue a minion return. A full batch is flushed once the current
+        request has been answered.
+
+        :param dict load: The minion payload
+        '''
+        self.queue.append(load)
+        if len(self.queue) >= self.batch_size and not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.io_loop.add_callback(self.flush)
+
+    def flush(self):
+        '''
+        Store the queued returns in the master_job_cache and fire them on the
+        master event bus
+        '''
+        self._flush_scheduled = False
+        while self.queue:
+            batch = self.queue[:self.batch_size]
+            del self.queue[:self.batch_size]
+            try:
+                salt.utils.job.store_job_batch(
+                    self.opts, batch, event=self.event, mminion=self.mminion)
+            except Exception as exc:  # pylint: disable=broad-except
+                log.error(
+                    'Could not store job information for %d returns: %s',
+                    len(batch), exc, exc_info_on_loglevel=logging.DEBUG
+                )
+
+
 # TODO: rename? No longer tied to "AES", just "encrypted" or "private" requests
 class AESFuncs(object):
     '''
@@ -1111,6 +1236,8 @@ class AESFuncs(object):
         )
         self.__setup_fileserver()
         self.masterapi = salt.daemons.masterapi.RemoteFuncs(opts)
+        # Set by the MWorker when the returns are ingested in batches
+        self.return_batcher = None
 
     def __setup_fileserver(self):
         '''
@@ -1120,6 +1247,9 @@ class AESFuncs(object):
         import salt.fileserver
         self.fs_ = salt.fileserver.Fileserver(self.opts)
         self._serve_file = self.fs_.serve_file
+        self._serve_file_delta = self.fs_.serve_file_delta
+        self._serve_file_bundle = self.fs_.serve_file_bundle
+        self._file_manifest = self.fs_.file_manifest
         self._file_find = self.fs_._find_file
         self._file_hash = self.fs_.file_hash
         self._file_hash_and_stat = self.fs_.file_hash_and_stat
@@ -1481,10 +1611,13 @@ class AESFuncs(object):
         data = pillar.compile_pillar()
         self.fs_.update_opts()
         if self.opts.get('minion_data_cache', False):
+            mdata = {'grains': load['grains'], 'pillar': data}
             self.masterapi.cache.store('minions/{0}'.format(load['id']),
                                        'data',
-                                       {'grains': load['grains'],
-                                        'pillar': data})
+                                       mdata)
+            salt.utils.minions.MinionDataIndex.update_minion(self.opts,
+                                                             load['id'],
+                                                             mdata)
             if self.opts.get('minion_data_cache_events') is True:
                 self.event.fire_event({'Minion data cache refresh': load['id']}, tagify(load['id'], 'refresh', 'minion'))
         return data
@@ -1570,6 +1703,12 @@ class AESFuncs(object):
                     log.info('But \'drop_message_signature_fail\' is disabled, so message is still accepted.')
             load['sig'] = sig
 
+        if self.return_batcher is not None:
+            # Acknowledge the minion now, the return is stored with the
+            # next batch
+            self.return_batcher.put(load)
+            return
+
         try:
             salt.utils.job.store_job(
                 self.opts, load, event=self.event, mminion=self.mminion)
@@ -1045,6 +1045,133 @@ class MinionManager(MinionBase):
             minion.destroy()
 
 
+class MinionJobPool(object):
+    '''
+    A pool of processes forked once with the modules of the minion already
+    loaded, which run the jobs of the functions matching the
+    ``job_pool_functions`` minion option one after the other instead of
+    forking a new process for each of them.
+
+    The workers receive the jobs over a pipe and report back over it once a
+    job is done. They are forked again as soon as the minion reloads its
+    modules, so that they never run a job with stale modules, grains or
+    pillar data. A job is run in a newly forked process as usual when all
+    the workers are busy.
+    '''
+    def __init__(self, minion):
+        self.minion = minion
+        self.size = minion.opts.get('job_pool_size', 0)
+        self.patterns = minion.opts.get('job_pool_functions') or []
+        # Lists of the worker process, the pipe to it and the jid it runs
+        self.workers = []
+        # The stopped workers which still have to be reaped
+        self.retired = []
+        # The modules the workers were forked with
+        self.functions = None
+
+    def accepts(self, data):
+        '''
+        Return True when the job in data is run in the pool
+        '''
+        if self.size < 1 or not isinstance(data['fun'], six.string_types):
+            return False
+        if not self.minion.opts.get('multiprocessing', True) \
+                or salt.utils.platform.is_windows():
+            return False
+        return any(fnmatch.fnmatch(data['fun'], pattern)
+                   for pattern in self.patterns)
+
+    def _start_worker(self, idx=None):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        worker = [None, parent_conn, None]
+        # Registered before forking, so that the worker closes its copy of
+        # the pipe end of the minion
+        if idx is None:
+            self.workers.append(worker)
+        else:
+            self.workers[idx] = worker
+        with default_signals(signal.SIGINT, signal.SIGTERM):
+            worker[0] = SignalHandlingMultiprocessingProcess(
+                target=self.minion._pool_worker,
+                args=(self.minion, self.minion.opts, child_conn)
+            )
+            # Reset current signals before starting the process in
+            # order not to inherit the current signal handlers
+            worker[0].start()
+        child_conn.close()
+        return worker
+
+    def _stop_worker(self, worker):
+        '''
+        Terminate an idle worker, let a busy one finish its job and exit
+        '''
+        process, conn, jid = worker
+        if jid is None and process.is_alive():
+            process.terminate()
+        conn.close()
+        self.retired.append(process)
+
+    def _reap(self, worker):
+        '''
+        Mark worker as idle when it finished its job, return False if it died
+        '''
+        process, conn, _ = worker
+        if not process.is_alive():
+            return False
+        try:
+            while conn.poll():
+                conn.recv()
+                worker[2] = None
+        except (EOFError, IOError, OSError):
+            return False
+        return True
+
+    def submit(self, data):
+        '''
+        Hand the job in data over to an idle worker. Return False when it has
+        to be run in a new process instead.
+        '''
+        if not self.accepts(data):
+            return False
+        self.retired = [process for process in self.retired if process.is_alive()]
+        if self.functions is not self.minion.functions:
+            # The modules were reloaded since the workers were forked
+            self.stop()
+            self.functions = self.minion.functions
+        for idx, worker in enumerate(self.workers):
+            if not self._reap(worker):
+                log.debug('Replacing the dead job pool worker %s', worker[0].pid)
+                self._stop_worker(worker)
+                worker = self._start_worker(idx)
+            if worker[2] is None:
+                break
+        else:
+            if len(self.workers) >= self.size:
+                log.debug(
+                    'All the job pool workers are busy, running job %s in a '
+                    'new process', data['jid']
+                )
+                return False
+            worker = self._start_worker()
+        try:
+            worker[1].send((data, self.minion.connected))
+        except (IOError, OSError) as exc:
+            log.debug('Unable to send job %s to the job pool: %s', data['jid'], exc)
+            return False
+        worker[2] = data['jid']
+        log.debug('Running job %s in job pool worker %s', data['jid'], worker[0].pid)
+        return True
+
+    def stop(self):
+        '''
+        Stop the workers, the busy ones exit once they finished their job
+        '''
+        for worker in self.workers:
+            self._stop_worker(worker)
+        self.workers = []
+        self.functions = None
+
+
 class Minion(MinionBase):
     '''
     This class instantiates a minion, runs connections for a minion,
@@ -1061,6 +1188,7 @@ class Minion(MinionBase):
 
         self._running = None
         self.win_proc = []
+        self.job_pool = MinionJobPool(self)
         self.loaded_base_name = loaded_base_name
         self.connected = False
         self.restart = False
@@ -1452,6 +1580,9 @@ class Minion(MinionBase):
                 yield tornado.gen.sleep(10)
                 process_count = len(salt.utils.minion.running(self.opts))
 
+        if self.job_pool.submit(data):
+            return
+
         # We stash an instance references to allow for the socket
         # communication in Windows. You can't pickle functions, and thus
         # python needs to be able to reconstruct the reference on the other
@@ -1533,6 +1664,42 @@ class Minion(MinionBase):
             else:
                 Minion._thread_return(minion_instance, opts, data)
 
+    @classmethod
+    def _pool_worker(cls, minion_instance, opts, conn):
+        '''
+        This method should be used as the target of the job pool workers, it
+        runs the jobs received over conn until the minion goes away.
+        '''
+        # The workers of the pool are managed by the minion process only
+        for worker in minion_instance.job_pool.workers:
+            worker[1].close()
+        minion_instance.job_pool.workers = []
+        minion_instance.job_pool.retired = []
+        salt.utils.process.appendproctitle('{0}._pool_worker'.format(cls.__name__))
+        # The worker outlives the jobs, they must not daemonize
+        job_opts = dict(opts, multiprocessing=False)
+        ppid = os.getppid()
+        while os.getppid() == ppid:
+            try:
+                if not conn.poll(1):
+                    continue
+                data, connected = conn.recv()
+            except (EOFError, IOError, OSError):
+                break
+            minion_instance.connected = connected
+            try:
+                cls._target(minion_instance, job_opts, data, connected)
+            except Exception:
+                log.exception('The job pool worker failed to run job %s', data['jid'])
+            finally:
+                # The job is not running anymore although its PID still is
+                salt.utils.files.safe_rm(
+                    os.path.join(minion_instance.proc_dir, data['jid']))
+            try:
+                conn.send(data['jid'])
+            except (IOError, OSError):
+                break
+
     @classmethod
     def _thread_return(cls, minion_instance, opts, data):
         '''
@@ -2069,6 +2236,13 @@ class Minion(MinionBase):
             ),
             tagify([self.opts['id'], 'start'], 'minion'),
         )
+        # Report the time the grain functions took to load, to spot the ones
+        # slowing down the minion start
+        if salt.loader.GRAINS_TIMINGS:
+            self._fire_master(
+                {'timings': dict(salt.loader.GRAINS_TIMINGS)},
+                tagify([self.opts['id'], 'grains_timings'], 'minion'),
+            )
 
     def module_refresh(self, force_refresh=False, notify=False):
         '''
@@ -2678,6 +2852,8 @@ class Minion(MinionBase):
         Tear down the minion
         '''
         self._running = False
+        if hasattr(self, 'job_pool'):
+            self.job_pool.stop()
         if hasattr(self, 'schedule'):
             del self.schedule
         if hasattr(self, 'pub_channel') and self.pub_channel is not None:
@@ -1345,6 +1345,18 @@ def list_pkgs(versions_as_list=False,
     removed = salt.utils.data.is_true(removed)
     purge_desired = salt.utils.data.is_true(purge_desired)
 
+    if 'pkg.list_pkgs' not in __context__:
+        signature = salt.utils.pkg.pkg_list_signature(
+            __opts__,
+            salt.utils.pkg.deb.DB_PATHS,
+            __grains__.get('cpuarch', ''),
+            __grains__.get('osarch', ''),
+            HAS_APT,
+            removed)
+        ret = salt.utils.pkg.read_pkg_list_cache(__opts__, 'dpkg', signature)
+        if ret is not None:
+            __context__['pkg.list_pkgs'] = ret
+
     if 'pkg.list_pkgs' in __context__:
         if removed:
             ret = copy.deepcopy(__context__['pkg.list_pkgs']['removed'])
@@ -1413,6 +1425,7 @@ def list_pkgs(versions_as_list=False,
         __salt__['pkg_resource.sort_pkglist'](ret[pkglist_type])
         _clean_pkglist(ret[pkglist_type])
 
+    salt.utils.pkg.write_pkg_list_cache(__opts__, 'dpkg', signature, ret)
     __context__['pkg.list_pkgs'] = copy.deepcopy(ret)
 
     if removed:
@@ -22,6 +22,7 @@ from functools import reduce  # pylint: disable=redefined-builtin
 
 # Import Salt libs
 from salt.ext import six
+import salt.loader
 import salt.utils.compat
 import salt.utils.data
 import salt.utils.files
@@ -42,6 +43,7 @@ __outputter__ = {
     'items': 'nested',
     'item': 'nested',
     'setval': 'nested',
+    'timings': 'nested',
 }
 
 # http://stackoverflow.com/a/12414913/127816
@@ -805,5 +807,33 @@ def equals(key, value):
     return six.text_type(value) == six.text_type(get(key))
 
 
+def timings(top=None):
+    '''
+    .. versionadded:: Fluorine
+
+    Return the number of seconds each grain function took the last time the
+    grains were loaded, the slowest grain function first.
+
+    top
+        Only return the given number of slowest grain functions
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' grains.timings
+        salt '*' grains.timings top=5
+    '''
+    ret = collections.OrderedDict(
+        (key, round(duration, 3))
+        for key, duration in sorted(six.iteritems(salt.loader.GRAINS_TIMINGS),
+                                    key=lambda item: item[1],
+                                    reverse=True)
+    )
+    if top is not None:
+        ret = collections.OrderedDict(list(ret.items())[:int(top)])
+    return ret
+
+
 # Provide a jinja function call compatible get aliased as fetch
 fetch = get
@@ -972,6 +972,13 @@ def highstate(test=None, queue=False, **kwargs):
 
         .. versionadded:: 2015.8.4
 
+    assume_converged
+        Do not run the states which succeeded without changes in the previous
+        state run with the same data. Overrides the
+        :conf_minion:`state_assume_converged` minion config option.
+
+        .. versionadded:: Fluorine
+
     CLI Examples:
 
     .. code-block:: bash
@@ -1011,6 +1018,9 @@ def highstate(test=None, queue=False, **kwargs):
     if 'pillarenv' in kwargs:
         opts['pillarenv'] = kwargs['pillarenv']
 
+    if 'assume_converged' in kwargs:
+        opts['state_assume_converged'] = kwargs['assume_converged']
+
     pillar_override = kwargs.get('pillar')
     pillar_enc = kwargs.get('pillar_enc')
     if pillar_enc is None \
@@ -631,6 +631,13 @@ def list_pkgs(versions_as_list=False, **kwargs):
 
     contextkey = 'pkg.list_pkgs'
 
+    if contextkey not in __context__:
+        signature = salt.utils.pkg.pkg_list_signature(
+            __opts__, salt.utils.pkg.rpm.DB_PATHS, __grains__['osarch'])
+        ret = salt.utils.pkg.read_pkg_list_cache(__opts__, 'rpm', signature)
+        if ret is not None:
+            __context__[contextkey] = ret
+
     if contextkey not in __context__:
         ret = {}
         cmd = ['rpm', '-qa', '--queryformat',
@@ -665,6 +672,7 @@ def list_pkgs(versions_as_list=False, **kwargs):
         for pkgname in ret:
             ret[pkgname] = sorted(ret[pkgname], key=lambda d: d['version'])
 
+        salt.utils.pkg.write_pkg_list_cache(__opts__, 'rpm', signature, ret)
         __context__[contextkey] = ret
 
     return __salt__['pkg_resource.format_pkg_list'](
@@ -7,27 +7,34 @@ Render the pillar data
 from __future__ import absolute_import, print_function, unicode_literals
 import copy
 import fnmatch
+import hashlib
 import os
 import collections
 import logging
+import time
 import tornado.gen
 import sys
 import traceback
 import inspect
 
 # Import salt libs
+import salt.cache
 import salt.loader
 import salt.fileclient
 import salt.minion
 import salt.crypt
+import salt.template
 import salt.transport
 import salt.utils.args
 import salt.utils.cache
 import salt.utils.crypt
 import salt.utils.data
 import salt.utils.dictupdate
+import salt.utils.json
+import salt.utils.path
+import salt.utils.stringutils
 import salt.utils.url
-from salt.exceptions import SaltClientError
+from salt.exceptions import SaltCacheError, SaltClientError
 from salt.template import compile_template
 from salt.utils.odict import OrderedDict
 from salt.version import __version__
@@ -41,6 +48,37 @@ from salt.ext import six
 
 log = logging.getLogger(__name__)
 
+# The renderers whose output only depends on their input, or for jinja on the
+# context variables it records as accessed
+TRACKED_RENDERERS = ('jinja', 'yaml', 'yamlex', 'json')
+
+# The context variables of a pillar SLS render which are the same for all the
+# minions
+SLS_CONTEXT = frozenset(('saltenv', 'sls', 'slspath', 'sls_path', 'slsdotpath',
+                         'slscolonpath', 'tplpath', 'tplfile', 'tpldir', 'tpldot'))
+
+
+def tracked_render_pipe(fn_, rend, opts):
+    '''
+    Return True if the SLS file fn_ is only rendered by the TRACKED_RENDERERS,
+    so the context variables used to render it can all be tracked
+    '''
+    try:
+        render_pipe = salt.template.template_shebang(
+            fn_,
+            rend,
+            opts['renderer'],
+            opts['renderer_blacklist'],
+            opts['renderer_whitelist'],
+            '')
+    except Exception:  # pylint: disable=broad-except
+        return False
+    names = [render.__module__.split('.')[-1] for render, _ in render_pipe]
+    if not names or any(name not in TRACKED_RENDERERS for name in names):
+        return False
+    # jinja has to render the SLS file itself
+    return 'jinja' not in names[1:]
+
 
 def get_pillar(opts, grains, minion_id, saltenv=None, ext=None, funcs=None,
                pillar_override=None, pillarenv=None, extra_minion_data=None):
@@ -61,6 +99,10 @@ def get_pillar(opts, grains, minion_id, saltenv=None, ext=None, funcs=None,
         log.debug('get_pillar using pillar cache with ext: %s', ext)
         return PillarCache(opts, grains, minion_id, saltenv, ext=ext, functions=funcs,
                 pillar_override=pillar_override, pillarenv=pillarenv)
+    if opts.get('pillar_compiled_cache') and ptype is Pillar:
+        return CompiledPillarCache(opts, grains, minion_id, saltenv, ext=ext, functions=funcs,
+                                   pillar_override=pillar_override, pillarenv=pillarenv,
+                                   extra_minion_data=extra_minion_data)
     return ptype(opts, grains, minion_id, saltenv, ext, functions=funcs,
                  pillar_override=pillar_override, pillarenv=pillarenv,
                  extra_minion_data=extra_minion_data)
@@ -334,14 +376,201 @@ class PillarCache(object):
             return fresh_pillar
 
 
+# The pillar_roots fingerprints computed by this process
+# {<pillar_roots json>: (<time computed>, <fingerprint>)}
+_ROOTS_FINGERPRINTS = {}
+
+# The master opts changing how the pillars are compiled
+PILLAR_OPTS = (
+    'decrypt_pillar',
+    'decrypt_pillar_default',
+    'decrypt_pillar_delimiter',
+    'decrypt_pillar_renderers',
+    'env_order',
+    'exclude_ext_pillar',
+    'ext_pillar',
+    'ext_pillar_first',
+    'jinja_env',
+    'jinja_lstrip_blocks',
+    'jinja_sls_env',
+    'jinja_trim_blocks',
+    'nodegroups',
+    'on_demand_ext_pillar',
+    'pass_to_ext_pillars',
+    'pillar_includes_override_sls',
+    'pillar_merge_lists',
+    'pillar_opts',
+    'pillar_roots',
+    'pillar_safe_render_error',
+    'pillar_source_merging_strategy',
+    'pillarenv_from_saltenv',
+    'renderer',
+    'renderer_blacklist',
+    'renderer_whitelist',
+    'state_top',
+    'top_file_merging_strategy',
+)
+
+
+def pillar_roots_fingerprint(pillar_roots, max_age=0):
+    '''
+    Return a digest of the paths, modification times and sizes of all the
+    files in the pillar_roots. It changes whenever a pillar top file or SLS
+    file is added, removed or modified.
+
+    A fingerprint computed by this process less than max_age seconds ago is
+    returned without walking the pillar_roots again.
+    '''
+    roots_key = salt.utils.json.dumps(pillar_roots, sort_keys=True)
+    if max_age > 0:
+        cached = _ROOTS_FINGERPRINTS.get(roots_key)
+        if cached is not None and 0 <= time.time() - cached[0] < max_age:
+            return cached[1]
+
+    computed = time.time()
+    digest = hashlib.sha256()
+    for saltenv in sorted(pillar_roots):
+        for root in pillar_roots[saltenv]:
+            for dirpath, dirnames, filenames in salt.utils.path.os_walk(root, followlinks=True):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    digest.update(salt.utils.stringutils.to_bytes(
+                        '{0}\0{1}\0{2}\0{3}\n'.format(
+                            saltenv, path, stat.st_mtime, stat.st_size)))
+    _ROOTS_FINGERPRINTS[roots_key] = (computed, digest.hexdigest())
+    return _ROOTS_FINGERPRINTS[roots_key][1]
+
+
+class CompiledPillarCache(object):
+    '''
+    Return the compiled pillar of a minion from the master cache as long as
+    none of the inputs of the compilation changed, otherwise compile and cache
+    it.
+
+    The cached pillar is keyed by a digest of the pillar_roots files, the
+    master opts used to compile pillars, the grains, the saltenv and pillarenv
+    and the pillar overrides of the minion.
+    External pillars can not be tracked, so the pillar is only cached when
+    every configured ext_pillar has a TTL in
+    ``pillar_compiled_cache_ext_pillar_ttl``, and for no longer than the
+    lowest of them.
+    '''
+    bank = 'pillar_compiled'
+
+    def __init__(self, opts, grains, minion_id, saltenv, ext=None, functions=None,
+                 pillar_override=None, pillarenv=None, extra_minion_data=None):
+        self.opts = opts
+        self.grains = grains
+        self.minion_id = minion_id
+        self.saltenv = saltenv
+        self.ext = ext
+        self.functions = functions
+        self.pillar_override = pillar_override
+        self.pillarenv = pillarenv
+        self.extra_minion_data = extra_minion_data
+        self.cache = salt.cache.factory(opts)
+
+    def ttl(self):
+        '''
+        Return the number of seconds the compiled pillar can be cached for
+        '''
+        ttl = self.opts['pillar_compiled_cache_ttl']
+        ext_ttls = self.opts.get('pillar_compiled_cache_ext_pillar_ttl') or {}
+        ext_pillars = list(self.opts.get('ext_pillar') or [])
+        if self.ext:
+            ext_pillars.append(self.ext)
+        for ext_pillar in ext_pillars:
+            if not isinstance(ext_pillar, dict):
+                continue
+            for key in ext_pillar:
+                ttl = min(ttl, ext_ttls.get(key, 0))
+        return ttl
+
+    def cache_key(self, *args, **kwargs):
+        '''
+        Return the digest of the inputs of the pillar compilation
+        '''
+        if self.opts.get('pillar_opts'):
+            # The whole master config ends up in the pillar
+            opts = self.opts
+        else:
+            opts = dict((key, self.opts.get(key)) for key in PILLAR_OPTS)
+        inputs = [pillar_roots_fingerprint(self.opts['pillar_roots'],
+                                           self.opts['pillar_roots_fingerprint_interval']),
+                  opts,
+                  self.minion_id,
+                  self.grains,
+                  self.saltenv,
+                  self.pillarenv,
+                  self.ext,
+                  self.pillar_override,
+                  self.extra_minion_data,
+                  args,
+                  kwargs]
+        return hashlib.sha256(salt.utils.stringutils.to_bytes(
+            salt.utils.json.dumps(inputs, sort_keys=True, default=repr))).hexdigest()
+
+    def fetch_pillar(self, *args, **kwargs):
+        '''
+        Compile the pillar of the minion
+        '''
+        return Pillar(self.opts,
+                      self.grains,
+                      self.minion_id,
+                      self.saltenv,
+                      ext=self.ext,
+                      functions=self.functions,
+                      pillar_override=self.pillar_override,
+                      pillarenv=self.pillarenv,
+                      extra_minion_data=self.extra_minion_data).compile_pillar(*args, **kwargs)
+
+    def compile_pillar(self, *args, **kwargs):
+        ttl = self.ttl()
+        if ttl <= 0:
+            return self.fetch_pillar(*args, **kwargs)
+
+        key = self.cache_key(*args, **kwargs)
+        try:
+            cached = self.cache.fetch(self.bank, self.minion_id)
+        except SaltCacheError as exc:
+            log.error('Could not read the compiled pillar cache: %s', exc)
+            cached = None
+        if cached and cached.get('key') == key and cached.get('expire', 0) > time.time():
+            log.debug('Compiled pillar cache hit for minion %s', self.minion_id)
+            return cached['pillar']
+
+        log.debug('Compiled pillar cache miss for minion %s', self.minion_id)
+        pillar = self.fetch_pillar(*args, **kwargs)
+        if '_errors' not in pillar:
+            try:
+                self.cache.store(self.bank,
+                                 self.minion_id,
+                                 {'key': key,
+                                  'expire': time.time() + ttl,
+                                  'pillar': pillar})
+            except SaltCacheError as exc:
+                log.error('Could not write the compiled pillar cache: %s', exc)
+        return pillar
+
+
 class Pillar(object):
     '''
     Read over the pillar top files and render the pillar data
     '''
+    # The SLS renders which do not depend on the minion, shared by all the
+    # pillars compiled in the process
+    sls_render_cache = None
+
     def __init__(self, opts, grains, minion_id, saltenv, ext=None, functions=None,
                  pillar_override=None, pillarenv=None, extra_minion_data=None):
         self.minion_id = minion_id
         self.ext = ext
+        self._roots_fingerprint = None
         if pillarenv is None:
             if opts.get('pillarenv_from_saltenv', False):
                 opts['pillarenv'] = saltenv
@@ -674,6 +903,63 @@ class Pillar(object):
                             env_matches.append(item)
         return matches
 
+    def _tracked_render_pipe(self, fn_):
+        '''
+        Return True if the context variables used to render the SLS file can
+        all be tracked
+        '''
+        return tracked_render_pipe(fn_, self.rend, self.opts)
+
+    def render_sls(self, fn_, saltenv, sls, defaults):
+        '''
+        Render a pillar SLS file. When pillar_render_cache is enabled, the
+        renders which do not use any context variable specific to the minion
+        are shared between the minions.
+        '''
+        if not self.opts.get('pillar_render_cache') or not self._tracked_render_pipe(fn_):
+            return compile_template(fn_,
+                                    self.rend,
+                                    self.opts['renderer'],
+                                    self.opts['renderer_blacklist'],
+                                    self.opts['renderer_whitelist'],
+                                    saltenv,
+                                    sls,
+                                    _pillar_rend=True,
+                                    **defaults)
+
+        if Pillar.sls_render_cache is None:
+            Pillar.sls_render_cache = salt.utils.cache.LRUCache(
+                self.opts['pillar_render_cache_size'])
+        if self._roots_fingerprint is None:
+            # The SLS file can import or include any other file
+            self._roots_fingerprint = pillar_roots_fingerprint(
+                self.opts['pillar_roots'],
+                self.opts['pillar_roots_fingerprint_interval'])
+        key = (self._roots_fingerprint, saltenv, sls,
+               salt.utils.json.dumps(defaults, sort_keys=True, default=repr))
+        cached = Pillar.sls_render_cache.get(key)
+        if cached is not None:
+            log.debug('Pillar SLS render cache hit for %s in %s', sls, saltenv)
+            return copy.deepcopy(cached)
+
+        accessed = set()
+        state = compile_template(fn_,
+                                 self.rend,
+                                 self.opts['renderer'],
+                                 self.opts['renderer_blacklist'],
+                                 self.opts['renderer_whitelist'],
+                                 saltenv,
+                                 sls,
+                                 _pillar_rend=True,
+                                 _accessed_context=accessed,
+                                 **defaults)
+        if isinstance(state, dict) and accessed <= SLS_CONTEXT.union(defaults):
+            Pillar.sls_render_cache.put(key, copy.deepcopy(state))
+        else:
+            log.trace('Pillar SLS %s in %s depends on the minion through %s',
+                      sls, saltenv, ', '.join(sorted(accessed - SLS_CONTEXT)))
+        return state
+
     def render_pstate(self, sls, saltenv, mods, defaults=None):
         '''
         Collect a single pillar sls file and render it
@@ -716,15 +1002,7 @@ class Pillar(object):
                 return None, mods, errors
         state = None
         try:
-            state = compile_template(fn_,
-                                     self.rend,
-                                     self.opts['renderer'],
-                                     self.opts['renderer_blacklist'],
-                                     self.opts['renderer_whitelist'],
-                                     saltenv,
-                                     sls,
-                                     _pillar_rend=True,
-                                     **defaults)
+            state = self.render_sls(fn_, saltenv, sls, defaults)
         except Exception as exc:
             msg = 'Rendering SLS \'{0}\' failed, render error:\n{1}'.format(
                 sls, exc
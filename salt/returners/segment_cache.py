@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+'''
+Return data to a segmented local job cache
+
+.. versionadded:: Fluorine
+
+This job cache stores the same data as :mod:`local_cache
+<salt.returners.local_cache>`, but instead of a directory tree per job and a
+directory per minion return it appends all the records of the jobs started in
+the same hour to a single segment file. A small index file next to every
+segment maps job ids to the offsets of their records, so the data of a job is
+read without scanning the segment.
+
+Cleaning up old jobs only removes the expired segment files, and listing the
+jobs reads the job loads of a few segment files instead of opening a file per
+job.
+
+To use it as the master job cache set the following in the master config:
+
+.. code-block:: yaml
+
+    master_job_cache: segment_cache
+
+The segments are stored in the ``job_segments`` directory of the master
+``cachedir`` and are kept for :conf_master:`keep_jobs` hours.
+'''
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import python libs
+import contextlib
+import datetime
+import logging
+import os
+import struct
+
+# Import salt libs
+import salt.payload
+import salt.utils.files
+import salt.utils.jid
+import salt.utils.minions
+import salt.utils.stringutils
+import salt.exceptions
+
+# Import 3rd-party libs
+from salt.ext import six
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+log = logging.getLogger(__name__)
+
+__virtualname__ = 'segment_cache'
+
+# Segment files hold the serialized records, index files the
+# [jid, kind, name, offset, length] entries pointing into the segment
+SEGMENT_EXT = '.seg'
+INDEX_EXT = '.idx'
+# Every index entry is prefixed by its length so that a reader never parses a
+# partially written entry
+ENTRY_HEADER = struct.Struct(str('>I'))
+# Format of the segment names, one segment per hour
+SEGMENT_FMT = '%Y%m%d%H'
+
+# The index entries read so far by this process
+# {<segment>: {'pos': <bytes of the index read>,
+#              'jids': {<jid>: [<entry>, ...]},
+#              'kinds': {<jid>: {<record kind>, ...}},
+#              'returned': {<jid>: {<minion id>, ...}},
+#              'nocache': {<jid>, ...}}}
+_INDEX = {}
+
+
+def __virtual__():
+    if not HAS_FCNTL:
+        return False, 'The segment_cache returner requires fcntl'
+    return __virtualname__
+
+
+def _segment_dir():
+    '''
+    Return the directory holding the job segments
+    '''
+    return os.path.join(__opts__['cachedir'], 'job_segments')
+
+
+def _segment_path(segment, ext):
+    return os.path.join(_segment_dir(), segment + ext)
+
+
+def _segments():
+    '''
+    Return the sorted list of the existing segments
+    '''
+    try:
+        return sorted(
+            fn_[:-len(SEGMENT_EXT)] for fn_ in os.listdir(_segment_dir())
+            if fn_.endswith(SEGMENT_EXT)
+        )
+    except OSError:
+        return []
+
+
+def _jid_segment(jid):
+    '''
+    Return the segment of the given job id. Regular job ids start with the
+    time the job was started, other job ids are stored in the segment of the
+    current hour.
+    '''
+    if salt.utils.jid.is_jid(jid):
+        return jid[:10]
+    return datetime.datetime.now().strftime(SEGMENT_FMT)
+
+
+def _new_index():
+    return {'pos': 0, 'jids': {}, 'kinds': {}, 'returned': {}, 'nocache': set()}
+
+
+def _prune_index():
+    '''
+    Drop the in-memory index of the segments removed, possibly by
+    clean_old_jobs in another process
+    '''
+    for segment in list(_INDEX):
+        if not os.path.isfile(_segment_path(segment, INDEX_EXT)):
+            del _INDEX[segment]
+
+
+def _refresh_index(segment):
+    '''
+    Read the entries appended to the index of ``segment`` since the last call
+    and return the in-memory index of the segment
+    '''
+    idx_path = _segment_path(segment, INDEX_EXT)
+    try:
+        size = os.path.getsize(idx_path)
+    except OSError:
+        _INDEX.pop(segment, None)
+        return _new_index()
+    if segment not in _INDEX:
+        # A new segment is started every hour, the old ones expire meanwhile
+        _prune_index()
+    index = _INDEX.setdefault(segment, _new_index())
+    if size < index['pos']:
+        # The segment was removed and created again
+        index = _INDEX[segment] = _new_index()
+    if size == index['pos']:
+        return index
+
+    serial = salt.payload.Serial(__opts__)
+    with salt.utils.files.fopen(idx_path, 'rb') as fh_:
+        fh_.seek(index['pos'])
+        data = fh_.read()
+    pos = 0
+    while pos + ENTRY_HEADER.size <= len(data):
+        length = ENTRY_HEADER.unpack_from(data, pos)[0]
+        if pos + ENTRY_HEADER.size + length > len(data):
+            # Entry still being written
+            break
+        start = pos + ENTRY_HEADER.size
+        jid, kind, name, offset, rlen = serial.loads(data[start:start + length])
+        index['jids'].setdefault(jid, []).append((kind, name, offset, rlen))
+        index['kinds'].setdefault(jid, set()).add(kind)
+        if kind == 'return':
+            index['returned'].setdefault(jid, set()).add(name)
+        elif kind == 'jid' and name == 'nocache':
+            index['nocache'].add(jid)
+        pos = start + length
+    index['pos'] += pos
+    return index
+
+
+def _jid_entries(jid):
+    '''
+    Return the segment and the index entries of the given job id
+    '''
+    segment = _jid_segment(jid)
+    entries = _refresh_index(segment)['jids'].get(jid)
+    if entries or salt.utils.jid.is_jid(jid):
+        return segment, entries or []
+    for segment in reversed(_segments()):
+        entries = _refresh_index(segment)['jids'].get(jid)
+        if entries:
+            return segment, entries
+    return None, []
+
+
+@contextlib.contextmanager
+def _locked_segment(segment):
+    '''
+    Lock the segment for writing and yield its up to date index
+    '''
+    seg_dir = _segment_dir()
+    if not os.path.isdir(seg_dir):
+        try:
+            os.makedirs(seg_dir)
+        except OSError:
+            if not os.path.isdir(seg_dir):
+                raise
+    with salt.utils.files.fopen(_segment_path(segment, SEGMENT_EXT), 'ab') as seg:
+        fcntl.flock(seg.fileno(), fcntl.LOCK_EX)
+        try:
+            yield seg, _refresh_index(segment)
+        finally:
+            fcntl.flock(seg.fileno(), fcntl.LOCK_UN)
+
+
+def _append(seg, segment, jid, kind, name, data):
+    '''
+    Append a record to the locked segment and its entry to the index
+    '''
+    _append_many(seg, segment, [(jid, kind, name, data)])
+
+
+def _append_many(seg, segment, records):
+    '''
+    Append several ``(jid, kind, name, data)`` records to the locked segment
+    with a single write, and their entries to the index
+    '''
+    serial = salt.payload.Serial(__opts__)
+    seg.seek(0, os.SEEK_END)
+    offset = seg.tell()
+    chunks = []
+    entries = []
+    for jid, kind, name, data in records:
+        record = serial.dumps(data)
+        chunks.append(record)
+        entry = serial.dumps([jid, kind, name, offset, len(record)])
+        entries.append(ENTRY_HEADER.pack(len(entry)) + entry)
+        offset += len(record)
+    seg.write(b''.join(chunks))
+    seg.flush()
+    with salt.utils.files.fopen(_segment_path(segment, INDEX_EXT), 'ab') as idx:
+        idx.write(b''.join(entries))
+
+
+def _read(segment, entries):
+    '''
+    Read the records of the given index entries from the segment
+    '''
+    serial = salt.payload.Serial(__opts__)
+    ret = []
+    if not entries:
+        return ret
+    with salt.utils.files.fopen(_segment_path(segment, SEGMENT_EXT), 'rb') as seg:
+        for kind, name, offset, length in entries:
+            seg.seek(offset)
+            ret.append((kind, name, serial.loads(seg.read(length))))
+    return ret
+
+
+def _store(jid, kind, name, data):
+    segment, entries = _jid_entries(jid)
+    if segment is None:
+        segment = _jid_segment(jid)
+    with _locked_segment(segment) as (seg, _):
+        _append(seg, segment, jid, kind, name, data)
+
+
+def prep_jid(nocache=False, passed_jid=None, recurse_count=0):
+    '''
+    Return a job id and record it in the job cache
+
+    This is the function responsible for making sure jids don't collide (unless
+    it is passed a jid).
+    '''
+    if recurse_count >= 5:
+        err = 'prep_jid could not store a jid after {0} tries.'.format(recurse_count)
+        log.error(err)
+        raise salt.exceptions.SaltCacheError(err)
+    if passed_jid is None:  # this can be a None or an empty string.
+        jid = salt.utils.jid.gen_jid(__opts__)
+    else:
+        jid = passed_jid
+
+    segment = _jid_segment(jid)
+    if passed_jid is not None \
+            and 'jid' in _refresh_index(segment)['kinds'].get(jid, ()):
+        # The jid of every return is passed here, it is only recorded once
+        return jid
+    try:
+        with _locked_segment(segment) as (seg, index):
+            collision = passed_jid is None \
+                and 'jid' in index['kinds'].get(jid, ())
+            if not collision:
+                # The nocache flag is kept in the index entry so that returns
+                # can be dropped without reading the segment
+                _append(seg, segment, jid, 'jid', 'nocache' if nocache else None, {})
+    except (IOError, OSError) as exc:
+        log.warning('Could not store jid for job %s: %s. Retrying.', jid, exc)
+        return prep_jid(passed_jid=jid, nocache=nocache,
+                        recurse_count=recurse_count + 1)
+    if collision:
+        # Someone else is using this jid, we need a new one
+        return prep_jid(nocache=nocache, recurse_count=recurse_count + 1)
+    return jid
+
+
+def _return_record(load, index, returned):
+    '''
+    Return the record to append for a minion return, or None if the return
+    has to be dropped
+    '''
+    if load['jid'] in index['nocache']:
+        return None
+    if (load['jid'], load['id']) in returned \
+            or load['id'] in index['returned'].get(load['jid'], ()):
+        # Minion has already returned this jid and it should be dropped
+        log.error(
+            'An extra return was detected from minion %s, please verify '
+            'the minion, this could be a replay attack', load['id']
+        )
+        return None
+    returned.add((load['jid'], load['id']))
+    data = dict((key, load[key]) for key in ['return', 'retcode', 'success', 'out'] if key in load)
+    return load['jid'], 'return', load['id'], data
+
+
+def _load_segment(load):
+    '''
+    Return the segment holding the job of a minion return
+    '''
+    # if a minion is returning a standalone job, get a jobid
+    if load['jid'] == 'req':
+        load['jid'] = prep_jid(nocache=load.get('nocache', False))
+
+    segment, _ = _jid_entries(load['jid'])
+    if segment is None:
+        segment = _jid_segment(load['jid'])
+    return segment
+
+
+def returner(load):
+    '''
+    Return data to the segmented job cache
+    '''
+    segment = _load_segment(load)
+    with _locked_segment(segment) as (seg, index):
+        record = _return_record(load, index, set())
+        if record is None:
+            return False
+        _append(seg, segment, *record)
+
+
+def returner_batch(loads):
+    '''
+    Return a batch of minion returns to the segmented job cache, taking the
+    lock of every segment only once
+
+    The jid and the load of the jobs which have no record yet are stored
+    along with the returns, as prep_jid and save_load would.
+    '''
+    by_segment = {}
+    for load in loads:
+        by_segment.setdefault(_load_segment(load), []).append(load)
+
+    for segment, seg_loads in six.iteritems(by_segment):
+        with _locked_segment(segment) as (seg, index):
+            returned = set()
+            jids = set()
+            records = []
+            for load in seg_loads:
+                if load['jid'] not in jids:
+                    jids.add(load['jid'])
+                    kinds = index['kinds'].get(load['jid'], ())
+                    if 'jid' not in kinds:
+                        records.append((load['jid'], 'jid', None, {}))
+                    if 'load' not in kinds:
+                        records.append((load['jid'], 'load', None, load))
+                record = _return_record(load, index, returned)
+                if record is not None:
+                    records.append(record)
+            if records:
+                _append_many(seg, segment, records)
+
+
+def save_load(jid, clear_load, minions=None):
+    '''
+    Save the load to the specified jid
+
+    minions argument is to provide a pre-computed list of matched minions for
+    the job, for cases when this function can't compute that list itself (such
+    as for salt-ssh)
+
+    The load is only saved once per job, the later calls for the returns of
+    the job are ignored.
+    '''
+    segment, _ = _jid_entries(jid)
+    if segment is not None \
+            and 'load' in _refresh_index(segment)['kinds'].get(jid, ()):
+        return
+    _store(jid, 'load', None, clear_load)
+
+    # if you have a tgt, save that for the UI etc
+    if 'tgt' in clear_load and clear_load['tgt'] != '':
+        if minions is None:
+            ckminions = salt.utils.minions.CkMinions(__opts__)
+            # Retrieve the minions list
+            _res = ckminions.check_minions(
+                    clear_load['tgt'],
+                    clear_load.get('tgt_type', 'glob')
+                    )
+            minions = _res['minions']
+        # save the minions to a cache so we can see in the UI
+        save_minions(jid, minions)
+
+
+def save_minions(jid, minions, syndic_id=None):
+    '''
+    Save/update the list of minions for a given job
+    '''
+    # Ensure we have a list for Python 3 compatability
+    minions = list(minions)
+
+    log.debug(
+        'Adding minions for job %s%s: %s',
+        jid,
+        ' from syndic master \'{0}\''.format(syndic_id) if syndic_id else '',
+        minions
+    )
+    try:
+        _store(jid, 'minions', syndic_id, minions)
+    except (IOError, OSError) as exc:
+        log.error(
+            'Failed to write minion list %s to the job cache: %s',
+            minions, exc
+        )
+
+
+def get_load(jid):
+    '''
+    Return the load data that marks a specified jid
+    '''
+    segment, entries = _jid_entries(jid)
+    ret = {}
+    # The last saved minion list of every syndic master wins
+    minion_lists = {}
+    for kind, name, data in _read(segment, [
+            entry for entry in entries if entry[0] in ('load', 'minions')]):
+        if kind == 'load':
+            ret = data or {}
+        else:
+            minion_lists[name] = data
+    if not ret:
+        return {}
+    all_minions = set()
+    for minions in six.itervalues(minion_lists):
+        all_minions.update(minions)
+    if all_minions:
+        ret['Minions'] = sorted(all_minions)
+    return ret
+
+
+def get_jid(jid):
+    '''
+    Return the information returned when the specified job id was executed
+    '''
+    segment, entries = _jid_entries(jid)
+    ret = {}
+    for _, name, data in _read(segment, [
+            entry for entry in entries if entry[0] == 'return']):
+        if name not in ret:
+            ret[name] = data
+    return ret
+
+
+def _segment_loads(segment):
+    '''
+    Return a dict mapping the jids of the segment to their load
+    '''
+    jids = _refresh_index(segment)['jids']
+    entries = []
+    for jid in jids:
+        loads = [entry for entry in jids[jid] if entry[0] == 'load']
+        if loads:
+            entries.append((jid, loads[-1]))
+    ret = {}
+    for (jid, _), (_, _, load) in zip(entries, _read(segment, [entry for _, entry in entries])):
+        ret[jid] = load
+    return ret
+
+
+def get_jids():
+    '''
+    Return a dict mapping all job ids to job information
+    '''
+    ret = {}
+    for segment in _segments():
+        for jid, job in six.iteritems(_segment_loads(segment)):
+            ret[jid] = salt.utils.jid.format_jid_instance(jid, job)
+
+            if __opts__.get('job_cache_store_endtime'):
+                endtime = get_endtime(jid)
+                if endtime:
+                    ret[jid]['EndTime'] = endtime
+    return ret
+
+
+def get_jids_filter(count, filter_find_job=True):
+    '''
+    Return a list of all jobs information filtered by the given criteria.
+    :param int count: show not more than the count of most recent jobs
+    :param bool filter_find_jobs: filter out 'saltutil.find_job' jobs
+    '''
+    jobs = []
+    # Segments are read from the most recent one and only as many as needed
+    for segment in reversed(_segments()):
+        for jid, job in six.iteritems(_segment_loads(segment)):
+            job = salt.utils.jid.format_jid_instance_ext(jid, job)
+            if filter_find_job and job['Function'] == 'saltutil.find_job':
+                continue
+            jobs.append(job)
+        if len(jobs) >= count:
+            break
+    jobs.sort(key=lambda job: job['JID'])
+    return jobs[-count:] if count > 0 else []
+
+
+def clean_old_jobs():
+    '''
+    Clean out the old jobs from the job cache by removing expired segments
+    '''
+    if __opts__['keep_jobs'] == 0:
+        return
+    limit = datetime.datetime.now() - datetime.timedelta(hours=__opts__['keep_jobs'])
+    for segment in _segments():
+        try:
+            started = datetime.datetime.strptime(segment, SEGMENT_FMT)
+        except ValueError:
+            log.warning('Ignoring unexpected job cache segment %s', segment)
+            continue
+        # A segment holds the jobs started within its hour
+        if started + datetime.timedelta(hours=1) > limit:
+            continue
+        log.debug('Removing expired job cache segment %s', segment)
+        for ext in (INDEX_EXT, SEGMENT_EXT):
+            try:
+                os.remove(_segment_path(segment, ext))
+            except OSError as exc:
+                log.error('Unable to remove job cache segment %s: %s', segment, exc)
+        _INDEX.pop(segment, None)
+
+
+def update_endtime(jid, time):
+    '''
+    Update (or store) the end time for a given job
+    '''
+    try:
+        _store(jid, 'endtime', None, salt.utils.stringutils.to_unicode(time))
+    except (IOError, OSError) as exc:
+        log.warning('Could not write job end time: %s', exc)
+
+
+def get_endtime(jid):
+    '''
+    Retrieve the stored endtime for a given job
+
+    Returns False if no endtime is present
+    '''
+    segment, entries = _jid_entries(jid)
+    endtimes = [entry for entry in entries if entry[0] == 'endtime']
+    if not endtimes:
+        return False
+    return _read(segment, endtimes[-1:])[0][2]
@@ -19,6 +19,7 @@ import sys
 import copy
 import site
 import fnmatch
+import hashlib
 import logging
 import datetime
 import traceback
@@ -29,6 +30,7 @@ import random
 # Import salt libs
 import salt.loader
 import salt.minion
+import salt.payload
 import salt.pillar
 import salt.fileclient
 import salt.utils.args
@@ -37,9 +39,12 @@ import salt.utils.decorators.state
 import salt.utils.dictupdate
 import salt.utils.event
 import salt.utils.files
+import salt.utils.hashutils
 import salt.utils.immutabletypes as immutabletypes
+import salt.utils.json
 import salt.utils.platform
 import salt.utils.process
+import salt.utils.stringutils
 import salt.utils.url
 import salt.syspaths as syspaths
 from salt.template import compile_template, compile_template_str
@@ -125,6 +130,25 @@ STATE_RUNTIME_KEYWORDS = frozenset([
 
 STATE_INTERNAL_KEYWORDS = STATE_REQUISITE_KEYWORDS.union(STATE_REQUISITE_IN_KEYWORDS).union(STATE_RUNTIME_KEYWORDS)
 
+# Chunks run or skipped depending on the changes or failures of other chunks
+# are never assumed to be converged
+STATE_TRIGGER_KEYWORDS = frozenset([
+    'onchanges',
+    'onchanges_any',
+    'onchanges_in',
+    'onfail',
+    'onfail_any',
+    'onfail_in',
+    'prereq',
+    'prereq_in',
+    'prerequired',
+    'watch',
+    'watch_any',
+    'watch_in',
+    'listen',
+    'listen_in',
+    ])
+
 
 def _odict_hashable(self):
     return id(self)
@@ -152,6 +176,25 @@ def _gen_tag(low):
     return '{0[state]}_|-{0[__id__]}_|-{0[name]}_|-{0[fun]}'.format(low)
 
 
+def _order_group(low, explicit):
+    '''
+    Return the sort key of the concurrency group of an ordered low chunk: order
+    first, each explicit numeric order, the chunks without an explicit order
+    and order last. The explicit argument holds the tags of the chunks with an
+    explicit numeric order.
+    '''
+    order = low.get('order', 1)
+    if not isinstance(order, (int, float)):
+        return (2, 0)
+    if order < 1:
+        return (0, order)
+    if order >= 1000000:
+        return (3, order)
+    if _gen_tag(low) in explicit:
+        return (1, order)
+    return (2, 0)
+
+
 def _clean_tag(tag):
     '''
     Make tag name safe for filenames
@@ -184,6 +227,35 @@ def _calculate_fake_duration():
     return start_time, duration
 
 
+def _digest(data):
+    '''
+    Return a digest of the JSON serializable data, or None when the data can
+    not be serialized
+    '''
+    try:
+        data = salt.utils.json.dumps(data, sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(salt.utils.stringutils.to_bytes(data)).hexdigest()
+
+
+def _salt_urls(data):
+    '''
+    Yield the salt:// URLs found in the data
+    '''
+    if isinstance(data, six.string_types):
+        if data.startswith('salt://'):
+            yield data
+    elif isinstance(data, dict):
+        for value in six.itervalues(data):
+            for url in _salt_urls(value):
+                yield url
+    elif isinstance(data, (list, tuple)):
+        for value in data:
+            for url in _salt_urls(value):
+                yield url
+
+
 def get_accumulator_dir(cachedir):
     '''
     Return the directory that accumulator data is stored in, creating it if it
@@ -224,20 +296,95 @@ def state_args(id_, state, high):
     return args
 
 
-def find_name(name, state, high):
+# The requisites a chunk waits for when running the chunks concurrently
+CONCURRENT_REQUISITES = (
+    'require',
+    'require_any',
+    'watch',
+    'watch_any',
+    'onfail',
+    'onfail_any',
+    'onchanges',
+    'onchanges_any',
+)
+
+# The chunks using these requisites do not run concurrently with other chunks
+SERIAL_REQUISITES = (
+    'prereq',
+    'prerequired',
+    'watch',
+    'watch_any',
+)
+
+# Only one chunk of these states runs at a time when running the chunks
+# concurrently, since their package managers lock their databases
+EXCLUSIVE_STATES = (
+    'pkg',
+    'pkgrepo',
+)
+
+# The context variables a SLS render may use and still be reused by the
+# state_render_cache, as long as their values did not change
+RENDER_CACHE_CONTEXT = salt.pillar.SLS_CONTEXT.union(('grains', 'pillar'))
+
+
+def _is_glob(val):
+    '''
+    Return True if fnmatch matches val as a pattern rather than as a plain
+    string
+    '''
+    return any(char in val for char in '*?[')
+
+
+def index_high(high):
+    '''
+    Build the tables find_name and find_sls_ids can use to look up the ids of
+    the high data instead of scanning it. The index is only valid as long as
+    the high data is not modified.
+    '''
+    index = {'sls': {}, 'args': {}}
+    for nid, item in six.iteritems(high):
+        if not isinstance(item, dict):
+            continue
+        index['sls'].setdefault(item.get('__sls__'), []).append(nid)
+        for state, run in six.iteritems(item):
+            if not isinstance(run, list):
+                continue
+            for arg in run:
+                if not isinstance(arg, dict) or len(arg) != 1:
+                    continue
+                try:
+                    index['args'].setdefault((state, arg[next(iter(arg))]), []).append(nid)
+                except TypeError:
+                    # Unhashable values are never equal to a name
+                    continue
+    return index
+
+
+def find_name(name, state, high, index=None):
     '''
     Scan high data for the id referencing the given name and return a list of (IDs, state) tuples that match
 
     Note: if `state` is sls, then we are looking for all IDs that match the given SLS
+
+    If the index of the high data built by index_high is passed, it is used
+    instead of scanning the high data.
     '''
     ext_id = []
     if name in high:
         ext_id.append((name, state))
     # if we are requiring an entire SLS, then we need to add ourselves to everything in that SLS
     elif state == 'sls':
+        if index is not None:
+            for nid in index['sls'].get(name, []):
+                ext_id.append((nid, next(iter(high[nid]))))
+            return ext_id
         for nid, item in six.iteritems(high):
             if item['__sls__'] == name:
                 ext_id.append((nid, next(iter(item))))
+    elif index is not None:
+        for nid in index['args'].get((state, name), []):
+            ext_id.append((nid, state))
     # otherwise we are requiring a single state, lets find it
     else:
         # We need to scan for the name
@@ -254,12 +401,19 @@ def find_name(name, state, high):
     return ext_id
 
 
-def find_sls_ids(sls, high):
+def find_sls_ids(sls, high, index=None):
     '''
     Scan for all ids in the given sls and return them in a dict; {name: state}
+
+    If the index of the high data built by index_high is passed, it is used
+    instead of scanning the high data.
     '''
     ret = []
-    for nid, item in six.iteritems(high):
+    if index is not None:
+        items = [(nid, high[nid]) for nid in index['sls'].get(sls, [])]
+    else:
+        items = six.iteritems(high)
+    for nid, item in items:
         if item['__sls__'] == sls:
             for st_ in item:
                 if st_.startswith('__'):
@@ -736,6 +890,12 @@ class State(object):
         self.active = set()
         self.mod_init = set()
         self.pre = {}
+        self._chunk_index = None
+        self.converged = set()
+        # The IDs and state modules whose order was set by state_auto_order,
+        # and the tags of the chunks with an explicit numeric order
+        self.auto_ordered = set()
+        self.explicit_orders = set()
         self.__run_num = 0
         self.jid = jid
         self.instance_id = six.text_type(id(self))
@@ -1308,6 +1468,11 @@ class State(object):
                 chunk_order = chunk['order']
                 if chunk_order > cap - 1 and chunk_order > 0:
                     cap = chunk_order + 100
+        if self.opts.get('state_concurrency', 0) > 1:
+            self.explicit_orders = set(
+                _gen_tag(chunk) for chunk in chunks
+                if isinstance(chunk.get('order'), (int, float))
+                and (chunk['__id__'], chunk['state']) not in self.auto_ordered)
         for chunk in chunks:
             if 'order' not in chunk:
                 chunk['order'] = cap
@@ -1524,6 +1689,9 @@ class State(object):
                     ]))
         extend = {}
         errors = []
+        # The high data is not modified until reconcile_extend, look the
+        # requisites up in an index of it
+        high_index = index_high(high)
         for id_, body in six.iteritems(high):
             if not isinstance(body, dict):
                 continue
@@ -1615,7 +1783,7 @@ class State(object):
                                 pname = ind[pstate]
                                 if pstate == 'sls':
                                     # Expand hinges here
-                                    hinges = find_sls_ids(pname, high)
+                                    hinges = find_sls_ids(pname, high, high_index)
                                 else:
                                     hinges.append((pname, pstate))
                                 if '.' in pstate:
@@ -1645,7 +1813,7 @@ class State(object):
                                                 )
                                     if key == 'prereq':
                                         # Add prerequired to prereqs
-                                        ext_ids = find_name(name, _state, high)
+                                        ext_ids = find_name(name, _state, high, high_index)
                                         for ext_id, _req_state in ext_ids:
                                             if ext_id not in extend:
                                                 extend[ext_id] = OrderedDict()
@@ -1658,7 +1826,7 @@ class State(object):
                                     if key == 'use_in':
                                         # Add the running states args to the
                                         # use_in states
-                                        ext_ids = find_name(name, _state, high)
+                                        ext_ids = find_name(name, _state, high, high_index)
                                         for ext_id, _req_state in ext_ids:
                                             if not ext_id:
                                                 continue
@@ -1685,7 +1853,7 @@ class State(object):
                                     if key == 'use':
                                         # Add the use state's args to the
                                         # running state
-                                        ext_ids = find_name(name, _state, high)
+                                        ext_ids = find_name(name, _state, high, high_index)
                                         for ext_id, _req_state in ext_ids:
                                             if not ext_id:
                                                 continue
@@ -1785,7 +1953,11 @@ class State(object):
                 target=self._call_parallel_target,
                 args=(cdata, low))
         proc.start()
-        ret = {'name': cdata['args'][0],
+        if cdata['args']:
+            name = cdata['args'][0]
+        else:
+            name = cdata['kwargs'].get('name', low.get('name'))
+        ret = {'name': name,
                 'result': None,
                 'changes': {},
                 'comment': 'Started in a seperate process',
@@ -2126,21 +2298,27 @@ class State(object):
                         self.__run_num += 1
                         chunks.remove(low)
                         break
+        self._index_chunks(chunks)
         running = {}
-        for low in chunks:
-            if '__FAILHARD__' in running:
-                running.pop('__FAILHARD__')
+        if self.opts.get('state_concurrency', 0) > 1:
+            running, failhard = self.call_chunks_concurrently(chunks)
+            if failhard:
                 return running
-            tag = _gen_tag(low)
-            if tag not in running:
-                # Check if this low chunk is paused
-                action = self.check_pause(low)
-                if action == 'kill':
-                    break
-                running = self.call_chunk(low, running, chunks)
-                if self.check_failhard(low, running):
+        else:
+            for low in chunks:
+                if '__FAILHARD__' in running:
+                    running.pop('__FAILHARD__')
                     return running
-            self.active = set()
+                tag = _gen_tag(low)
+                if tag not in running:
+                    # Check if this low chunk is paused
+                    action = self.check_pause(low)
+                    if action == 'kill':
+                        break
+                    running = self.call_chunk(low, running, chunks)
+                    if self.check_failhard(low, running):
+                        return running
+                self.active = set()
         while True:
             if self.reconcile_procs(running):
                 break
@@ -2148,6 +2326,125 @@ class State(object):
         ret = dict(list(disabled.items()) + list(running.items()))
         return ret
 
+    def _concurrent_deps(self, low, chunks):
+        '''
+        Return the tags of the chunks which have to finish before low can
+        start when running the chunks concurrently
+        '''
+        deps = set()
+        for requisite in CONCURRENT_REQUISITES:
+            for req in low.get(requisite) or []:
+                if isinstance(req, six.string_types):
+                    req = {'id': req}
+                req = trim_req(req)
+                req_key = next(iter(req))
+                try:
+                    found = self._find_requisite(chunks, req_key, req[req_key])
+                except SaltRenderError:
+                    # call_chunk reports the invalid requisite
+                    continue
+                deps.update(_gen_tag(chunk) for chunk in found)
+        deps.discard(_gen_tag(low))
+        return deps
+
+    def call_chunks_concurrently(self, chunks):
+        '''
+        Call the chunks, running up to state_concurrency of them at once in
+        parallel processes. A chunk is started once the chunks it requires
+        have finished. Chunks are grouped by order: first, then each explicit
+        numeric order, then the chunks without an explicit order, then last. A
+        chunk is started after all the chunks of the lower groups have
+        finished.
+
+        Chunks using prereq or watch, or setting parallel to False, run in this
+        process once no other chunk is running. Only one pkg or pkgrepo chunk
+        runs at a time. Return the running dict and whether a failhard stopped
+        the run.
+        '''
+        limit = self.opts['state_concurrency']
+        running = {}
+        pending = list(chunks)
+        started = {}
+        # The unfinished requisites of every chunk and the chunks waiting
+        # for every chunk
+        waiting = {}
+        dependents = {}
+        # The number of unfinished chunks in each order group
+        groups = {}
+        ranks = dict((group, rank) for rank, group in enumerate(sorted(set(
+            _order_group(low, self.explicit_orders) for low in chunks))))
+        unfinished = [0] * len(ranks)
+        for low in chunks:
+            tag = _gen_tag(low)
+            waiting[tag] = self._concurrent_deps(low, chunks)
+            for dep in waiting[tag]:
+                dependents.setdefault(dep, []).append(tag)
+            groups[tag] = ranks[_order_group(low, self.explicit_orders)]
+            unfinished[groups[tag]] += 1
+        finished = set()
+
+        def _serial(low):
+            if low.get('__prereq__') or low.get('parallel') is False:
+                return True
+            return any(key in low for key in SERIAL_REQUISITES)
+
+        def _ready(low):
+            tag = _gen_tag(low)
+            if waiting[tag] or any(unfinished[:groups[tag]]):
+                return False
+            if _serial(low):
+                return not started
+            if low['state'] in EXCLUSIVE_STATES:
+                if any(other['state'] in EXCLUSIVE_STATES for other in started.values()):
+                    return False
+            return len(started) < limit
+
+        failhard = False
+        while pending or started:
+            if '__FAILHARD__' in running:
+                running.pop('__FAILHARD__')
+                failhard = True
+            self.reconcile_procs(running)
+            for tag in running:
+                if tag in finished or running[tag].get('proc'):
+                    continue
+                finished.add(tag)
+                if tag in groups:
+                    unfinished[groups[tag]] -= 1
+                for dependent in dependents.get(tag, ()):
+                    waiting[dependent].discard(tag)
+                if tag in started and self.check_failhard(started.pop(tag), running):
+                    failhard = True
+            if failhard:
+                # Let the running chunks finish, but do not start new ones
+                pending = []
+            pending = [low for low in pending if _gen_tag(low) not in running]
+            low = next((low for low in pending if _ready(low)), None)
+            if low is None and pending and not started:
+                # The remaining chunks wait for each other, let call_chunk
+                # resolve the requisites like the sequential run does
+                low = pending[0]
+            if low is None:
+                if started:
+                    time.sleep(0.01)
+                continue
+            pending.remove(low)
+            # Check if this low chunk is paused
+            action = self.check_pause(low)
+            if action == 'kill':
+                pending = []
+                continue
+            tag = _gen_tag(low)
+            if not _serial(low) and _ready(low):
+                low.setdefault('parallel', True)
+            running = self.call_chunk(low, running, chunks)
+            if running.get(tag, {}).get('proc'):
+                started[tag] = low
+            elif self.check_failhard(low, running):
+                failhard = True
+            self.active = set()
+        return running, failhard
+
     def check_failhard(self, low, running):
         '''
         Check if the low data chunk should send a failhard signal
@@ -2223,7 +2520,7 @@ class State(object):
                                'changes': {}}
                     try:
                         with salt.utils.files.fopen(ret_cache, 'rb') as fp_:
-                            ret = msgpack.loads(fp_.read())
+                            ret = salt.payload.Serial(self.opts).loads(fp_.read())
                     except (OSError, IOError):
                         ret = {'result': False,
                                'comment': 'Parallel cache failure',
@@ -2235,6 +2532,60 @@ class State(object):
                     retset.add(False)
         return False not in retset
 
+    def _index_chunks(self, chunks):
+        '''
+        Build the tables looking up the chunks by name, id and sls, which are
+        used to resolve the requisites of the chunks without scanning them
+        '''
+        index = {'chunks': chunks,
+                 'size': len(chunks),
+                 'name': {},
+                 '__id__': {},
+                 '__sls__': {}}
+        for pos, chunk in enumerate(chunks):
+            for key in ('name', '__id__', '__sls__'):
+                val = chunk.get(key)
+                if isinstance(val, six.string_types):
+                    # fnmatch normalizes the case on Windows
+                    index[key].setdefault(os.path.normcase(val), []).append(pos)
+        self._chunk_index = index
+        return index
+
+    def _find_requisite(self, chunks, req_key, req_val):
+        '''
+        Return the chunks matching the requisite req_key: req_val, in the order
+        of the chunks. Plain names, ids and sls are looked up in the index of
+        the chunks, globs are matched against every chunk.
+        '''
+        if req_val is None or not chunks:
+            return []
+        if not isinstance(req_val, six.string_types):
+            raise SaltRenderError(
+                'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
+                    req_key, chunks[0]['name']))
+        index = self._chunk_index
+        if index is None or index['chunks'] is not chunks or index['size'] != len(chunks):
+            index = self._index_chunks(chunks)
+        if req_key == 'sls':
+            # Allow requisite tracking of entire sls files
+            if _is_glob(req_val):
+                return [chunk for chunk in chunks
+                        if fnmatch.fnmatch(chunk['__sls__'], req_val)]
+            return [chunks[pos] for pos in
+                    index['__sls__'].get(os.path.normcase(req_val), [])]
+        if _is_glob(req_val):
+            found = [chunk for chunk in chunks
+                     if fnmatch.fnmatch(chunk['name'], req_val) or
+                     fnmatch.fnmatch(chunk['__id__'], req_val)]
+        else:
+            key = os.path.normcase(req_val)
+            found = [chunks[pos] for pos in sorted(
+                set(index['name'].get(key, [])) |
+                set(index['__id__'].get(key, [])))]
+        if req_key == 'id':
+            return found
+        return [chunk for chunk in found if chunk['state'] == req_key]
+
     def check_requisite(self, low, running, chunks, pre=False):
         '''
         Look into the running data to check the status of all requisite
@@ -2295,48 +2646,19 @@ class State(object):
                     if isinstance(req, six.string_types):
                         req = {'id': req}
                     req = trim_req(req)
-                    found = False
-                    for chunk in chunks:
-                        req_key = next(iter(req))
-                        req_val = req[req_key]
-                        if req_val is None:
-                            continue
-                        if req_key == 'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk['__sls__'], req_val):
-                                found = True
-                                reqs[r_state].append(chunk)
-                            continue
-                        try:
-                            if isinstance(req_val, six.string_types):
-                                if (fnmatch.fnmatch(chunk['name'], req_val) or
-                                    fnmatch.fnmatch(chunk['__id__'], req_val)):
-                                    if req_key == 'id' or chunk['state'] == req_key:
-                                        found = True
-                                        reqs[r_state].append(chunk)
-                            else:
-                                raise KeyError
-                        except KeyError as exc:
-                            raise SaltRenderError(
-                                'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
-                                    req_key, chunk['name']))
-                        except TypeError:
-                            # On Python 2, the above req_val, being an OrderedDict, will raise a KeyError,
-                            # however on Python 3 it will raise a TypeError
-                            # This was found when running tests.unit.test_state.StateCompilerTestCase.test_render_error_on_invalid_requisite
-                            raise SaltRenderError(
-                                'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
-                                    req_key, chunk['name']))
+                    req_key = next(iter(req))
+                    found = self._find_requisite(chunks, req_key, req[req_key])
                     if not found:
                         return 'unmet', ()
+                    reqs[r_state].extend(found)
         fun_stats = set()
-        for r_state, chunks in six.iteritems(reqs):
+        for r_state, r_chunks in six.iteritems(reqs):
             req_stats = set()
             if r_state.startswith('prereq') and not r_state.startswith('prerequired'):
                 run_dict = self.pre
             else:
                 run_dict = running
-            for chunk in chunks:
+            for chunk in r_chunks:
                 tag = _gen_tag(chunk)
                 if tag not in run_dict:
                     req_stats.add('unmet')
@@ -2478,29 +2800,14 @@ class State(object):
                     if isinstance(req, six.string_types):
                         req = {'id': req}
                     req = trim_req(req)
-                    found = False
                     req_key = next(iter(req))
-                    req_val = req[req_key]
-                    for chunk in chunks:
-                        if req_val is None:
-                            continue
-                        if req_key == 'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk['__sls__'], req_val):
-                                if requisite == 'prereq':
-                                    chunk['__prereq__'] = True
-                                reqs.append(chunk)
-                                found = True
-                            continue
-                        if (fnmatch.fnmatch(chunk['name'], req_val) or
-                            fnmatch.fnmatch(chunk['__id__'], req_val)):
-                            if req_key == 'id' or chunk['state'] == req_key:
-                                if requisite == 'prereq':
-                                    chunk['__prereq__'] = True
-                                elif requisite == 'prerequired':
-                                    chunk['__prerequired__'] = True
-                                reqs.append(chunk)
-                                found = True
+                    found = self._find_requisite(chunks, req_key, req[req_key])
+                    for chunk in found:
+                        if requisite == 'prereq':
+                            chunk['__prereq__'] = True
+                        elif requisite == 'prerequired' and req_key != 'sls':
+                            chunk['__prerequired__'] = True
+                        reqs.append(chunk)
                     if not found:
                         lost[requisite].append(req)
             if lost['require'] or lost['watch'] or lost['prereq'] \
@@ -2575,6 +2882,8 @@ class State(object):
         elif status == 'met':
             if low.get('__prereq__'):
                 self.pre[tag] = self.call(low, chunks, running)
+            elif tag in self.converged and self._reqs_unchanged(reqs, running):
+                running[tag] = self._converged_ret(low)
             else:
                 running[tag] = self.call(low, chunks, running)
         elif status == 'fail':
@@ -2669,6 +2978,130 @@ class State(object):
             self.event(running[tag], len(chunks), fire_event=low.get('fire_event'))
         return running
 
+    def _converged_ret(self, low):
+        '''
+        Return the result of a chunk assumed to be converged
+        '''
+        start_time, duration = _calculate_fake_duration()
+        ret = {'changes': {},
+               'result': True,
+               'duration': duration,
+               'start_time': start_time,
+               'comment': 'State was not run because it succeeded without '
+                          'changes in the previous state run with the same '
+                          'data',
+               '__run_num__': self.__run_num,
+               '__sls__': low['__sls__']}
+        self.__run_num += 1
+        return ret
+
+    @staticmethod
+    def _reqs_unchanged(reqs, running):
+        '''
+        Return True if all the requisites of a chunk finished without changes
+        '''
+        if not reqs:
+            return True
+        for req_lows in six.itervalues(reqs):
+            for req_low in req_lows:
+                if running.get(_gen_tag(req_low), {}).get('changes'):
+                    return False
+        return True
+
+    def _converged_path(self):
+        return os.path.join(self.opts['cachedir'], 'state_converged.p')
+
+    def _read_converged(self):
+        '''
+        Return the digests of the inputs of the chunks which succeeded
+        without changes in the previous state runs, by tag
+        '''
+        path = self._converged_path()
+        if not os.path.isfile(path):
+            return {}
+        try:
+            with salt.utils.files.fopen(path, 'rb') as fp_:
+                converged = salt.payload.Serial(self.opts).load(fp_)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug('Unable to read %s: %s', path, exc)
+            return {}
+        return converged if isinstance(converged, dict) else {}
+
+    def _source_hashes(self, low):
+        '''
+        Return the hashes of the salt:// files used by the chunk, or None when
+        one of them can not be hashed, like the directory of a file.recurse
+        '''
+        saltenv = low.get('saltenv', low.get('__env__', 'base'))
+        hashes = {}
+        for url in _salt_urls(low):
+            if url in hashes:
+                continue
+            try:
+                hashes[url] = self.functions['cp.hash_file'](url, saltenv).get('hsum')
+            except Exception as exc:  # pylint: disable=broad-except
+                log.debug('Unable to hash %s: %s', url, exc)
+                return None
+            if not hashes[url]:
+                return None
+        return hashes
+
+    def load_converged(self, chunks):
+        '''
+        Set the converged tags to the chunks which succeeded without changes
+        in the previous state run with the same inputs, and return the
+        digests of the inputs of the chunks: the low data, the hashes of the
+        salt:// files and, for templated files, the grains and pillar
+        '''
+        digests = {}
+        context = None
+        for low in chunks:
+            tag = _gen_tag(low)
+            if STATE_TRIGGER_KEYWORDS.intersection(low):
+                digests[tag] = None
+                continue
+            hashes = self._source_hashes(low)
+            if hashes is None:
+                digests[tag] = None
+                continue
+            if low.get('template') and context is None:
+                context = [_digest(self.opts.get('grains')),
+                           _digest(self.opts.get('pillar'))]
+            # The order changes when states are added before this one
+            digests[tag] = _digest({
+                'low': dict(low, order=None),
+                'sources': hashes,
+                'context': context if low.get('template') else None})
+        previous = self._read_converged()
+        self.converged = set(
+            tag for tag, digest in six.iteritems(digests)
+            if digest is not None and previous.get(tag) == digest)
+        return digests
+
+    def save_converged(self, digests, running):
+        '''
+        Record the digests of the chunks which succeeded without changes
+        '''
+        converged = self._read_converged()
+        for tag, digest in six.iteritems(digests):
+            ret = running.get(tag)
+            # Chunks skipped by onlyif or unless did not actually run
+            if digest is not None and isinstance(ret, dict) \
+                    and ret.get('result') is True and not ret.get('changes') \
+                    and not ret.get('skip_watch'):
+                converged[tag] = digest
+            else:
+                converged.pop(tag, None)
+        path = self._converged_path()
+        cumask = os.umask(0o77)
+        try:
+            with salt.utils.files.fopen(path, 'w+b') as fp_:
+                salt.payload.Serial(self.opts).dump(converged, fp_)
+        except (IOError, OSError):
+            log.error('Unable to write the converged states to %s', path)
+        finally:
+            os.umask(cumask)
+
     def call_listen(self, chunks, running):
         '''
         Find all of the listen routines and call the associated mod_watch runs
@@ -2762,8 +3195,13 @@ class State(object):
         # the low data chunks
         if errors:
             return errors
+        digests = None
+        if self.opts.get('state_assume_converged'):
+            digests = self.load_converged(chunks)
         ret = self.call_chunks(chunks)
         ret = self.call_listen(chunks, ret)
+        if digests is not None:
+            self.save_converged(digests, ret)
 
         def _cleanup_accumulator_data():
             accum_data_path = os.path.join(
@@ -2913,6 +3351,9 @@ class BaseHighState(object):
         self.avail = self.__gather_avail()
         self.serial = salt.payload.Serial(self.opts)
         self.building_highstate = OrderedDict()
+        self._render_cache = None
+        self._render_cache_changed = False
+        self._context_digests = {}
 
     def __gather_avail(self):
         '''
@@ -3423,6 +3864,124 @@ class BaseHighState(object):
             self.state.opts['pillar'] = self.state._gather_pillar()
         self.state.module_refresh()
 
+    def _render_cache_path(self):
+        return os.path.join(self.opts['cachedir'], 'sls_render.p')
+
+    def _load_render_cache(self):
+        '''
+        Return the SLS renders of the previous state runs, by saltenv and sls
+        '''
+        if self._render_cache is None:
+            self._render_cache = {}
+            path = self._render_cache_path()
+            if os.path.isfile(path):
+                try:
+                    with salt.utils.files.fopen(path, 'rb') as fp_:
+                        self._render_cache = self.serial.load(fp_) or {}
+                except Exception as exc:  # pylint: disable=broad-except
+                    log.debug('Unable to read %s: %s', path, exc)
+        return self._render_cache
+
+    def _save_render_cache(self):
+        '''
+        Write the SLS renders to the cachedir if they changed
+        '''
+        if not self._render_cache_changed:
+            return
+        path = self._render_cache_path()
+        cumask = os.umask(0o77)
+        try:
+            with salt.utils.files.fopen(path, 'w+b') as fp_:
+                self.serial.dump(self._render_cache, fp_)
+            self._render_cache_changed = False
+        except (IOError, OSError):
+            log.error('Unable to write the SLS render cache to %s', path)
+        finally:
+            os.umask(cumask)
+
+    def _render_fingerprint(self, fn_, saltenv, accessed, templates):
+        '''
+        Return the fingerprint of the inputs of a SLS render: the hashes of
+        the SLS file and the templates it loaded, and the digests of the
+        grains and pillar when it used them
+        '''
+        fingerprint = {
+            'source': salt.utils.hashutils.get_hash(
+                fn_, form=self.opts.get('hash_type', 'md5')),
+            'templates': {},
+            'context': {},
+        }
+        for template in templates:
+            fingerprint['templates'][template] = self.client.hash_file(
+                salt.utils.url.create(template), saltenv).get('hsum')
+        for name in accessed:
+            if name not in self._context_digests:
+                self._context_digests[name] = _digest(self.state.opts.get(name))
+            fingerprint['context'][name] = self._context_digests[name]
+        return fingerprint
+
+    def _get_cached_render(self, fn_, saltenv, sls):
+        '''
+        Return the render of the SLS file from the previous state run, or None
+        when its inputs changed since then
+        '''
+        entry = self._load_render_cache().get('{0}:{1}'.format(saltenv, sls))
+        if not isinstance(entry, dict):
+            return None
+        try:
+            fingerprint = self._render_fingerprint(
+                fn_, saltenv, entry['accessed'], entry['templates'])
+            if fingerprint != entry['fingerprint']:
+                return None
+            state = salt.utils.json.loads(
+                entry['state'], object_pairs_hook=OrderedDict)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug('Unable to reuse the render of SLS %s in saltenv %s: %s',
+                      sls, saltenv, exc)
+            return None
+        log.debug('Reusing the render of SLS %s in saltenv %s', sls, saltenv)
+        return state
+
+    def _cache_render(self, fn_, saltenv, sls, state, accessed, templates):
+        '''
+        Keep the render of the SLS file for the next state runs, when it only
+        depends on the tracked inputs
+        '''
+        cache = self._load_render_cache()
+        key = '{0}:{1}'.format(saltenv, sls)
+        data = None
+        if isinstance(state, dict) and not accessed <= RENDER_CACHE_CONTEXT:
+            log.trace('SLS %s in saltenv %s can not be cached as it uses %s',
+                      sls, saltenv,
+                      ', '.join(sorted(accessed - RENDER_CACHE_CONTEXT)))
+        elif isinstance(state, dict):
+            try:
+                data = salt.utils.json.dumps(state)
+                if salt.utils.json.loads(data, object_pairs_hook=OrderedDict) != state:
+                    data = None
+            except (TypeError, ValueError):
+                data = None
+        if data is None:
+            if cache.pop(key, None) is not None:
+                self._render_cache_changed = True
+            return
+        accessed = sorted(accessed & set(('grains', 'pillar')))
+        templates = sorted(templates)
+        try:
+            fingerprint = self._render_fingerprint(
+                fn_, saltenv, accessed, templates)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug('Unable to cache the render of SLS %s in saltenv %s: %s',
+                      sls, saltenv, exc)
+            return
+        cache[key] = {
+            'accessed': accessed,
+            'templates': templates,
+            'fingerprint': fingerprint,
+            'state': data,
+        }
+        self._render_cache_changed = True
+
     def render_state(self, sls, saltenv, mods, matches, local=False):
         '''
         Render a state file and retrieve all of the include states
@@ -3445,32 +4004,49 @@ class BaseHighState(object):
                 'fileserver'.format(sls, saltenv)
             )
         state = None
-        try:
-            state = compile_template(fn_,
-                                     self.state.rend,
-                                     self.state.opts['renderer'],
-                                     self.state.opts['renderer_blacklist'],
-                                     self.state.opts['renderer_whitelist'],
-                                     saltenv,
-                                     sls,
-                                     rendered_sls=mods
-                                     )
-        except SaltRenderError as exc:
-            msg = 'Rendering SLS \'{0}:{1}\' failed: {2}'.format(
-                saltenv, sls, exc
-            )
-            log.critical(msg)
-            errors.append(msg)
-        except Exception as exc:
-            msg = 'Rendering SLS {0} failed, render error: {1}'.format(
-                sls, exc
-            )
-            log.critical(
-                msg,
-                # Show the traceback if the debug logging level is enabled
-                exc_info_on_loglevel=logging.DEBUG
-            )
-            errors.append('{0}\n{1}'.format(msg, traceback.format_exc()))
+        render_cache = self.opts.get('state_render_cache') and not local \
+            and fn_ and salt.pillar.tracked_render_pipe(
+                fn_, self.state.rend, self.state.opts)
+        if render_cache:
+            state = self._get_cached_render(fn_, saltenv, sls)
+        if state is None:
+            accessed = set()
+            templates = set()
+            kwargs = {}
+            if render_cache:
+                kwargs = {'_accessed_context': accessed,
+                          '_accessed_templates': templates}
+            try:
+                state = compile_template(fn_,
+                                         self.state.rend,
+                                         self.state.opts['renderer'],
+                                         self.state.opts['renderer_blacklist'],
+                                         self.state.opts['renderer_whitelist'],
+                                         saltenv,
+                                         sls,
+                                         rendered_sls=mods,
+                                         **kwargs
+                                         )
+            except SaltRenderError as exc:
+                msg = 'Rendering SLS \'{0}:{1}\' failed: {2}'.format(
+                    saltenv, sls, exc
+                )
+                log.critical(msg)
+                errors.append(msg)
+            except Exception as exc:
+                msg = 'Rendering SLS {0} failed, render error: {1}'.format(
+                    sls, exc
+                )
+                log.critical(
+                    msg,
+                    # Show the traceback if the debug logging level is enabled
+                    exc_info_on_loglevel=logging.DEBUG
+                )
+                errors.append('{0}\n{1}'.format(msg, traceback.format_exc()))
+            else:
+                if render_cache:
+                    self._cache_render(
+                        fn_, saltenv, sls, state, accessed, templates)
         try:
             mods.add('{0}:{1}'.format(saltenv, sls))
         except AttributeError:
@@ -3640,6 +4216,8 @@ class BaseHighState(object):
                         state[name][s_dec].append(
                                 {'order': self.iorder}
                                 )
+                        if self.opts.get('state_concurrency', 0) > 1:
+                            self.state.auto_ordered.add((name, s_dec))
                         self.iorder += 1
         return state
 
@@ -3790,6 +4368,7 @@ class BaseHighState(object):
                     all_errors.extend(errors)
 
         self.clean_duplicate_extends(highstate)
+        self._save_render_cache()
         return highstate, all_errors
 
     def clean_duplicate_extends(self, highstate):
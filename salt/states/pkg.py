@@ -91,6 +91,7 @@ from salt.exceptions import (
     CommandExecutionError, MinionError, SaltInvocationError
 )
 from salt.modules.pkg_resource import _repack_pkgs
+from salt.state import STATE_INTERNAL_KEYWORDS as _STATE_INTERNAL_KEYWORDS
 
 # Import 3rd-party libs
 from salt.ext import six
@@ -3140,10 +3141,133 @@ def mod_init(low):
     return False
 
 
+# Keywords which do not change how the packages of a chunk are installed or
+# removed, chunks differing only in them can share a transaction
+_AGGREGATE_IGNORED_KEYWORDS = frozenset([
+    'name',
+    'names',
+    'pkgs',
+    'sources',
+    'version',
+    'aggregate',
+])
+
+# A chunk carrying one of these keywords is only run depending on the outcome
+# of other chunks, it can not be moved into the transaction of another chunk
+_AGGREGATE_BLOCKING_KEYWORDS = frozenset([
+    'onlyif',
+    'unless',
+    'onchanges',
+    'onchanges_any',
+    'onfail',
+    'onfail_any',
+    'prereq',
+    'prerequired',
+    'watch',
+    'watch_any',
+    'listen',
+    '__prereq__',
+])
+
+
+def _aggregate_options(chunk):
+    '''
+    Return the options of a pkg chunk which have to match for it to be
+    aggregated into another chunk
+    '''
+    return dict(
+        (key, val) for key, val in six.iteritems(chunk)
+        if key not in _AGGREGATE_IGNORED_KEYWORDS
+        and key not in _STATE_INTERNAL_KEYWORDS
+        and not key.startswith('__')
+    )
+
+
+def _aggregate_requisite_chunks(req, chunks):
+    '''
+    Return the chunks matched by the require requisite req, or None when it
+    can not be resolved
+    '''
+    if not isinstance(req, dict) or len(req) != 1:
+        return None
+    req_key, req_val = next(six.iteritems(req))
+    if not isinstance(req_val, six.string_types):
+        return None
+    matched = []
+    for chunk in chunks:
+        if req_key == 'sls':
+            found = fnmatch.fnmatch(chunk.get('__sls__', ''), req_val)
+        elif req_key == 'id':
+            found = fnmatch.fnmatch(chunk.get('__id__', ''), req_val)
+        else:
+            found = chunk.get('state') == req_key and (
+                fnmatch.fnmatch(chunk.get('name', ''), req_val)
+                or fnmatch.fnmatch(chunk.get('__id__', ''), req_val))
+        if found:
+            matched.append(chunk)
+    return matched or None
+
+
+def _aggregate_candidates(low, candidates, chunks, running):
+    '''
+    Return the tags of the candidate chunks which can be aggregated into low.
+
+    A chunk can only be installed together with low when everything it
+    requires either already ran successfully or is installed in the same
+    transaction.
+    '''
+    gen_tag = __utils__['state.gen_tag']
+    low_tag = gen_tag(low)
+    required = {}
+    for tag, chunk in six.iteritems(candidates):
+        if tag == low_tag:
+            continue
+        if any(key in chunk for key in _AGGREGATE_BLOCKING_KEYWORDS):
+            required[tag] = None
+            continue
+        tags = set()
+        for req_key in ('require', 'require_any'):
+            for req in chunk.get(req_key) or []:
+                matched = _aggregate_requisite_chunks(req, chunks)
+                if matched is None:
+                    tags = None
+                    break
+                tags.update(gen_tag(item) for item in matched)
+            if tags is None:
+                break
+        required[tag] = tags
+
+    folded = set(candidates)
+    changed = True
+    while changed:
+        changed = False
+        for tag in list(folded):
+            if tag == low_tag:
+                continue
+            tags = required[tag]
+            if tags is not None:
+                tags = [
+                    req_tag for req_tag in tags
+                    if req_tag not in folded
+                    and not (req_tag in running
+                             and running[req_tag].get('result') is not False)
+                ]
+            if tags is None or tags:
+                folded.discard(tag)
+                changed = True
+    return folded
+
+
 def mod_aggregate(low, chunks, running):
     '''
     The mod_aggregate function which looks up all packages in the available
     low chunks and merges them into a single pkgs ref in the present low data
+
+    Only the chunks which are run with the same options as the present low
+    data and whose requisites allow them to be run right now are merged. When
+    the present low data installs packages, the packages of the ``pkg.latest``
+    chunks are merged too, so that they are installed or upgraded in the same
+    transaction.
     '''
     pkgs = []
     pkg_type = None
@@ -3155,6 +3279,11 @@ def mod_aggregate(low, chunks, running):
     ]
     if low.get('fun') not in agg_enabled:
         return low
+    agg_funs = [low['fun']]
+    if low['fun'] == 'installed' and 'sources' not in low:
+        agg_funs.append('latest')
+    low_options = _aggregate_options(low)
+    candidates = _OrderedDict()
     for chunk in chunks:
         tag = __utils__['state.gen_tag'](chunk)
         if tag in running:
@@ -3163,35 +3292,49 @@ def mod_aggregate(low, chunks, running):
         if chunk.get('state') == 'pkg':
             if '__agg__' in chunk:
                 continue
-            # Check for the same function
-            if chunk.get('fun') != low.get('fun'):
+            # Check for a function installing the packages in the same way
+            if chunk.get('fun') not in agg_funs:
                 continue
-            # Check for the same repo
-            if chunk.get('fromrepo') != low.get('fromrepo'):
+            # Check for the same repo and options
+            if _aggregate_options(chunk) != low_options:
                 continue
-            # Check first if 'sources' was passed so we don't aggregate pkgs
-            # and sources together.
-            if 'sources' in chunk:
-                if pkg_type is None:
-                    pkg_type = 'sources'
-                if pkg_type == 'sources':
-                    pkgs.extend(chunk['sources'])
-                    chunk['__agg__'] = True
-            else:
-                if pkg_type is None:
-                    pkg_type = 'pkgs'
-                if pkg_type == 'pkgs':
-                    # Pull out the pkg names!
-                    if 'pkgs' in chunk:
+            candidates[tag] = chunk
+    folded = _aggregate_candidates(low, candidates, chunks, running)
+    for tag, chunk in six.iteritems(candidates):
+        if tag not in folded:
+            continue
+        as_latest = chunk['fun'] == 'latest' and low['fun'] != 'latest'
+        # Check first if 'sources' was passed so we don't aggregate pkgs
+        # and sources together.
+        if 'sources' in chunk:
+            if pkg_type is None:
+                pkg_type = 'sources'
+            if pkg_type == 'sources':
+                pkgs.extend(chunk['sources'])
+                chunk['__agg__'] = True
+        else:
+            if pkg_type is None:
+                pkg_type = 'pkgs'
+            if pkg_type == 'pkgs':
+                # Pull out the pkg names!
+                if 'pkgs' in chunk:
+                    if as_latest:
+                        pkgs.extend(
+                            {pkg_name: 'latest'}
+                            for pkg_name in _repack_pkgs(chunk['pkgs'])
+                        )
+                    else:
                         pkgs.extend(chunk['pkgs'])
-                        chunk['__agg__'] = True
-                    elif 'name' in chunk:
-                        version = chunk.pop('version', None)
-                        if version is not None:
-                            pkgs.append({chunk['name']: version})
-                        else:
-                            pkgs.append(chunk['name'])
-                        chunk['__agg__'] = True
+                    chunk['__agg__'] = True
+                elif 'name' in chunk:
+                    version = chunk.pop('version', None)
+                    if as_latest:
+                        pkgs.append({chunk['name']: 'latest'})
+                    elif version is not None:
+                        pkgs.append({chunk['name']: version})
+                    else:
+                        pkgs.append(chunk['name'])
+                    chunk['__agg__'] = True
     if pkg_type is not None and pkgs:
         if pkg_type in low:
             low[pkg_type].extend(pkgs)
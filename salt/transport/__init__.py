@@ -4,6 +4,7 @@ Encapsulate the different transports available to Salt.
 '''
 from __future__ import absolute_import, print_function, unicode_literals
 import logging
+import re
 
 # Import third party libs
 from salt.ext import six
@@ -29,6 +30,72 @@ def iter_transport_opts(opts):
         yield opts['transport'], opts
 
 
+DEFAULT_WORKER_POOL = 'default'
+
+
+def iter_worker_pools(opts):
+    '''
+    Yield name, worker_threads, commands for all the master worker pools
+
+    The default pool always comes first and serves every command which is not
+    listed in the commands of another pool. Without worker_pools configured,
+    it is the only pool and runs worker_threads workers.
+    '''
+    pools = opts.get('worker_pools') or {}
+    default = pools.get(DEFAULT_WORKER_POOL) or {}
+    yield (DEFAULT_WORKER_POOL,
+           int(default.get('worker_threads', opts['worker_threads'])),
+           [])
+
+    for name in sorted(pools):
+        if name == DEFAULT_WORKER_POOL:
+            continue
+        if not re.match(r'^[\w-]+$', name):
+            log.error(
+                'Invalid worker pool name \'%s\', its commands are served by '
+                'the default worker pool', name
+            )
+            continue
+        pool_opts = pools[name] or {}
+        yield (name,
+               int(pool_opts.get('worker_threads', 1)),
+               list(pool_opts.get('commands', [])))
+
+
+def worker_pool_routes(opts):
+    '''
+    Return a dict mapping the commands to the name of the worker pool serving
+    them. Commands missing from it are served by the default pool.
+    '''
+    routes = {}
+    for name, _, commands in iter_worker_pools(opts):
+        for cmd in commands:
+            routes.setdefault(cmd, name)
+    return routes
+
+
+TOPIC_TARGET_TYPES = ('list', 'glob', 'pcre')
+
+
+def publish_topics(opts, ckminions, load):
+    '''
+    Return the list of minion ids a publish of load has to be sent to, or None
+    when its target can not be resolved on the master and the publish has to
+    be broadcast to every minion.
+    '''
+    tgt_type = load.get('tgt_type', 'glob')
+    if tgt_type not in TOPIC_TARGET_TYPES:
+        return None
+    if opts.get('order_masters'):
+        # Syndics relay the publishes to minions this master does not know
+        return None
+    if tgt_type == 'list' and not isinstance(load['tgt'], six.string_types):
+        return list(load['tgt'])
+    _res = ckminions.check_minions(load['tgt'], tgt_type=tgt_type)
+    log.debug('Publish Side Match: %s', _res['minions'])
+    return _res['minions']
+
+
 # for backwards compatibility
 class Channel(object):
     @staticmethod
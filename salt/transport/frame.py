@@ -4,9 +4,15 @@ Helper functions for transport components to handle message framing
 '''
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import struct
 import msgpack
 from salt.ext import six
 
+# The most bytes the transports read from a stream at once to feed their
+# unpackers. It matches the read chunk size of the tornado streams, so that
+# everything read from the socket at once is fed to the unpacker at once.
+READ_SIZE = 65536
+
 
 def frame_msg(body, header=None, raw_body=False):  # pylint: disable=unused-argument
     '''
@@ -40,6 +46,56 @@ def frame_msg_ipc(body, header=None, raw_body=False):  # pylint: disable=unused-
         return msgpack.dumps(framed_msg, use_bin_type=True)
 
 
+def _bytes_header(length, use_bin_type=False):
+    '''
+    Return the msgpack header of a bytes object of the given length, as packed
+    by msgpack.dumps with the given use_bin_type
+    '''
+    if use_bin_type:
+        if length < 0x100:
+            return struct.pack(str('>BB'), 0xc4, length)
+        elif length < 0x10000:
+            return struct.pack(str('>BH'), 0xc5, length)
+        return struct.pack(str('>BI'), 0xc6, length)
+    if length < 0x20:
+        return struct.pack(str('>B'), 0xa0 | length)
+    elif length < 0x10000:
+        return struct.pack(str('>BH'), 0xda, length)
+    return struct.pack(str('>BI'), 0xdb, length)
+
+
+def frame_msg_parts(body, header=None, use_bin_type=False):
+    '''
+    Frame the given message with our wire protocol, but return the framing
+    and the body as two buffers to be written one after the other.
+
+    A bytes body, like an already serialized payload, is returned as is
+    instead of being copied into the frame. Other bodies are packed on their
+    own.
+    '''
+    if header is None:
+        header = {}
+
+    packer = msgpack.Packer(use_bin_type=use_bin_type)
+    head = [packer.pack_map_header(2),
+            packer.pack('head'),
+            packer.pack(header),
+            packer.pack('body')]
+    if isinstance(body, bytes):
+        head.append(_bytes_header(len(body), use_bin_type))
+    else:
+        body = packer.pack(body)
+    return b''.join(head), body
+
+
+def frame_msg_ipc_parts(body, header=None):
+    '''
+    Frame the given message with our wire protocol for IPC, returning the
+    framing and the body as two buffers, see frame_msg_parts
+    '''
+    return frame_msg_parts(body, header=header, use_bin_type=six.PY3)
+
+
 def _decode_embedded_list(src):
     '''
     Convert enbedded bytes to strings if possible.
@@ -155,12 +155,12 @@ class IPCServer(object):
             if header.get('mid'):
                 @tornado.gen.coroutine
                 def return_message(msg):
-                    pack = salt.transport.frame.frame_msg_ipc(
+                    head, body = salt.transport.frame.frame_msg_ipc_parts(
                         msg,
                         header={'mid': header['mid']},
-                        raw_body=True,
                     )
-                    yield stream.write(pack)
+                    stream.write(head)
+                    yield stream.write(body)
                 return return_message
             else:
                 return _null
@@ -171,7 +171,7 @@ class IPCServer(object):
         unpacker = msgpack.Unpacker(encoding=encoding)
         while not stream.closed():
             try:
-                wire_bytes = yield stream.read_bytes(4096, partial=True)
+                wire_bytes = yield stream.read_bytes(salt.transport.frame.READ_SIZE, partial=True)
                 unpacker.feed(wire_bytes)
                 for framed_msg in unpacker:
                     body = framed_msg['body']
@@ -422,8 +422,9 @@ class IPCMessageClient(IPCClient):
         '''
         if not self.connected():
             yield self.connect()
-        pack = salt.transport.frame.frame_msg_ipc(msg, raw_body=True)
-        yield self.stream.write(pack)
+        head, body = salt.transport.frame.frame_msg_ipc_parts(msg)
+        self.stream.write(head)
+        yield self.stream.write(body)
 
 
 class IPCMessageServer(IPCServer):
@@ -518,9 +519,10 @@ class IPCMessagePublisher(object):
         self._started = True
 
     @tornado.gen.coroutine
-    def _write(self, stream, pack):
+    def _write(self, stream, head, body):
         try:
-            yield stream.write(pack)
+            stream.write(head)
+            yield stream.write(body)
         except tornado.iostream.StreamClosedError:
             log.trace('Client disconnected from IPC %s', self.socket_path)
             self.streams.discard(stream)
@@ -537,10 +539,12 @@ class IPCMessagePublisher(object):
         if not len(self.streams):
             return
 
-        pack = salt.transport.frame.frame_msg_ipc(msg, raw_body=True)
+        # The message is packed once, each stream gets the framing and a
+        # view of the body
+        head, body = salt.transport.frame.frame_msg_ipc_parts(msg)
 
         for stream in self.streams:
-            self.io_loop.spawn_callback(self._write, stream, pack)
+            self.io_loop.spawn_callback(self._write, stream, head, body)
 
     def handle_connection(self, connection, address):
         log.trace('IPCServer: Handling connection to address: %s', address)
@@ -636,7 +640,7 @@ class IPCMessageSubscriber(IPCClient):
         try:
             while True:
                 if self._read_stream_future is None:
-                    self._read_stream_future = self.stream.read_bytes(4096, partial=True)
+                    self._read_stream_future = self.stream.read_bytes(salt.transport.frame.READ_SIZE, partial=True)
 
                 if timeout is None:
                     wire_bytes = yield self._read_stream_future
@@ -712,7 +716,7 @@ class IPCMessageSubscriber(IPCClient):
     def _read_async(self, callback):
         while not self.stream.closed():
             try:
-                self._read_stream_future = self.stream.read_bytes(4096, partial=True)
+                self._read_stream_future = self.stream.read_bytes(salt.transport.frame.READ_SIZE, partial=True)
                 wire_bytes = yield self._read_stream_future
                 self._read_stream_future = None
                 self.unpacker.feed(wire_bytes)
@@ -51,11 +51,12 @@ class ReqServerChannel(object):
         '''
         pass
 
-    def post_fork(self, payload_handler, io_loop):
+    def post_fork(self, payload_handler, io_loop, worker_pool=None):
         '''
         Do anything you need post-fork. This should handle all incoming payloads
         and call payload_handler. You will also be passed io_loop, for all of your
-        async needs
+        async needs, and the name of the worker pool of the worker when
+        worker_pools are configured
         '''
         pass
 
@@ -33,7 +33,7 @@ import salt.transport.server
 import salt.transport.mixins.auth
 from salt.ext import six
 from salt.exceptions import SaltReqTimeoutError, SaltClientError
-from salt.transport import iter_transport_opts
+from salt.transport import iter_transport_opts, publish_topics
 
 # Import Tornado Libs
 import tornado
@@ -587,12 +587,14 @@ class TCPReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin, salt.tra
             self._socket.setblocking(0)
             self._socket.bind((self.opts['interface'], int(self.opts['ret_port'])))
 
-    def post_fork(self, payload_handler, io_loop):
+    def post_fork(self, payload_handler, io_loop, worker_pool=None):
         '''
         After forking we need to create all of the local sockets to listen to the
         router
 
         payload_handler: function to call with your payloads
+        worker_pool: the worker pool of the worker, requests are not routed to
+                     worker pools by the TCP transport
         '''
         self.payload_handler = payload_handler
         self.io_loop = io_loop
@@ -666,7 +668,11 @@ class TCPReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin, salt.tra
             if req_fun == 'send_clear':
                 stream.write(salt.transport.frame.frame_msg(ret, header=header))
             elif req_fun == 'send':
-                stream.write(salt.transport.frame.frame_msg(self.crypticle.dumps(ret), header=header))
+                # Write the crypted return after its framing instead of
+                # copying it into a new frame
+                head, body = salt.transport.frame.frame_msg_parts(self.crypticle.dumps(ret), header=header)
+                stream.write(head)
+                stream.write(body)
             elif req_fun == 'send_private':
                 stream.write(salt.transport.frame.frame_msg(self._encrypt_private(ret,
                                                              req_opts['key'],
@@ -712,7 +718,7 @@ class SaltMessageServer(tornado.tcpserver.TCPServer, object):
         unpacker = msgpack.Unpacker()
         try:
             while True:
-                wire_bytes = yield stream.read_bytes(4096, partial=True)
+                wire_bytes = yield stream.read_bytes(salt.transport.frame.READ_SIZE, partial=True)
                 unpacker.feed(wire_bytes)
                 for framed_msg in unpacker:
                     if six.PY3:
@@ -976,7 +982,7 @@ class SaltMessageClient(object):
             unpacker = msgpack.Unpacker()
             while not self._closing:
                 try:
-                    self._read_until_future = self._stream.read_bytes(4096, partial=True)
+                    self._read_until_future = self._stream.read_bytes(salt.transport.frame.READ_SIZE, partial=True)
                     wire_bytes = yield self._read_until_future
                     unpacker.feed(wire_bytes)
                     for framed_msg in unpacker:
@@ -1251,7 +1257,7 @@ class PubServer(tornado.tcpserver.TCPServer, object):
         unpacker = msgpack.Unpacker()
         while not self._closing:
             try:
-                client._read_until_future = client.stream.read_bytes(4096, partial=True)
+                client._read_until_future = client.stream.read_bytes(salt.transport.frame.READ_SIZE, partial=True)
                 wire_bytes = yield client._read_until_future
                 unpacker.feed(wire_bytes)
                 for framed_msg in unpacker:
@@ -1291,7 +1297,7 @@ class PubServer(tornado.tcpserver.TCPServer, object):
     @tornado.gen.coroutine
     def publish_payload(self, package, _):
         log.debug('TCP PubServer sending payload: %s', package)
-        payload = salt.transport.frame.frame_msg(package['payload'])
+        head, payload = salt.transport.frame.frame_msg_parts(package['payload'])
 
         to_remove = []
         if 'topic_lst' in package:
@@ -1306,6 +1312,7 @@ class PubServer(tornado.tcpserver.TCPServer, object):
                     for client in self.present[topic]:
                         try:
                             # Write the packed str
+                            client.stream.write(head)
                             f = client.stream.write(payload)
                             self.io_loop.add_future(f, lambda f: True)
                         except tornado.iostream.StreamClosedError:
@@ -1316,6 +1323,7 @@ class PubServer(tornado.tcpserver.TCPServer, object):
             for client in self.clients:
                 try:
                     # Write the packed str
+                    client.stream.write(head)
                     f = client.stream.write(payload)
                     self.io_loop.add_future(f, lambda f: True)
                 except tornado.iostream.StreamClosedError:
@@ -1439,8 +1447,13 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
 
         int_payload = {'payload': self.serial.dumps(payload)}
 
+        # Only send the publish to the connections of the targeted minions
+        if self.opts['publish_topic_targeting']:
+            topic_lst = publish_topics(self.opts, self.ckminions, load)
+            if topic_lst is not None:
+                int_payload['topic_lst'] = topic_lst
         # add some targeting stuff for lists only (for now)
-        if load['tgt_type'] == 'list':
+        elif load['tgt_type'] == 'list':
             if isinstance(load['tgt'], six.string_types):
                 # Fetch a list of minions that match
                 _res = self.ckminions.check_minions(load['tgt'],
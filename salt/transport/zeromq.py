@@ -10,6 +10,7 @@ import sys
 import copy
 import errno
 import signal
+import time
 import hashlib
 import logging
 import weakref
@@ -25,6 +26,7 @@ import salt.utils.stringutils
 import salt.utils.verify
 import salt.utils.zeromq
 import salt.payload
+import salt.transport
 import salt.transport.client
 import salt.transport.server
 import salt.transport.mixins.auth
@@ -61,6 +63,19 @@ except ImportError:
 log = logging.getLogger(__name__)
 
 
+BROADCAST_TOPIC = b'broadcast'
+
+
+def publish_topic(minion_id):
+    '''
+    Return the topic of the publishes targeting minion_id. zmq filters are
+    prefix matches, hash the id to avoid collisions.
+    '''
+    return salt.utils.stringutils.to_bytes(
+        hashlib.sha1(salt.utils.stringutils.to_bytes(minion_id)).hexdigest()
+    )
+
+
 def _get_master_uri(master_ip,
                     master_port,
                     source_ip=None,
@@ -214,11 +229,16 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
                                    source_port=self.opts.get('source_ret_port'))
         return self.opts['master_uri']
 
-    def _package_load(self, load):
-        return {
+    def _package_load(self, load, cmd=None):
+        ret = {
             'enc': self.crypt,
             'load': load,
         }
+        if cmd is not None:
+            # Let the master route the request to a worker pool without
+            # decrypting it
+            ret['cmd'] = cmd
+        return ret
 
     @tornado.gen.coroutine
     def crypted_transfer_decode_dictentry(self, load, dictkey=None, tries=3, timeout=60):
@@ -227,7 +247,7 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
             yield self.auth.authenticate()
         # Return control to the caller. When send() completes, resume by populating ret with the Future.result
         ret = yield self.message_client.send(
-            self._package_load(self.auth.crypticle.dumps(load)),
+            self._package_load(self.auth.crypticle.dumps(load), load.get('cmd')),
             timeout=timeout,
             tries=tries,
         )
@@ -236,7 +256,7 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
             # Reauth in the case our key is deleted on the master side.
             yield self.auth.authenticate()
             ret = yield self.message_client.send(
-                self._package_load(self.auth.crypticle.dumps(load)),
+                self._package_load(self.auth.crypticle.dumps(load), load.get('cmd')),
                 timeout=timeout,
                 tries=tries,
             )
@@ -271,7 +291,7 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
         def _do_transfer():
             # Yield control to the caller. When send() completes, resume by populating data with the Future.result
             data = yield self.message_client.send(
-                self._package_load(self.auth.crypticle.dumps(load)),
+                self._package_load(self.auth.crypticle.dumps(load), load.get('cmd')),
                 timeout=timeout,
                 tries=tries,
             )
@@ -341,15 +361,14 @@ class AsyncZeroMQPubChannel(salt.transport.mixins.auth.AESPubClientMixin, salt.t
             install_zmq()
             self.io_loop = ZMQDefaultLoop.current()
 
-        self.hexid = hashlib.sha1(salt.utils.stringutils.to_bytes(self.opts['id'])).hexdigest()
+        self.hexid = publish_topic(self.opts['id'])
         self.auth = salt.crypt.AsyncAuth(self.opts, io_loop=self.io_loop)
         self.serial = salt.payload.Serial(self.opts)
         self.context = zmq.Context()
         self._socket = self.context.socket(zmq.SUB)
 
         if self.opts['zmq_filtering']:
-            # TODO: constants file for "broadcast"
-            self._socket.setsockopt(zmq.SUBSCRIBE, b'broadcast')
+            self._socket.setsockopt(zmq.SUBSCRIBE, BROADCAST_TOPIC)
             self._socket.setsockopt(zmq.SUBSCRIBE, self.hexid)
         else:
             self._socket.setsockopt(zmq.SUBSCRIBE, b'')
@@ -456,7 +475,7 @@ class AsyncZeroMQPubChannel(salt.transport.mixins.auth.AESPubClientMixin, salt.t
             payload = self.serial.loads(messages[0])
         # 2 includes a header which says who should do it
         elif messages_len == 2:
-            if messages[0] not in ('broadcast', self.hexid):
+            if messages[0] not in (BROADCAST_TOPIC, self.hexid):
                 log.debug('Publish received for not this minion: %s', messages[0])
                 raise tornado.gen.Return(None)
             payload = self.serial.loads(messages[1])
@@ -516,16 +535,14 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
             self.clients.setsockopt(zmq.IPV4ONLY, 0)
         self.clients.setsockopt(zmq.BACKLOG, self.opts.get('zmq_backlog', 1000))
         self._start_zmq_monitor()
-        self.workers = self.context.socket(zmq.DEALER)
+        if self.opts.get('worker_pools'):
+            log.info('Setting up the master communication server')
+            self.clients.bind(self.uri)
+            self._route_requests()
+            return
 
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            self.w_uri = 'tcp://127.0.0.1:{0}'.format(
-                self.opts.get('tcp_master_workers', 4515)
-                )
-        else:
-            self.w_uri = 'ipc://{0}'.format(
-                os.path.join(self.opts['sock_dir'], 'workers.ipc')
-                )
+        self.workers = self.context.socket(zmq.DEALER)
+        self.w_uri = self._worker_uri()
 
         log.info('Setting up the master communication server')
         self.clients.bind(self.uri)
@@ -543,6 +560,86 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
             except (KeyboardInterrupt, SystemExit):
                 break
 
+    def _worker_uri(self, pool=None):
+        '''
+        Return the uri the workers of the given pool connect to
+        '''
+        if pool in (None, salt.transport.DEFAULT_WORKER_POOL):
+            index = 0
+            ipc_name = 'workers.ipc'
+        else:
+            pools = [name for name, _, _ in salt.transport.iter_worker_pools(self.opts)]
+            index = pools.index(pool)
+            ipc_name = 'workers-{0}.ipc'.format(pool)
+        if self.opts.get('ipc_mode', '') == 'tcp':
+            return 'tcp://127.0.0.1:{0}'.format(
+                self.opts.get('tcp_master_workers', 4515) + index
+                )
+        return 'ipc://{0}'.format(
+            os.path.join(self.opts['sock_dir'], ipc_name)
+            )
+
+    def _request_cmd(self, frame):
+        '''
+        Return the command of a serialized request without decrypting it
+        '''
+        try:
+            payload = self._router_serial.loads(frame)
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if not isinstance(payload, dict):
+            return None
+        if payload.get('enc') == 'clear':
+            load = payload.get('load')
+            return load.get('cmd') if isinstance(load, dict) else None
+        # Minions add the command of encrypted requests to the payload
+        return payload.get('cmd')
+
+    def _route_requests(self):
+        '''
+        Route the requests to the worker pools by command. The routing
+        information appended to each request lets the workers report the
+        queue depth and latency of their pool.
+        '''
+        self._router_serial = salt.payload.Serial(self.opts)
+        routes = salt.transport.worker_pool_routes(self.opts)
+        poller = zmq.Poller()
+        poller.register(self.clients, zmq.POLLIN)
+        self.pool_workers = {}
+        pending = {}
+        for pool, _, _ in salt.transport.iter_worker_pools(self.opts):
+            workers = self.context.socket(zmq.DEALER)
+            workers.bind(self._worker_uri(pool))
+            poller.register(workers, zmq.POLLIN)
+            self.pool_workers[pool] = workers
+            pending[pool] = 0
+
+        while True:
+            if self.clients.closed:
+                break
+            try:
+                events = dict(poller.poll())
+            except zmq.ZMQError as exc:
+                if exc.errno == errno.EINTR:
+                    continue
+                raise exc
+            except (KeyboardInterrupt, SystemExit):
+                break
+            for pool, workers in six.iteritems(self.pool_workers):
+                if workers in events:
+                    self.clients.send_multipart(workers.recv_multipart())
+                    pending[pool] = max(0, pending[pool] - 1)
+            if self.clients in events:
+                frames = self.clients.recv_multipart()
+                pool = routes.get(self._request_cmd(frames[-1]),
+                                  salt.transport.DEFAULT_WORKER_POOL)
+                pending[pool] += 1
+                frames.append(self._router_serial.dumps({
+                    'pool': pool,
+                    'depth': pending[pool],
+                    'time': time.time()}))
+                self.pool_workers[pool].send_multipart(frames)
+
     def close(self):
         '''
         Cleanly shutdown the router socket
@@ -562,6 +659,9 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
             self.clients.close()
         if hasattr(self, 'workers') and self.workers.closed is False:
             self.workers.close()
+        for workers in six.itervalues(getattr(self, 'pool_workers', {})):
+            if workers.closed is False:
+                workers.close()
         if hasattr(self, 'stream'):
             self.stream.close()
         if hasattr(self, '_socket') and self._socket.closed is False:
@@ -594,7 +694,7 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
             threading.Thread(target=self._w_monitor.start_poll).start()
             log.debug('ZMQ monitor has been started started')
 
-    def post_fork(self, payload_handler, io_loop):
+    def post_fork(self, payload_handler, io_loop, worker_pool=None):
         '''
         After forking we need to create all of the local sockets to listen to the
         router
@@ -602,6 +702,7 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
         :param func payload_handler: A function to called to handle incoming payloads as
                                      they are picked up off the wire
         :param IOLoop io_loop: An instance of a Tornado IOLoop, to handle event scheduling
+        :param str worker_pool: The name of the worker pool the worker belongs to
         '''
         self.payload_handler = payload_handler
         self.io_loop = io_loop
@@ -610,14 +711,7 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
         self._socket = self.context.socket(zmq.REP)
         self._start_zmq_monitor()
 
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            self.w_uri = 'tcp://127.0.0.1:{0}'.format(
-                self.opts.get('tcp_master_workers', 4515)
-                )
-        else:
-            self.w_uri = 'ipc://{0}'.format(
-                os.path.join(self.opts['sock_dir'], 'workers.ipc')
-                )
+        self.w_uri = self._worker_uri(worker_pool)
         log.info('Worker binding to socket %s', self.w_uri)
         self._socket.connect(self.w_uri)
 
@@ -637,6 +731,8 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
         :param dict payload: A payload to process
         '''
         try:
+            # The worker pool router appends its routing information
+            route = self.serial.loads(payload[1]) if len(payload) > 1 else None
             payload = self.serial.loads(payload[0])
             payload = self._decode_payload(payload)
         except Exception as exc:
@@ -659,6 +755,11 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
             stream.send(self.serial.dumps('payload and load must be a dict'))
             raise tornado.gen.Return()
 
+        if route is not None:
+            payload['route'] = route
+        else:
+            payload.pop('route', None)
+
         try:
             id_ = payload['load'].get('id', '')
             if '\0' in id_:
@@ -829,17 +930,13 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
                         if 'topic_lst' in unpacked_package:
                             for topic in unpacked_package['topic_lst']:
                                 log.trace('Sending filtered data over publisher %s', pub_uri)
-                                # zmq filters are substring match, hash the topic
-                                # to avoid collisions
-                                htopic = hashlib.sha1(topic).hexdigest()
-                                pub_sock.send(htopic, flags=zmq.SNDMORE)
+                                pub_sock.send(publish_topic(topic), flags=zmq.SNDMORE)
                                 pub_sock.send(payload)
                                 log.trace('Filtered data has been sent')
                                 # otherwise its a broadcast
                         else:
-                            # TODO: constants file for "broadcast"
                             log.trace('Sending broadcasted data over publisher %s', pub_uri)
-                            pub_sock.send('broadcast', flags=zmq.SNDMORE)
+                            pub_sock.send(BROADCAST_TOPIC, flags=zmq.SNDMORE)
                             pub_sock.send(payload)
                             log.trace('Broadcasted data has been sent')
                     else:
@@ -900,21 +997,11 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         pub_sock.connect(pull_uri)
         int_payload = {'payload': self.serial.dumps(payload)}
 
-        # add some targeting stuff for lists only (for now)
-        if load['tgt_type'] == 'list':
-            int_payload['topic_lst'] = load['tgt']
-
         # If zmq_filtering is enabled, target matching has to happen master side
-        match_targets = ["pcre", "glob", "list"]
-        if self.opts['zmq_filtering'] and load['tgt_type'] in match_targets:
-            # Fetch a list of minions that match
-            _res = self.ckminions.check_minions(load['tgt'],
-                                                tgt_type=load['tgt_type'])
-            match_ids = _res['minions']
-
-            log.debug("Publish Side Match: %s", match_ids)
-            # Send list of miions thru so zmq can target them
-            int_payload['topic_lst'] = match_ids
+        if self.opts['zmq_filtering']:
+            topic_lst = salt.transport.publish_topics(self.opts, self.ckminions, load)
+            if topic_lst is not None:
+                int_payload['topic_lst'] = topic_lst
 
         pub_sock.send(self.serial.dumps(int_payload))
         pub_sock.close()
@@ -4,6 +4,7 @@ In-memory caching used by Salt
 '''
 # Import Python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import collections
 import os
 import re
 import time
@@ -24,6 +25,11 @@ import salt.utils.files
 # Import third party libs
 from salt.ext.six.moves import range  # pylint: disable=import-error,redefined-builtin
 from salt.utils.zeromq import zmq
+try:
+    import pyinotify
+    HAS_PYINOTIFY = True
+except ImportError:
+    HAS_PYINOTIFY = False
 
 log = logging.getLogger(__name__)
 
@@ -269,6 +275,48 @@ class CacheRegex(object):
         return regex
 
 
+class LRUCache(object):
+    '''
+    Keep the most recently used items up to a maximum number of items
+    '''
+    def __init__(self, size=1000):
+        self.size = size
+        self.cache = collections.OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def __len__(self):
+        return len(self.cache)
+
+    def clear(self):
+        '''
+        Clear the cache
+        '''
+        self.cache.clear()
+
+    def get(self, key, default=None):
+        '''
+        Get an item and mark it as the most recently used one
+        '''
+        try:
+            value = self.cache.pop(key)
+        except KeyError:
+            return default
+        self.cache[key] = value
+        return value
+
+    def put(self, key, value):
+        '''
+        Store an item, evicting the least recently used items when the cache
+        is full
+        '''
+        self.cache.pop(key, None)
+        self.cache[key] = value
+        while len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+
+
 class ContextCache(object):
     def __init__(self, opts, name):
         '''
@@ -317,6 +365,120 @@ def context_cache(func):
     return context_cache_wrap
 
 
+class ListdirCache(object):
+    '''
+    Per-process cache of the sorted list of regular files in a directory, such
+    as the accepted minion keys in the PKI dir.
+
+    The listing is only read again when the directory changed, which is
+    detected by polling the mtime of the directory or, if ``use_inotify`` is
+    set and pyinotify is available, by inotify events. Since the mtime of a
+    directory may have a one second granularity (e.g. on network storage) the
+    listing is not trusted while the mtime is less than ``mtime_grace``
+    seconds old.
+    '''
+    # {(<path>, <use_inotify>): ListdirCache}
+    instances = {}
+    mtime_grace = 2
+
+    def __init__(self, path, use_inotify=False):
+        self.path = path
+        self.files = None
+        self.mtime = None
+        self.dirty = True
+        self.pid = os.getpid()
+        self.notifier = None
+        if use_inotify:
+            if HAS_PYINOTIFY:
+                self._watch()
+            else:
+                log.warning(
+                    'pyinotify is not available, falling back to polling the '
+                    'mtime of %s', path
+                )
+
+    @classmethod
+    def get(cls, path, use_inotify=False):
+        '''
+        Return the listing cache of this process for ``path``
+        '''
+        key = (path, use_inotify)
+        cached = cls.instances.get(key)
+        if cached is None or cached.pid != os.getpid():
+            # A forked process must not share the inotify fd of its parent
+            cached = cls.instances[key] = cls(path, use_inotify)
+        return cached
+
+    def _watch(self):
+        '''
+        Watch the directory for entries being added or removed
+        '''
+        def _set_dirty(event):
+            self.dirty = True
+            if event.mask & (pyinotify.IN_IGNORED | pyinotify.IN_DELETE_SELF):
+                # The directory itself is gone, go back to mtime polling
+                log.debug('Lost the inotify watch on %s', self.path)
+                self._unwatch()
+
+        try:
+            wm_ = pyinotify.WatchManager()
+            self.notifier = pyinotify.Notifier(wm_, default_proc_fun=_set_dirty)
+            mask = (pyinotify.IN_CREATE | pyinotify.IN_DELETE |
+                    pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO |
+                    pyinotify.IN_DELETE_SELF | pyinotify.IN_Q_OVERFLOW)
+            wm_.add_watch(self.path, mask, quiet=False)
+        except Exception as exc:
+            log.warning(
+                'Unable to watch %s with inotify, falling back to polling '
+                'its mtime: %s', self.path, exc
+            )
+            self._unwatch()
+
+    def _unwatch(self):
+        if self.notifier is not None:
+            try:
+                self.notifier.stop()
+            except Exception:
+                pass
+            self.notifier = None
+
+    def _stale(self, mtime):
+        '''
+        Return True if the cached listing needs to be read again
+        '''
+        if self.files is None:
+            return True
+        if self.notifier is not None:
+            if self.notifier.check_events(timeout=0):
+                self.notifier.read_events()
+                self.notifier.process_events()
+            if self.notifier is not None:
+                return self.dirty
+        if mtime != self.mtime:
+            return True
+        return time.time() - mtime < self.mtime_grace
+
+    def list(self):
+        '''
+        Return the sorted list of the regular files in the directory, ignoring
+        hidden files. Raises OSError if the directory cannot be read.
+        '''
+        mtime = None
+        if self.notifier is None:
+            mtime = os.stat(self.path).st_mtime
+        if self._stale(mtime):
+            if mtime is None:
+                mtime = os.stat(self.path).st_mtime
+            self.dirty = False
+            files = []
+            for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(self.path)):
+                if not fn_.startswith('.') and os.path.isfile(os.path.join(self.path, fn_)):
+                    files.append(fn_)
+            self.files = files
+            self.mtime = mtime
+        return list(self.files)
+
+
 # test code for the CacheCli
 if __name__ == '__main__':
 
@@ -27,7 +27,6 @@ import salt.utils.configparser
 import salt.utils.data
 import salt.utils.files
 import salt.utils.gzip_util
-import salt.utils.hashutils
 import salt.utils.itertools
 import salt.utils.path
 import salt.utils.platform
@@ -2837,29 +2836,11 @@ class GitFS(GitBase):
         if not all(x in load for x in ('path', 'saltenv')):
             return '', None
         ret = {'hash_type': self.opts['hash_type']}
-        relpath = fnd['rel']
-        path = fnd['path']
-        hashdest = salt.utils.path.join(self.hash_cachedir,
-                                        load['saltenv'],
-                                        '{0}.hash.{1}'.format(relpath,
-                                                              self.opts['hash_type']))
-        try:
-            with salt.utils.files.fopen(hashdest, 'rb') as fp_:
-                ret['hsum'] = fp_.read()
-            return ret
-        except IOError as exc:
-            if exc.errno != errno.ENOENT:
-                raise exc
-
-        try:
-            os.makedirs(os.path.dirname(hashdest))
-        except OSError as exc:
-            if exc.errno != errno.EEXIST:
-                raise exc
-
-        ret['hsum'] = salt.utils.hashutils.get_hash(path, self.opts['hash_type'])
-        with salt.utils.files.fopen(hashdest, 'w+') as fp_:
-            fp_.write(ret['hsum'])
+        hsum = salt.fileserver.cached_file_hash(
+            self.opts, self.role, load['saltenv'], fnd['rel'], fnd['path'])
+        if hsum is None:
+            return {}
+        ret['hsum'] = hsum
         return ret
 
     def _file_lists(self, load, form):
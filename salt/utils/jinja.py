@@ -6,6 +6,7 @@ Jinja loading utils to enable a more powerful backend for jinja templates
 # Import python libs
 from __future__ import absolute_import, unicode_literals
 import collections
+import errno
 import logging
 import os.path
 import pipes
@@ -20,6 +21,7 @@ from xml.etree.ElementTree import Element, SubElement, tostring
 import jinja2
 from salt.ext import six
 from jinja2 import BaseLoader, Markup, TemplateNotFound, nodes
+from jinja2.bccache import Bucket
 from jinja2.environment import TemplateModule
 from jinja2.exceptions import TemplateRuntimeError
 from jinja2.ext import Extension
@@ -27,6 +29,7 @@ from jinja2.ext import Extension
 # Import salt libs
 from salt.exceptions import TemplateError
 import salt.fileclient
+import salt.utils.atomicfile
 import salt.utils.data
 import salt.utils.files
 import salt.utils.json
@@ -39,6 +42,7 @@ from salt.utils.odict import OrderedDict
 log = logging.getLogger(__name__)
 
 __all__ = [
+    'SaltBytecodeCache',
     'SaltCacheLoader',
     'SerializerExtension'
 ]
@@ -55,7 +59,7 @@ class SaltCacheLoader(BaseLoader):
     and only loaded once per loader instance.
     '''
     def __init__(self, opts, saltenv='base', encoding='utf-8',
-                 pillar_rend=False):
+                 pillar_rend=False, accessed_templates=None):
         self.opts = opts
         self.saltenv = saltenv
         self.encoding = encoding
@@ -69,6 +73,8 @@ class SaltCacheLoader(BaseLoader):
         log.debug('Jinja search path: %s', self.searchpath)
         self.cached = []
         self.pillar_rend = pillar_rend
+        # A set recording the templates loaded by the render
+        self.accessed_templates = accessed_templates
         self._file_client = None
         # Instantiate the fileclient
         self.file_client()
@@ -107,6 +113,8 @@ class SaltCacheLoader(BaseLoader):
             raise TemplateNotFound(template)
 
         self.check_cache(template)
+        if self.accessed_templates is not None:
+            self.accessed_templates.add(template)
 
         if environment and template:
             tpldir = os.path.dirname(template).replace('\\', '/')
@@ -140,6 +148,125 @@ class SaltCacheLoader(BaseLoader):
         raise TemplateNotFound(template)
 
 
+class SaltBytecodeCache(jinja2.FileSystemBytecodeCache):
+    '''
+    A jinja bytecode cache which keeps the compiled templates in memory and
+    on disk under the cachedir, so a template is only compiled again once its
+    source changed.
+
+    The cache keys include the environment options changing the compiled
+    code, as the jinja_env and jinja_sls_env options may differ between
+    renders sharing the cache. The source checksum stored with the bytecode
+    rejects outdated entries.
+    '''
+    max_memory = 400
+
+    def __init__(self, directory):
+        super(SaltBytecodeCache, self).__init__(directory, '%s.cache')
+        self.memory = {}
+
+    def get_bucket(self, environment, name, filename, source):
+        key = self.get_cache_key(
+            '{0}|{1}'.format(name, _environment_signature(environment)),
+            filename)
+        bucket = Bucket(
+            environment, key, self.get_source_checksum(source))
+        self.load_bytecode(bucket)
+        return bucket
+
+    def load_bytecode(self, bucket):
+        cached = self.memory.get(bucket.key)
+        if cached is not None and cached[0] == bucket.checksum:
+            bucket.code = cached[1]
+            return
+        try:
+            super(SaltBytecodeCache, self).load_bytecode(bucket)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug('Unable to load jinja bytecode %s: %s', bucket.key, exc)
+            bucket.reset()
+        if bucket.code is not None:
+            self._remember(bucket)
+
+    def dump_bytecode(self, bucket):
+        self._remember(bucket)
+        try:
+            with salt.utils.atomicfile.atomic_open(
+                    self._get_cache_filename(bucket), 'wb') as ofile:
+                bucket.write_bytecode(ofile)
+        except (IOError, OSError) as exc:
+            log.debug('Unable to write jinja bytecode %s: %s', bucket.key, exc)
+
+    def _remember(self, bucket):
+        if len(self.memory) >= self.max_memory:
+            self.memory.clear()
+        self.memory[bucket.key] = (bucket.checksum, bucket.code)
+
+
+def _environment_signature(environment):
+    '''
+    Return a string of the environment options changing the compiled code
+    '''
+    return repr((
+        environment.block_start_string,
+        environment.block_end_string,
+        environment.variable_start_string,
+        environment.variable_end_string,
+        environment.comment_start_string,
+        environment.comment_end_string,
+        environment.line_statement_prefix,
+        environment.line_comment_prefix,
+        environment.trim_blocks,
+        environment.lstrip_blocks,
+        environment.newline_sequence,
+        environment.keep_trailing_newline,
+        environment.optimized,
+        environment.autoescape if isinstance(environment.autoescape, bool) else None,
+        sorted(environment.extensions),
+    ))
+
+
+_BYTECODE_CACHES = {}
+
+
+def get_bytecode_cache(opts):
+    '''
+    Return the process wide bytecode cache for the cachedir in opts, or None
+    when the jinja_bytecode_cache option is disabled.
+    '''
+    if not opts.get('jinja_bytecode_cache', False) or not opts.get('cachedir'):
+        return None
+    directory = os.path.join(opts['cachedir'], 'jinja')
+    if directory not in _BYTECODE_CACHES:
+        try:
+            os.makedirs(directory, 0o700)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                log.warning(
+                    'Unable to create the jinja bytecode cache %s: %s',
+                    directory, exc
+                )
+                return None
+        _BYTECODE_CACHES[directory] = SaltBytecodeCache(directory)
+    return _BYTECODE_CACHES[directory]
+
+
+def from_string(environment, source, name):
+    '''
+    Return the template of source like environment.from_string, using the
+    bytecode cache of the environment. The name identifies the source in the
+    cache, e.g. the path of the rendered file.
+    '''
+    bcc = environment.bytecode_cache
+    if bcc is None:
+        return environment.from_string(source)
+    bucket = bcc.get_bucket(environment, '<string>', name, source)
+    if bucket.code is None:
+        bucket.code = environment.compile(source)
+        bcc.set_bucket(bucket)
+    return environment.template_class.from_code(
+        environment, bucket.code, environment.make_globals(None), None)
+
+
 class PrintableDict(OrderedDict):
     '''
     Ensures that dict str() and repr() are YAML friendly.
@@ -8,6 +8,7 @@ from __future__ import absolute_import, unicode_literals
 import logging
 
 # Import Salt libs
+import salt.exceptions
 import salt.minion
 import salt.utils.jid
 import salt.utils.event
@@ -30,6 +31,76 @@ def store_job(opts, load, event=None, mminion=None):
     if mminion is None:
         mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
 
+    if not _prep_store_job(opts, load, event, mminion):
+        return
+
+    job_cache = opts['master_job_cache']
+    fstr = '{0}.returner'.format(job_cache)
+    updateetfstr = '{0}.update_endtime'.format(job_cache)
+    mminion.returners[fstr](load)
+
+    if (opts.get('job_cache_store_endtime')
+            and updateetfstr in mminion.returners):
+        mminion.returners[updateetfstr](load['jid'], endtime)
+
+
+def store_job_batch(opts, loads, event=None, mminion=None):
+    '''
+    Store the job information of a batch of returns using the configured
+    master_job_cache.
+
+    If the master_job_cache implements a ``returner_batch`` function, all the
+    returns to write to the job cache are passed to it in a single call,
+    otherwise every return is stored with store_job. ``returner_batch`` also
+    records the jid and saves the load of the jobs it does not know yet, in
+    place of the prep_jid and save_load calls store_job makes per return.
+    '''
+    if mminion is None:
+        mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
+    job_cache = opts['master_job_cache']
+    batchfstr = '{0}.returner_batch'.format(job_cache)
+    if batchfstr not in mminion.returners:
+        for load in loads:
+            try:
+                store_job(opts, load, event=event, mminion=mminion)
+            except salt.exceptions.SaltCacheError:
+                log.error('Could not store job information for load: %s', load)
+        return
+
+    # Generate EndTime
+    endtime = salt.utils.jid.jid_to_time(salt.utils.jid.gen_jid(opts))
+    batch = []
+    for load in loads:
+        # If the return data is invalid, just ignore it
+        if any(key not in load for key in ('return', 'jid', 'id')):
+            continue
+        if not salt.utils.verify.valid_id(opts, load['id']):
+            continue
+        try:
+            if _prep_store_job(opts, load, event, mminion, batch=True):
+                batch.append(load)
+        except salt.exceptions.SaltCacheError:
+            log.error('Could not store job information for load: %s', load)
+    if not batch:
+        return
+
+    mminion.returners[batchfstr](batch)
+
+    updateetfstr = '{0}.update_endtime'.format(job_cache)
+    if (opts.get('job_cache_store_endtime')
+            and updateetfstr in mminion.returners):
+        for jid in set(load['jid'] for load in batch):
+            mminion.returners[updateetfstr](jid, endtime)
+
+
+def _prep_store_job(opts, load, event, mminion, batch=False):
+    '''
+    Prepare the job cache for a valid return and fire its events. Return True
+    if the return has to be written to the master_job_cache.
+
+    With batch, the jid and the load of the job are left to the
+    ``returner_batch`` function of the master_job_cache.
+    '''
     job_cache = opts['master_job_cache']
     if load['jid'] == 'req':
         # The minion is returning a standalone job, request a jobid
@@ -53,7 +124,7 @@ def store_job(opts, load, event=None, mminion=None):
             emsg = "Returner '{0}' does not support function save_load".format(job_cache)
             log.error(emsg)
             raise KeyError(emsg)
-    elif salt.utils.jid.is_jid(load['jid']):
+    elif salt.utils.jid.is_jid(load['jid']) and not batch:
         # Store the jid
         jidstore_fstr = '{0}.prep_jid'.format(job_cache)
         try:
@@ -73,19 +144,18 @@ def store_job(opts, load, event=None, mminion=None):
     # if you have a job_cache, or an ext_job_cache, don't write to
     # the regular master cache
     if not opts['job_cache'] or opts.get('ext_job_cache'):
-        return
+        return False
 
     # do not cache job results if explicitly requested
     if load.get('jid') == 'nocache':
         log.debug('Ignoring job return with jid for caching %s from %s',
                   load['jid'], load['id'])
-        return
+        return False
 
     # otherwise, write to the master cache
     savefstr = '{0}.save_load'.format(job_cache)
     getfstr = '{0}.get_load'.format(job_cache)
     fstr = '{0}.returner'.format(job_cache)
-    updateetfstr = '{0}.update_endtime'.format(job_cache)
     if 'fun' not in load and load.get('return', {}):
         ret_ = load.get('return', {})
         if 'fun' in ret_:
@@ -103,15 +173,14 @@ def store_job(opts, load, event=None, mminion=None):
         log.error(emsg)
         raise KeyError(emsg)
 
+    if batch:
+        return True
+
     try:
         mminion.returners[savefstr](load['jid'], load)
     except KeyError as e:
         log.error("Load does not contain 'jid': %s", e)
-    mminion.returners[fstr](load)
-
-    if (opts.get('job_cache_store_endtime')
-            and updateetfstr in mminion.returners):
-        mminion.returners[updateetfstr](load['jid'], endtime)
+    return True
 
 
 def store_minions(opts, jid, minions, mminion=None, syndic_id=None):
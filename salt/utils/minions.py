@@ -7,13 +7,16 @@ expected to return
 # Import python libs
 from __future__ import absolute_import, unicode_literals
 import os
+import contextlib
 import fnmatch
 import re
+import time
 import logging
 
 # Import salt libs
 import salt.payload
 import salt.roster
+import salt.utils.cache
 import salt.utils.data
 import salt.utils.files
 import salt.utils.network
@@ -182,6 +185,347 @@ def nodegroup_comp(nodegroup, nodegroups, skip=None, first_call=True):
         return ret
 
 
+# Relative cost of evaluating the compound target engines, cheap engines
+# only look at the accepted keys while the others read the minion data cache
+COMPOUND_COST = {'L': 0,
+                 'E': 1,
+                 None: 1,  # glob
+                 'R': 2,
+                 'G': 3,
+                 'P': 3,
+                 'I': 3,
+                 'J': 3,
+                 'S': 3}
+
+
+def parse_compound(words, engines=None):
+    '''
+    Parse the list of words of a compound expression into a tree of tuples:
+
+    - ``('term', <word>)``
+    - ``('not', <node>)``
+    - ``('and', [<node>, ...])``
+    - ``('or', [<node>, ...])``
+
+    ``not`` binds tighter than ``and`` which binds tighter than ``or``. A
+    ``not`` directly following a term implies an ``and``, and parentheses
+    left open at the end of the expression are closed implicitly.
+
+    If ``engines`` is passed, a ValueError is raised for terms using an
+    engine not present in it.
+    '''
+    tokens = [word if isinstance(word, six.string_types) else six.text_type(word)
+              for word in words]
+    pos = [0]
+
+    def _peek():
+        if pos[0] < len(tokens):
+            return tokens[pos[0]]
+        return None
+
+    def _next():
+        tok = _peek()
+        pos[0] += 1
+        return tok
+
+    def _or():
+        children = [_and()]
+        while _peek() == 'or':
+            _next()
+            children.append(_and())
+        return children[0] if len(children) == 1 else ('or', children)
+
+    def _and():
+        children = [_not()]
+        while _peek() in ('and', 'not'):
+            if _peek() == 'and':
+                _next()
+            children.append(_not())
+        return children[0] if len(children) == 1 else ('and', children)
+
+    def _not():
+        if _peek() == 'not':
+            _next()
+            return ('not', _not())
+        return _atom()
+
+    def _atom():
+        tok = _next()
+        if tok is None:
+            raise ValueError(
+                'Invalid compound expr (unexpected end): {0}'.format(' '.join(tokens))
+            )
+        if tok == '(':
+            node = _or()
+            if _peek() == ')':
+                _next()
+            elif _peek() is not None:
+                raise ValueError(
+                    'Invalid compound expr (expected right parenthesis): '
+                    '{0}'.format(' '.join(tokens))
+                )
+            return node
+        if tok in ('and', 'or', ')'):
+            raise ValueError(
+                'Invalid compound expr (unexpected \'{0}\'): {1}'.format(tok, ' '.join(tokens))
+            )
+        target_info = parse_target(tok)
+        engine = target_info['engine']
+        if engine == 'N':
+            # Nodegroups should already be expanded/resolved to other engines
+            raise ValueError('Detected nodegroup expansion failure of "{0}"'.format(tok))
+        if engine and engines is not None and not engines.get(engine):
+            # If an unknown engine is called at any time, fail out
+            raise ValueError(
+                'Unrecognized target engine "{0}" for target expression '
+                '"{1}"'.format(engine, tok)
+            )
+        return ('term', tok)
+
+    tree = _or()
+    if _peek() is not None:
+        raise ValueError(
+            'Invalid compound expr (unexpected \'{0}\'): {1}'.format(_peek(), ' '.join(tokens))
+        )
+    return tree
+
+
+def compound_cost(node):
+    '''
+    Return the estimated cost of evaluating a node of a parsed compound
+    expression, see parse_compound
+    '''
+    if node[0] == 'term':
+        return COMPOUND_COST.get(parse_target(node[1])['engine'], 3)
+    if node[0] == 'not':
+        return compound_cost(node[1])
+    return max(compound_cost(child) for child in node[1])
+
+
+class _UnindexableData(Exception):
+    '''
+    Raised while indexing minion data which cannot be represented as flat
+    key path to value mappings (lists containing dicts or nested lists)
+    '''
+
+
+class MinionDataIndex(object):
+    '''
+    Resident inverted index of the grains and pillar stored in the minion
+    data cache, mapping key paths to values to the set of minion IDs.
+
+    Grain and pillar targets are resolved through set lookups on the index
+    instead of fetching and deserializing the cached data of every minion.
+    Minions for which the target path resolves to a dict (or whose data
+    contains lists of dicts) are still checked with ``subdict_match`` so the
+    results are exactly the same as a full cache scan.
+
+    The index lives in the memory of the process. It is updated incrementally
+    when the master stores fresh minion data, minions added to or removed from
+    the cache are picked up on each search, and the whole index is rebuilt
+    every ``minion_data_index_refresh`` seconds to pick up data written by
+    other worker processes.
+    '''
+    # {(<cache driver>, <cachedir>): MinionDataIndex}
+    instances = {}
+    search_types = ('grains', 'pillar')
+
+    def __init__(self, opts, cache):
+        self.opts = opts
+        self.cache = cache
+        self.refresh_interval = opts.get('minion_data_index_refresh', 60)
+        self.refreshed = 0
+        self.clear()
+
+    @classmethod
+    def _storage_id(cls, opts):
+        return (opts.get('cache', 'localfs'), opts.get('cachedir'))
+
+    @classmethod
+    def get(cls, opts, cache):
+        '''
+        Return the index of this process for the cache storage in ``opts``,
+        creating it if needed
+        '''
+        storage_id = cls._storage_id(opts)
+        if storage_id not in cls.instances:
+            cls.instances[storage_id] = cls(opts, cache)
+        return cls.instances[storage_id]
+
+    @classmethod
+    def update_minion(cls, opts, minion_id, data):
+        '''
+        Update the index of this process, if one was created, with the data
+        just stored in the minion data cache for ``minion_id``
+        '''
+        index = cls.instances.get(cls._storage_id(opts))
+        if index is not None:
+            index.add(minion_id, data)
+
+    def clear(self):
+        '''
+        Drop all the indexed data
+        '''
+        # {<search_type>: {<path tuple>: {<lowercase value>: set(<id>)}}}
+        self.values = dict((stype, {}) for stype in self.search_types)
+        # Paths resolving to a non-empty dict, these need subdict_match
+        # {<search_type>: {<path tuple>: set(<id>)}}
+        self.complex = dict((stype, {}) for stype in self.search_types)
+        # Minions whose data could not be indexed at all
+        # {<search_type>: set(<id>)}
+        self.unindexed = dict((stype, set()) for stype in self.search_types)
+        # {<id>: [(<table>, <search_type>, <path>, <value>), ...]}
+        self.postings = {}
+
+    @property
+    def minions(self):
+        '''
+        The set of minion IDs that have data in the index
+        '''
+        return set(self.postings)
+
+    def remove(self, minion_id):
+        '''
+        Remove all the postings of ``minion_id`` from the index
+        '''
+        for table, stype, path, value in self.postings.pop(minion_id, []):
+            if table == 'values':
+                ids = self.values[stype][path][value]
+                ids.discard(minion_id)
+                if not ids:
+                    del self.values[stype][path][value]
+                    if not self.values[stype][path]:
+                        del self.values[stype][path]
+            elif table == 'complex':
+                ids = self.complex[stype][path]
+                ids.discard(minion_id)
+                if not ids:
+                    del self.complex[stype][path]
+            else:
+                self.unindexed[stype].discard(minion_id)
+
+    def add(self, minion_id, mdata):
+        '''
+        Index (or re-index) the cached ``mdata`` of ``minion_id``
+        '''
+        self.remove(minion_id)
+        if not isinstance(mdata, dict):
+            return
+        postings = []
+        for stype in self.search_types:
+            data = mdata.get(stype)
+            if data is None:
+                continue
+            stype_postings = []
+            try:
+                if not isinstance(data, dict):
+                    raise _UnindexableData()
+                self._flatten(stype, data, (), stype_postings)
+            except _UnindexableData:
+                stype_postings = [('unindexed', stype, None, None)]
+            postings.extend(stype_postings)
+        for table, stype, path, value in postings:
+            if table == 'values':
+                self.values[stype].setdefault(path, {}).setdefault(value, set()).add(minion_id)
+            elif table == 'complex':
+                self.complex[stype].setdefault(path, set()).add(minion_id)
+            else:
+                self.unindexed[stype].add(minion_id)
+        self.postings[minion_id] = postings
+
+    def _flatten(self, stype, data, path, postings):
+        '''
+        Generate the postings for ``data`` found at ``path``, mirroring the
+        way ``salt.utils.data.traverse_dict_and_list`` walks the data
+        '''
+        if isinstance(data, dict):
+            if path and data:
+                postings.append(('complex', stype, path, None))
+            for key, val in six.iteritems(data):
+                if not isinstance(key, six.string_types):
+                    # Target paths are always strings, these are unreachable
+                    continue
+                self._flatten(stype, val, path + (key,), postings)
+        elif isinstance(data, list):
+            if any(isinstance(item, (dict, list)) for item in data):
+                raise _UnindexableData()
+            for idx, item in enumerate(data):
+                value = six.text_type(item).lower()
+                postings.append(('values', stype, path, value))
+                postings.append(('values', stype, path + (six.text_type(idx),), value))
+        else:
+            postings.append(('values', stype, path, six.text_type(data).lower()))
+
+    def sync(self, cminions):
+        '''
+        Make the index cover exactly the minions in ``cminions``, fetching
+        the data of any minion not indexed yet. The index is rebuilt from
+        scratch when the refresh interval elapsed.
+        '''
+        now = time.time()
+        if now - self.refreshed > self.refresh_interval:
+            log.debug('Rebuilding the minion data index')
+            self.clear()
+            self.refreshed = now
+        for minion_id in self.minions - cminions:
+            self.remove(minion_id)
+        for minion_id in cminions - set(self.postings):
+            self.add(minion_id, self.cache.fetch('minions/{0}'.format(minion_id), 'data'))
+
+    def search(self, search_type, expr, delimiter, regex_match=False, exact_match=False):
+        '''
+        Return the set of indexed minion IDs whose ``search_type`` data
+        matches ``expr`` with the ``salt.utils.data.subdict_match`` semantics,
+        or None if the expression cannot be resolved through the index.
+        '''
+        values = self.values[search_type]
+        complex_ = self.complex[search_type]
+        matched = set()
+        fallback = set(self.unindexed[search_type])
+        splits = expr.split(delimiter)
+        for idx in range(1, expr.count(delimiter) + 1):
+            path = tuple(splits[:idx])
+            for comp in path:
+                try:
+                    num = int(comp)
+                except ValueError:
+                    continue
+                if comp != six.text_type(num) or num < 0:
+                    # Non-canonical list index, only traverse_dict_and_list
+                    # knows how to handle it
+                    return None
+            pattern = delimiter.join(splits[idx:]).lower()
+            path_values = values.get(path, {})
+            if regex_match:
+                try:
+                    regex = re.compile(pattern)
+                except Exception:
+                    log.error('Invalid regex \'%s\' in match', pattern)
+                    regex = None
+                if regex is not None:
+                    for value, ids in six.iteritems(path_values):
+                        if regex.match(value):
+                            matched.update(ids)
+            elif exact_match:
+                matched.update(path_values.get(pattern, ()))
+            else:
+                for value in fnmatch.filter(path_values, pattern):
+                    matched.update(path_values[value])
+            fallback.update(complex_.get(path, ()))
+
+        for minion_id in fallback - matched:
+            mdata = self.cache.fetch('minions/{0}'.format(minion_id), 'data')
+            if not isinstance(mdata, dict):
+                continue
+            if salt.utils.data.subdict_match(mdata.get(search_type),
+                                             expr,
+                                             delimiter=delimiter,
+                                             regex_match=regex_match,
+                                             exact_match=exact_match):
+                matched.add(minion_id)
+        return matched
+
+
 class CkMinions(object):
     '''
     Used to check what minions should respond from a target
@@ -200,6 +544,63 @@ class CkMinions(object):
             self.acc = 'minions'
         else:
             self.acc = 'accepted'
+        # Data sources read while evaluating a single target, see _memoize
+        self._memo = None
+
+    def _memoize(self, key, fun, *args):
+        '''
+        Call ``fun`` only once per evaluated target when a target evaluation is
+        in progress (i.e. the memo is set up by _check_compound_minions), so
+        that every data source is read at most once per publish.
+        '''
+        if self._memo is None:
+            return fun(*args)
+        if key not in self._memo:
+            self._memo[key] = fun(*args)
+        ret = self._memo[key]
+        if isinstance(ret, list):
+            # Callers are allowed to modify the returned list
+            return list(ret)
+        return ret
+
+    @contextlib.contextmanager
+    def _memo_scope(self):
+        '''
+        Memoize the data sources read within this context, see _memoize
+        '''
+        if self._memo is not None:
+            # Nested evaluation, reuse the outer memo
+            yield
+            return
+        self._memo = {}
+        try:
+            yield
+        finally:
+            self._memo = None
+
+    def _accepted_minions(self):
+        '''
+        Return the sorted list of accepted minion keys in the PKI dir
+        '''
+        listing = salt.utils.cache.ListdirCache.get(
+            os.path.join(self.opts['pki_dir'], self.acc),
+            self.opts.get('pki_dir_inotify', False))
+        return self._memoize('accepted_minions', listing.list)
+
+    def _cached_minions(self):
+        '''
+        Return the list of minions present in the minion data cache
+        '''
+        return self._memoize('cached_minions', self.cache.list, 'minions')
+
+    def _fetch_minion_data(self, minion_id):
+        '''
+        Return the grains and pillar of ``minion_id`` from the minion data cache
+        '''
+        return self._memoize(('data', minion_id),
+                             self.cache.fetch,
+                             'minions/{0}'.format(minion_id),
+                             'data')
 
     def _check_nodegroup_minions(self, expr, greedy):  # pylint: disable=unused-argument
         '''
@@ -243,6 +644,12 @@ class CkMinions(object):
             # Compiling pillar directly on the master, just return the master's
             # ID as that is the only one that is available.
             return [self.opts['id']]
+        return self._memoize('pki_minions', self._list_pki_minions)
+
+    def _list_pki_minions(self):
+        '''
+        List the minions in the PKI dir, or the key cache if configured
+        '''
         minions = []
         pki_cache_fn = os.path.join(self.opts['pki_dir'], self.acc, '.key_cache')
         try:
@@ -251,9 +658,7 @@ class CkMinions(object):
                 with salt.utils.files.fopen(pki_cache_fn) as fn_:
                     return self.serial.load(fn_)
             else:
-                for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                    if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                        minions.append(fn_)
+                minions = self._accepted_minions()
             return minions
         except OSError as exc:
             log.error(
@@ -268,41 +673,59 @@ class CkMinions(object):
                              greedy,
                              search_type,
                              regex_match=False,
-                             exact_match=False):
+                             exact_match=False,
+                             candidates=None):
         '''
         Helper function to search for minions in master caches
         If 'greedy' return accepted minions that matched by the condition or absend in the cache.
         If not 'greedy' return the only minions have cache data and matched by the condition.
+        If 'candidates' is passed only those minions are checked.
         '''
         cache_enabled = self.opts.get('minion_data_cache', False)
 
-        def list_cached_minions():
-            return self.cache.list('minions')
-
         if greedy:
-            minions = []
-            for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                    minions.append(fn_)
+            minions = self._accepted_minions()
         elif cache_enabled:
-            minions = list_cached_minions()
+            minions = self._cached_minions()
         else:
             return {'minions': [],
                     'missing': []}
 
+        if candidates is not None:
+            minions = [id_ for id_ in minions if id_ in candidates]
+
         if cache_enabled:
             if greedy:
-                cminions = list_cached_minions()
+                cminions = self._cached_minions()
             else:
                 cminions = minions
             if not cminions:
                 return {'minions': minions,
                         'missing': []}
+            if self.opts.get('minion_data_index', False):
+                index = MinionDataIndex.get(self.opts, self.cache)
+                if greedy or candidates is None:
+                    index.sync(set(cminions))
+                else:
+                    index.sync(set(self._cached_minions()))
+                matched = index.search(search_type,
+                                       expr,
+                                       delimiter,
+                                       regex_match=regex_match,
+                                       exact_match=exact_match)
+                if matched is not None:
+                    if greedy:
+                        unmatched = (index.minions & set(cminions)) - matched
+                        minions = [id_ for id_ in minions if id_ not in unmatched]
+                    else:
+                        minions = [id_ for id_ in minions if id_ in matched]
+                    return {'minions': minions,
+                            'missing': []}
             minions = set(minions)
             for id_ in cminions:
-                if greedy and id_ not in minions:
+                if id_ not in minions:
                     continue
-                mdata = self.cache.fetch('minions/{0}'.format(id_), 'data')
+                mdata = self._fetch_minion_data(id_)
                 if mdata is None:
                     if not greedy:
                         minions.remove(id_)
@@ -318,13 +741,17 @@ class CkMinions(object):
         return {'minions': minions,
                 'missing': []}
 
-    def _check_grain_minions(self, expr, delimiter, greedy):
+    def _check_grain_minions(self, expr, delimiter, greedy, candidates=None):
         '''
         Return the minions found by looking via grains
         '''
-        return self._check_cache_minions(expr, delimiter, greedy, 'grains')
+        return self._check_cache_minions(expr,
+                                         delimiter,
+                                         greedy,
+                                         'grains',
+                                         candidates=candidates)
 
-    def _check_grain_pcre_minions(self, expr, delimiter, greedy):
+    def _check_grain_pcre_minions(self, expr, delimiter, greedy, candidates=None):
         '''
         Return the minions found by looking via grains with PCRE
         '''
@@ -332,15 +759,20 @@ class CkMinions(object):
                                          delimiter,
                                          greedy,
                                          'grains',
-                                         regex_match=True)
+                                         regex_match=True,
+                                         candidates=candidates)
 
-    def _check_pillar_minions(self, expr, delimiter, greedy):
+    def _check_pillar_minions(self, expr, delimiter, greedy, candidates=None):
         '''
         Return the minions found by looking via pillar
         '''
-        return self._check_cache_minions(expr, delimiter, greedy, 'pillar')
+        return self._check_cache_minions(expr,
+                                         delimiter,
+                                         greedy,
+                                         'pillar',
+                                         candidates=candidates)
 
-    def _check_pillar_pcre_minions(self, expr, delimiter, greedy):
+    def _check_pillar_pcre_minions(self, expr, delimiter, greedy, candidates=None):
         '''
         Return the minions found by looking via pillar with PCRE
         '''
@@ -348,9 +780,10 @@ class CkMinions(object):
                                          delimiter,
                                          greedy,
                                          'pillar',
-                                         regex_match=True)
+                                         regex_match=True,
+                                         candidates=candidates)
 
-    def _check_pillar_exact_minions(self, expr, delimiter, greedy):
+    def _check_pillar_exact_minions(self, expr, delimiter, greedy, candidates=None):
         '''
         Return the minions found by looking via pillar
         '''
@@ -358,9 +791,10 @@ class CkMinions(object):
                                          delimiter,
                                          greedy,
                                          'pillar',
-                                         exact_match=True)
+                                         exact_match=True,
+                                         candidates=candidates)
 
-    def _check_ipcidr_minions(self, expr, greedy):
+    def _check_ipcidr_minions(self, expr, greedy, candidates=None):
         '''
         Return the minions found by looking via ipcidr
         '''
@@ -369,14 +803,17 @@ class CkMinions(object):
         if greedy:
             minions = self._pki_minions()
         elif cache_enabled:
-            minions = self.cache.list('minions')
+            minions = self._cached_minions()
         else:
             return {'minions': [],
                     'missing': []}
 
+        if candidates is not None:
+            minions = [id_ for id_ in minions if id_ in candidates]
+
         if cache_enabled:
             if greedy:
-                cminions = self.cache.list('minions')
+                cminions = self._cached_minions()
             else:
                 cminions = minions
             if cminions is None:
@@ -399,7 +836,9 @@ class CkMinions(object):
 
             minions = set(minions)
             for id_ in cminions:
-                mdata = self.cache.fetch('minions/{0}'.format(id_), 'data')
+                if id_ not in minions:
+                    continue
+                mdata = self._fetch_minion_data(id_)
                 if mdata is None:
                     if not greedy:
                         minions.remove(id_)
@@ -437,14 +876,10 @@ class CkMinions(object):
             )
             cache_enabled = self.opts.get('minion_data_cache', False)
             if greedy:
-                mlist = []
-                for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                    if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                        mlist.append(fn_)
-                return {'minions': mlist,
+                return {'minions': self._accepted_minions(),
                         'missing': []}
             elif cache_enabled:
-                return {'minions': self.cache.list('minions'),
+                return {'minions': self._cached_minions(),
                         'missing': []}
             else:
                 return {'minions': [],
@@ -468,14 +903,25 @@ class CkMinions(object):
                                 pillar_exact=False):  # pylint: disable=unused-argument
         '''
         Return the minions found by looking via compound matcher
+
+        The expression is parsed once into a tree which is then evaluated with
+        set operations. The terms of an ``and`` are evaluated cheapest first
+        (see ``COMPOUND_COST``) and every following term only checks the
+        minions matched so far, so cache backed terms are skipped entirely
+        when a cheaper term already matched nothing. The PKI dir and the
+        minion data cache are read at most once for the whole expression.
         '''
         if not isinstance(expr, six.string_types) and not isinstance(expr, (list, tuple)):
             log.error('Compound target that is neither string, list nor tuple')
             return {'minions': [], 'missing': []}
-        minions = set(self._pki_minions())
-        log.debug('minions: %s', minions)
+        with self._memo_scope():
+            minions = set(self._pki_minions())
+            log.debug('minions: %s', minions)
+
+            if not self.opts.get('minion_data_cache', False):
+                return {'minions': list(minions),
+                        'missing': []}
 
-        if self.opts.get('minion_data_cache', False):
             ref = {'G': self._check_grain_minions,
                    'P': self._check_grain_pcre_minions,
                    'I': self._check_pillar_minions,
@@ -489,122 +935,74 @@ class CkMinions(object):
                 ref['I'] = self._check_pillar_exact_minions
                 ref['J'] = self._check_pillar_exact_minions
 
-            results = []
-            unmatched = []
-            opers = ['and', 'or', 'not', '(', ')']
-            missing = []
-
             if isinstance(expr, six.string_types):
                 words = expr.split()
             else:
                 words = expr
 
-            for word in words:
-                target_info = parse_target(word)
-
-                # Easy check first
-                if word in opers:
-                    if results:
-                        if results[-1] == '(' and word in ('and', 'or'):
-                            log.error('Invalid beginning operator after "(": %s', word)
-                            return {'minions': [], 'missing': []}
-                        if word == 'not':
-                            if not results[-1] in ('&', '|', '('):
-                                results.append('&')
-                            results.append('(')
-                            results.append(six.text_type(set(minions)))
-                            results.append('-')
-                            unmatched.append('-')
-                        elif word == 'and':
-                            results.append('&')
-                        elif word == 'or':
-                            results.append('|')
-                        elif word == '(':
-                            results.append(word)
-                            unmatched.append(word)
-                        elif word == ')':
-                            if not unmatched or unmatched[-1] != '(':
-                                log.error('Invalid compound expr (unexpected '
-                                          'right parenthesis): %s',
-                                          expr)
-                                return {'minions': [], 'missing': []}
-                            results.append(word)
-                            unmatched.pop()
-                            if unmatched and unmatched[-1] == '-':
-                                results.append(')')
-                                unmatched.pop()
-                        else:  # Won't get here, unless oper is added
-                            log.error('Unhandled oper in compound expr: %s',
-                                      expr)
-                            return {'minions': [], 'missing': []}
-                    else:
-                        # seq start with oper, fail
-                        if word == 'not':
-                            results.append('(')
-                            results.append(six.text_type(set(minions)))
-                            results.append('-')
-                            unmatched.append('-')
-                        elif word == '(':
-                            results.append(word)
-                            unmatched.append(word)
-                        else:
-                            log.error(
-                                'Expression may begin with'
-                                ' binary operator: %s', word
-                            )
-                            return {'minions': [], 'missing': []}
-
-                elif target_info and target_info['engine']:
-                    if 'N' == target_info['engine']:
-                        # Nodegroups should already be expanded/resolved to other engines
-                        log.error('Detected nodegroup expansion failure of "%s"', word)
-                        return {'minions': [], 'missing': []}
-                    engine = ref.get(target_info['engine'])
-                    if not engine:
-                        # If an unknown engine is called at any time, fail out
-                        log.error(
-                            'Unrecognized target engine "%s" for'
-                            ' target expression "%s"',
-                            target_info['engine'],
-                            word,
-                        )
-                        return {'minions': [], 'missing': []}
-
-                    engine_args = [target_info['pattern']]
-                    if target_info['engine'] in ('G', 'P', 'I', 'J'):
-                        engine_args.append(target_info['delimiter'] or ':')
-                    engine_args.append(greedy)
-
-                    _results = engine(*engine_args)
-                    results.append(six.text_type(set(_results['minions'])))
-                    missing.extend(_results['missing'])
-                    if unmatched and unmatched[-1] == '-':
-                        results.append(')')
-                        unmatched.pop()
+            try:
+                tree = parse_compound(words, ref)
+            except ValueError as exc:
+                log.error('%s', exc)
+                return {'minions': [], 'missing': []}
+            log.debug('Evaluating compound matching expr: %s', tree)
 
-                else:
-                    # The match is not explicitly defined, evaluate as a glob
-                    _results = self._check_glob_minions(word, True)
-                    results.append(six.text_type(set(_results['minions'])))
-                    if unmatched and unmatched[-1] == '-':
-                        results.append(')')
-                        unmatched.pop()
-
-            # Add a closing ')' for each item left in unmatched
-            results.extend([')' for item in unmatched])
-
-            results = ' '.join(results)
-            log.debug('Evaluating final compound matching expr: %s',
-                      results)
+            missing = []
             try:
-                minions = list(eval(results))  # pylint: disable=W0123
-                return {'minions': minions, 'missing': missing}
+                matched = self._eval_compound(tree, ref, greedy, minions, None, missing)
             except Exception:
                 log.error('Invalid compound target: %s', expr)
                 return {'minions': [], 'missing': []}
+            return {'minions': list(matched), 'missing': missing}
 
-        return {'minions': list(minions),
-                'missing': []}
+    def _eval_compound(self, node, ref, greedy, minions, candidates, missing):
+        '''
+        Evaluate a node of a parsed compound expression, only considering the
+        minions in ``candidates`` unless it is None
+        '''
+        kind = node[0]
+        if kind == 'term':
+            return self._eval_compound_term(node[1], ref, greedy, candidates, missing)
+        if kind == 'not':
+            base = minions if candidates is None else minions & candidates
+            return base - self._eval_compound(node[1], ref, greedy, minions, base, missing)
+        if kind == 'and':
+            ret = candidates
+            for child in sorted(node[1], key=compound_cost):
+                ret = self._eval_compound(child, ref, greedy, minions, ret, missing)
+                if not ret:
+                    break
+            return ret
+        # or
+        ret = set()
+        for child in node[1]:
+            remaining = None if candidates is None else candidates - ret
+            ret |= self._eval_compound(child, ref, greedy, minions, remaining, missing)
+        return ret
+
+    def _eval_compound_term(self, word, ref, greedy, candidates, missing):
+        '''
+        Evaluate a single target term of a compound expression
+        '''
+        target_info = parse_target(word)
+        engine = target_info['engine']
+        if engine:
+            engine_args = [target_info['pattern']]
+            if engine in ('G', 'P', 'I', 'J'):
+                engine_args.append(target_info['delimiter'] or ':')
+            engine_args.append(greedy)
+            engine_kwargs = {}
+            if candidates is not None and engine in ('G', 'P', 'I', 'J', 'S'):
+                engine_kwargs['candidates'] = candidates
+            _results = ref[engine](*engine_args, **engine_kwargs)
+        else:
+            # The match is not explicitly defined, evaluate as a glob
+            _results = self._check_glob_minions(word, True)
+        missing.extend(_results['missing'])
+        ret = set(_results['minions'])
+        if candidates is not None:
+            ret &= candidates
+        return ret
 
     def connected_ids(self, subset=None, show_ipv4=False, include_localhost=False):
         '''
@@ -651,11 +1049,7 @@ class CkMinions(object):
         '''
         Return a list of all minions that have auth'd
         '''
-        mlist = []
-        for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-            if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                mlist.append(fn_)
-        return {'minions': mlist, 'missing': []}
+        return {'minions': self._accepted_minions(), 'missing': []}
 
     def check_minions(self,
                       expr,
@@ -673,16 +1067,17 @@ class CkMinions(object):
             if expr is None:
                 expr = ''
             check_func = getattr(self, '_check_{0}_minions'.format(tgt_type), None)
-            if tgt_type in ('grain',
-                             'grain_pcre',
-                             'pillar',
-                             'pillar_pcre',
-                             'pillar_exact',
-                             'compound',
-                             'compound_pillar_exact'):
-                _res = check_func(expr, delimiter, greedy)
-            else:
-                _res = check_func(expr, greedy)
+            with self._memo_scope():
+                if tgt_type in ('grain',
+                                 'grain_pcre',
+                                 'pillar',
+                                 'pillar_pcre',
+                                 'pillar_exact',
+                                 'compound',
+                                 'compound_pillar_exact'):
+                    _res = check_func(expr, delimiter, greedy)
+                else:
+                    _res = check_func(expr, greedy)
             _res['ssh_minions'] = False
             if self.opts.get('enable_ssh_minions', False) is True and isinstance('tgt', six.string_types):
                 roster = salt.roster.Roster(self.opts, self.opts.get('roster', 'flat'))
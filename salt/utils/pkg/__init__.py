@@ -10,6 +10,8 @@ import os
 import re
 
 # Import Salt libs
+import salt.payload
+import salt.utils.atomicfile
 import salt.utils.data
 import salt.utils.files
 import salt.utils.versions
@@ -67,6 +69,79 @@ def check_refresh(opts, refresh=None):
     )
 
 
+def pkg_list_cache(opts):
+    '''
+    Return the location of the file caching the installed packages across jobs
+    '''
+    return os.path.join(opts['cachedir'], 'pkg_list.p')
+
+
+def pkg_list_signature(opts, db_paths, *extra):
+    '''
+    Return the signature of the package database made of the files in
+    db_paths, or None when the package list can not be cached.
+
+    The signature changes whenever the package manager writes to its
+    database. The extra values, for instance the grains the package list
+    depends on, are part of the signature. It has to be taken before reading
+    the package list, so that a change made while reading it invalidates the
+    cached package list.
+    '''
+    if not opts.get('pkg_list_cache', False):
+        return None
+    signature = []
+    for path in db_paths:
+        try:
+            stat = os.stat(path)
+        except OSError as exc:
+            if exc.errno == errno.ENOENT:
+                continue
+            return None
+        signature.append([path, stat.st_mtime, stat.st_size, stat.st_ino])
+    if not signature:
+        return None
+    signature.extend(extra)
+    return signature
+
+
+def read_pkg_list_cache(opts, name, signature):
+    '''
+    Return the package list cached by write_pkg_list_cache for the package
+    provider name, or None when it is missing or the signature of the package
+    database changed since.
+    '''
+    if signature is None:
+        return None
+    try:
+        with salt.utils.files.fopen(pkg_list_cache(opts), 'rb') as fp_:
+            cache = salt.payload.Serial(opts).load(fp_)
+    except (IOError, OSError):
+        return None
+    except Exception as exc:  # pylint: disable=broad-except
+        log.debug('Unable to read the package list cache: %s', exc)
+        return None
+    if not isinstance(cache, dict) \
+            or cache.get('name') != name \
+            or cache.get('signature') != signature:
+        return None
+    return cache.get('pkgs')
+
+
+def write_pkg_list_cache(opts, name, signature, pkgs):
+    '''
+    Cache the package list pkgs of the package provider name, read from the
+    package database with the given signature
+    '''
+    if signature is None:
+        return
+    cache = {'name': name, 'signature': signature, 'pkgs': pkgs}
+    try:
+        with salt.utils.atomicfile.atomic_open(pkg_list_cache(opts), 'wb') as fp_:
+            salt.payload.Serial(opts).dump(cache, fp_)
+    except (IOError, OSError) as exc:
+        log.warning('Unable to write the package list cache: %s', exc)
+
+
 def split_comparison(version):
     match = re.match(r'^([<>])?(=)?([^<>=]+)$', version)
     if match:
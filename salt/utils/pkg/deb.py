@@ -10,6 +10,12 @@ from __future__ import absolute_import, print_function, unicode_literals
 from salt.ext import six
 from salt.ext.six.moves import range  # pylint: disable=redefined-builtin
 
+# The files dpkg writes to on every change of the package states
+DB_PATHS = (
+    '/var/lib/dpkg/status',
+    '/var/lib/dpkg/available',
+)
+
 
 def combine_comments(comments):
     '''
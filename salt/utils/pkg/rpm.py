@@ -37,6 +37,17 @@ ARCHES = ARCHES_64 + ARCHES_32 + ARCHES_PPC + ARCHES_S390 + \
 # EPOCHNUM can't be used until RHEL5 is EOL as it is not present
 QUERYFORMAT = '%{NAME}_|-%{EPOCH}_|-%{VERSION}_|-%{RELEASE}_|-%{ARCH}_|-%{REPOID}_|-%{INSTALLTIME}'
 
+# The files rpm writes to on every transaction, depending on the database
+# backend and location
+DB_PATHS = (
+    '/var/lib/rpm/Packages',
+    '/var/lib/rpm/rpmdb.sqlite',
+    '/var/lib/rpm/rpmdb.sqlite-wal',
+    '/usr/lib/sysimage/rpm/Packages',
+    '/usr/lib/sysimage/rpm/rpmdb.sqlite',
+    '/usr/lib/sysimage/rpm/rpmdb.sqlite-wal',
+)
+
 
 def get_osarch():
     '''
@@ -16,6 +16,7 @@ import sys
 # Import 3rd-party libs
 import jinja2
 import jinja2.ext
+import jinja2.runtime
 from salt.ext import six
 
 if sys.version_info[:2] >= (3, 5):
@@ -286,11 +287,35 @@ def _get_jinja_error(trace, context=None):
     return line, out
 
 
+def _accessed_context_class(accessed, names):
+    '''
+    Return a jinja2 context class recording in the ``accessed`` set which of
+    the given context variables the templates resolve
+    '''
+    class AccessedContext(jinja2.runtime.Context):
+        def resolve(self, key):
+            if key in names:
+                accessed.add(key)
+            return super(AccessedContext, self).resolve(key)
+
+        if hasattr(jinja2.runtime.Context, 'resolve_or_missing'):
+            def resolve_or_missing(self, key):
+                if key in names:
+                    accessed.add(key)
+                return super(AccessedContext, self).resolve_or_missing(key)
+
+    return AccessedContext
+
+
 def render_jinja_tmpl(tmplstr, context, tmplpath=None):
     opts = context['opts']
     saltenv = context['saltenv']
     loader = None
     newline = False
+    # A set to record the context variables used by the template in
+    accessed = context.pop('_accessed_context', None)
+    # A set to record the templates loaded from the fileserver in
+    accessed_templates = context.pop('_accessed_templates', None)
 
     if tmplstr and not isinstance(tmplstr, six.text_type):
         # http://jinja.pocoo.org/docs/api/#unicode
@@ -303,9 +328,11 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
         if tmplpath:
             loader = jinja2.FileSystemLoader(os.path.dirname(tmplpath))
     else:
-        loader = salt.utils.jinja.SaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
+        loader = salt.utils.jinja.SaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False),
+                                                  accessed_templates=accessed_templates)
 
-    env_args = {'extensions': [], 'loader': loader}
+    env_args = {'extensions': [], 'loader': loader,
+                'bytecode_cache': salt.utils.jinja.get_bytecode_cache(opts)}
 
     if hasattr(jinja2.ext, 'with_'):
         env_args['extensions'].append('jinja2.ext.with_')
@@ -374,8 +401,16 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
 
         decoded_context[key] = salt.utils.locales.sdecode(value)
 
+    if accessed is not None:
+        # show_full_context exposes the whole context
+        jinja_env.context_class = _accessed_context_class(
+            accessed, set(decoded_context) | set(['show_full_context']))
+
     try:
-        template = jinja_env.from_string(tmplstr)
+        if tmplpath:
+            template = salt.utils.jinja.from_string(jinja_env, tmplstr, tmplpath)
+        else:
+            template = jinja_env.from_string(tmplstr)
         template.globals.update(decoded_context)
         output = template.render(**decoded_context)
     except jinja2.exceptions.UndefinedError as exc:
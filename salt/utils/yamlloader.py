@@ -5,6 +5,7 @@ Custom YAML loading in Salt
 
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import functools
 import re
 import warnings
 
@@ -18,8 +19,12 @@ except Exception:
     pass
 
 import salt.utils.stringutils
+from salt.ext import six
 
-__all__ = ['SaltYamlSafeLoader', 'load', 'safe_load']
+HAS_LIBYAML = hasattr(yaml, 'CSafeLoader')
+
+__all__ = ['SaltYamlSafeLoader', 'SaltYamlCSafeLoader', 'fast_load', 'load',
+           'safe_load']
 
 
 class DuplicateKeyWarning(RuntimeWarning):
@@ -31,14 +36,14 @@ warnings.simplefilter('always', category=DuplicateKeyWarning)
 
 
 # with code integrated from https://gist.github.com/844388
-class SaltYamlSafeLoader(yaml.SafeLoader):
+class SaltYamlConstructorMixin(object):
     '''
-    Create a custom YAML loader that uses the custom constructor. This allows
-    for the YAML loading defaults to be manipulated based on needs within salt
-    to make things like sls file more intuitive.
+    The custom constructor of the Salt YAML loaders. This allows for the YAML
+    loading defaults to be manipulated based on needs within salt to make
+    things like sls file more intuitive.
     '''
     def __init__(self, stream, dictclass=dict):
-        super(SaltYamlSafeLoader, self).__init__(stream)
+        super(SaltYamlConstructorMixin, self).__init__(stream)
         if dictclass is not dict:
             # then assume ordered dict and use it for both !map and !omap
             self.add_constructor(
@@ -121,7 +126,7 @@ class SaltYamlSafeLoader(yaml.SafeLoader):
             # the proper unicode string type.
             if re.match(r'^u([\'"]).+\1$', node.value, flags=re.IGNORECASE):
                 node.value = eval(node.value, {}, {})  # pylint: disable=W0123
-        return super(SaltYamlSafeLoader, self).construct_scalar(node)
+        return super(SaltYamlConstructorMixin, self).construct_scalar(node)
 
     def construct_yaml_str(self, node):
         value = self.construct_scalar(node)
@@ -169,14 +174,63 @@ class SaltYamlSafeLoader(yaml.SafeLoader):
             node.value = mergeable_items + node.value
 
 
-def load(stream, Loader=SaltYamlSafeLoader):
+class SaltYamlSafeLoader(SaltYamlConstructorMixin, yaml.SafeLoader):
+    '''
+    Create a custom YAML loader that uses the custom constructor, on top of
+    the pure Python YAML parser.
+    '''
+
+
+if HAS_LIBYAML:
+    class SaltYamlCSafeLoader(SaltYamlConstructorMixin, yaml.CSafeLoader):  # pylint: disable=no-member
+        '''
+        Create a custom YAML loader that uses the custom constructor, on top
+        of the libyaml parser.
+        '''
+else:
+    SaltYamlCSafeLoader = SaltYamlSafeLoader
+
+
+def fast_load(stream, dictclass=dict):
+    '''
+    .. versionadded:: Fluorine
+
+    Load the YAML stream with the SaltYamlCSafeLoader. libyaml reports errors
+    without the YAML document they are found in, so a stream which fails to
+    load is loaded again with the SaltYamlSafeLoader to raise its error.
+    '''
+    if hasattr(stream, 'read'):
+        stream = stream.read()
+    # libyaml does not accept string subclasses like jinja2.Markup
+    if isinstance(stream, six.text_type):
+        stream = six.text_type(stream)
+    elif isinstance(stream, six.binary_type):
+        stream = six.binary_type(stream)
+    try:
+        return yaml.load(
+            stream,
+            Loader=functools.partial(SaltYamlCSafeLoader, dictclass=dictclass))
+    except (yaml.YAMLError, TypeError):
+        # TypeError is raised by libyaml for unsupported input types
+        if SaltYamlCSafeLoader is SaltYamlSafeLoader:
+            raise
+    return yaml.load(
+        stream,
+        Loader=functools.partial(SaltYamlSafeLoader, dictclass=dictclass))
+
+
+def load(stream, Loader=None):
+    if Loader is None:
+        return fast_load(stream)
     return yaml.load(stream, Loader=Loader)
 
 
-def safe_load(stream, Loader=SaltYamlSafeLoader):
+def safe_load(stream, Loader=None):
     '''
     .. versionadded:: 2018.3.0
 
     Helper function which automagically uses our custom loader.
     '''
+    if Loader is None:
+        return fast_load(stream)
     return yaml.load(stream, Loader=Loader)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+'''
+Measure how the time the state runtime spends on resolving requisites scales
+with the number of low chunks.
+
+Usage: python tests/perf/requisites.py [count [count ...]]
+
+Every chunk is a test.succeed_without_changes state requiring the previous
+chunk by id and watching it by name. The chunks past the first hundred also
+require the sls of the first hundred chunks, so the run time is dominated by
+the requisite resolution.
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import sys
+import tempfile
+import time
+
+# Import salt libs
+import salt.config
+import salt.state
+from salt.utils.odict import OrderedDict
+
+
+def make_high(count):
+    '''
+    Return high data of count chained states
+    '''
+    high = OrderedDict()
+    for num in range(count):
+        args = ['succeed_without_changes', {'name': 'name{0:06d}'.format(num)}]
+        if num:
+            require = [{'id': 'state{0:06d}'.format(num - 1)}]
+            if num >= 100:
+                require.append({'sls': 'sls0'})
+            args.append({'require': require})
+            args.append({'watch': [{'test': 'name{0:06d}'.format(num - 1)}]})
+        high['state{0:06d}'.format(num)] = {'test': args,
+                                        '__sls__': 'sls{0}'.format(num // 100),
+                                        '__env__': 'base'}
+    return high
+
+
+def run(state, count):
+    '''
+    Run the high data of count states and return the run time and result
+    '''
+    high = make_high(count)
+    start = time.time()
+    ret = state.call_high(high)
+    duration = time.time() - start
+    return duration, all(item['result'] for item in ret.values())
+
+
+def main(counts):
+    opts = salt.config.minion_config(None)
+    opts['file_client'] = 'local'
+    opts['cachedir'] = tempfile.mkdtemp()
+    opts['grains'] = {}
+    opts['pillar'] = {}
+    state = salt.state.State(opts, pillar_override={})
+    print('{0:>8} {1:>10} {2:>14}'.format('chunks', 'seconds', 'ms per chunk'))
+    for count in counts:
+        duration, success = run(state, count)
+        print('{0:>8} {1:>10.2f} {2:>14.3f}{3}'.format(
+            count, duration, duration * 1000 / count, '' if success else ' (failed)'))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [500, 1000, 2000, 4000])
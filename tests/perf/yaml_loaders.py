@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+'''
+Compare the pure Python and the libyaml based Salt YAML loaders on a corpus of
+SLS files.
+
+Usage: python tests/perf/yaml_loaders.py [path [path ...]]
+
+Every path is a SLS file or a directory searched for SLS files, by default the
+SLS files of the integration tests. Files using Jinja, or failing to load
+with the pure Python loader, are skipped. Each file is loaded into ordered
+dicts like the yaml renderer does.
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import functools
+import os
+import sys
+import time
+
+# Import salt libs
+import salt.utils.files
+import salt.utils.stringutils
+import salt.utils.yamlloader
+from salt.utils.odict import OrderedDict
+
+ROUNDS = 20
+
+
+def find_sls(paths):
+    '''
+    Yield the SLS files in paths
+    '''
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith('.sls'):
+                    yield os.path.join(root, name)
+
+
+def load_corpus(paths):
+    '''
+    Return the contents of the SLS files the pure Python loader can load
+    '''
+    corpus = []
+    for path in find_sls(paths):
+        with salt.utils.files.fopen(path, 'rb') as fp_:
+            data = salt.utils.stringutils.to_unicode(fp_.read())
+        if '{{' in data or '{%' in data:
+            continue
+        try:
+            run(salt.utils.yamlloader.SaltYamlSafeLoader, [data], 1)
+        except Exception:  # pylint: disable=broad-except
+            continue
+        corpus.append(data)
+    return corpus
+
+
+def run(loader, corpus, rounds):
+    '''
+    Load the corpus rounds times with loader and return the run time
+    '''
+    loader = functools.partial(loader, dictclass=OrderedDict)
+    start = time.time()
+    for _ in range(rounds):
+        for data in corpus:
+            salt.utils.yamlloader.load(data, Loader=loader)
+    return time.time() - start
+
+
+def main(paths):
+    corpus = load_corpus(paths)
+    size = sum(len(data) for data in corpus)
+    print('{0} SLS files, {1} bytes, {2} rounds'.format(len(corpus), size, ROUNDS))
+    loaders = [('python', salt.utils.yamlloader.SaltYamlSafeLoader)]
+    if salt.utils.yamlloader.HAS_LIBYAML:
+        loaders.append(('libyaml', salt.utils.yamlloader.SaltYamlCSafeLoader))
+    else:
+        print('libyaml is not available')
+    print('{0:>8} {1:>10} {2:>10}'.format('loader', 'seconds', 'MB/s'))
+    for name, loader in loaders:
+        duration = run(loader, corpus, ROUNDS)
+        print('{0:>8} {1:>10.2f} {2:>10.2f}'.format(
+            name, duration, size * ROUNDS / duration / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or [os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'integration', 'files')])
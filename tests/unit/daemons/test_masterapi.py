@@ -4,14 +4,19 @@
 from __future__ import absolute_import, print_function, unicode_literals
 from functools import wraps
 import io
+import os
+import shutil
 import stat
+import tempfile
 
 # Import Salt libs
 import salt.config
 import salt.daemons.masterapi as masterapi
+import salt.utils.files
 import salt.utils.platform
 
 # Import Salt Testing Libs
+from tests.support.paths import TMP
 from tests.support.unit import TestCase, skipIf
 from tests.support.mock import (
     patch,
@@ -604,3 +609,34 @@ class RemoteFuncsTestCase(TestCase):
         This is what minions before Nitrogen would issue.
         '''
         self.test_mine_get(tgt_type_key='expr_form')
+
+
+class CleanFsbackendTestCase(TestCase):
+    '''
+    TestCase for salt.daemons.masterapi.clean_fsbackend
+    '''
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.cachedir, ignore_errors=True)
+
+    def _write(self, *parts):
+        path = os.path.join(self.cachedir, *parts)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with salt.utils.files.fopen(path, 'w'):
+            pass
+        return path
+
+    def test_legacy_hashes(self):
+        self._write('roots', 'hash', 'base', 'top.sls.hash.sha256')
+        self._write('minionfs', 'hash', 'base', 'minion', 'file.hash.sha256')
+        legacy = self._write('gitfs', 'hash', 'base', 'top.sls.hash.sha256')
+        blob = self._write('gitfs', 'hash', 'base', 'top.sls.hash.blob_sha1')
+        mtime_map = self._write('roots', 'mtime_map')
+        masterapi.clean_fsbackend({'cachedir': self.cachedir,
+                                   'fileserver_backend': ['roots', 'git']})
+        self.assertFalse(os.path.exists(os.path.join(self.cachedir, 'roots', 'hash')))
+        self.assertFalse(os.path.exists(os.path.join(self.cachedir, 'minionfs', 'hash')))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertTrue(os.path.isfile(blob))
+        self.assertTrue(os.path.isfile(mtime_map))
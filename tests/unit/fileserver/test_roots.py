@@ -5,8 +5,10 @@
 
 # Import Python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import collections
 import copy
 import os
+import shutil
 import tempfile
 
 # Import Salt Testing libs
@@ -14,12 +16,15 @@ from tests.integration import AdaptedConfigurationTestCaseMixin
 from tests.support.mixins import LoaderModuleMockMixin
 from tests.support.paths import FILES, TMP, TMP_STATE_TREE
 from tests.support.unit import TestCase, skipIf
-from tests.support.mock import patch, NO_MOCK, NO_MOCK_REASON
+from tests.support.mock import patch, MagicMock, NO_MOCK, NO_MOCK_REASON
 
 # Import Salt libs
+import salt.fileserver
 import salt.fileserver.roots as roots
 import salt.fileclient
+import salt.payload
 import salt.utils.files
+import salt.utils.hashutils
 import salt.utils.platform
 
 try:
@@ -201,3 +206,214 @@ class RootsLimitTraversalTest(TestCase, AdaptedConfigurationTestCaseMixin):
         self.assertIn('test_deep.test', ret)
         self.assertIn('test_deep.a.test', ret)
         self.assertNotIn('test_deep.b.2.test', ret)
+
+
+FakeEvent = collections.namedtuple('FakeEvent', 'mask pathname dir')
+
+
+class FakeInotify(object):
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CLOSE_WRITE = 0x8
+    IN_Q_OVERFLOW = 0x4000
+    WatchManager = MagicMock()
+    Notifier = MagicMock(return_value=MagicMock(
+        check_events=MagicMock(return_value=False)))
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class RootsInotifyTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderModuleMockMixin):
+    '''
+    Maintaining the file lists from inotify events
+    '''
+    def setup_loader_modules(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.root = os.path.join(self.tmp_dir, 'root')
+        self.opts = self.get_temp_config('master')
+        self.opts.update({'cachedir': os.path.join(self.tmp_dir, 'cache'),
+                          'file_roots': {'base': [self.root]},
+                          'roots_inotify': True,
+                          '__fileserver_update': True})
+        return {roots: {'__opts__': self.opts,
+                        '__context__': {},
+                        'pyinotify': FakeInotify,
+                        'HAS_PYINOTIFY': True}}
+
+    def setUp(self):
+        for path in ('a/one', 'a/b/two', 'c/three', 'four'):
+            self._write(path)
+        os.makedirs(os.path.join(self.root, 'empty'))
+
+    def _write(self, path):
+        path = os.path.join(self.root, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write(path)
+
+    def test_update_file_lists(self):
+        ret = roots._walk_file_roots('base')
+        self._write('a/b/c/five')
+        self._write('empty/six')
+        shutil.rmtree(os.path.join(self.root, 'a', 'b'))
+        os.remove(os.path.join(self.root, 'c', 'three'))
+        for rel_path in ('a/b', 'empty/six', 'c/three'):
+            roots._update_file_lists(ret, 'base', rel_path)
+        self.assertEqual(ret, roots._walk_file_roots('base'))
+        self.assertEqual(roots._sorted_file_lists(ret)['files'],
+                         ['a/one', 'empty/six', 'four'])
+        self.assertEqual(sorted(ret['empty_dirs']), ['c'])
+
+    def _events(self, *events):
+        roots.__context__['roots.watcher'].queue.extend(
+            FakeEvent(mask, os.path.join(self.root, path), is_dir)
+            for mask, path, is_dir in events)
+
+    def _file_list(self):
+        list_cache, _ = roots._list_cache_paths('base')
+        with salt.utils.files.fopen(list_cache, 'rb') as fp_:
+            return salt.payload.Serial(self.opts).load(fp_)['files']
+
+    def test_update_from_events(self):
+        data = roots._update_from_events()
+        self.assertTrue(data['changed'])
+        self.assertEqual(self._file_list(), ['a/b/two', 'a/one', 'c/three', 'four'])
+
+        self._write('c/five')
+        self._write('four')
+        os.remove(os.path.join(self.root, 'a', 'one'))
+        self._events((FakeInotify.IN_CREATE, 'c/five', False),
+                     (FakeInotify.IN_CLOSE_WRITE, 'c/five', False),
+                     (FakeInotify.IN_CLOSE_WRITE, 'four', False),
+                     (FakeInotify.IN_DELETE, 'a/one', False))
+        with patch('os.walk', MagicMock(side_effect=AssertionError)):
+            data = roots._update_from_events()
+        self.assertTrue(data['changed'])
+        self.assertEqual(
+            data['files'],
+            {'added': [os.path.join(self.root, 'c', 'five')],
+             'changed': [os.path.join(self.root, 'four')],
+             'removed': [os.path.join(self.root, 'a', 'one')]})
+        self.assertEqual(self._file_list(), ['a/b/two', 'c/five', 'c/three', 'four'])
+        self.assertEqual(roots.file_list({'saltenv': 'base'}),
+                         ['a/b/two', 'c/five', 'c/three', 'four'])
+
+        data = roots._update_from_events()
+        self.assertFalse(data['changed'])
+
+    def test_overflow(self):
+        roots._update_from_events()
+        self._write('five')
+        self._events((FakeInotify.IN_Q_OVERFLOW, '', False))
+        data = roots._update_from_events()
+        self.assertTrue(data['changed'])
+        self.assertIn('five', self._file_list())
+
+    def test_watch_failed(self):
+        add_watch = MagicMock(return_value={self.root: 1, os.path.join(self.root, 'a'): -2})
+        with patch.object(FakeInotify.WatchManager.return_value, 'add_watch', add_watch):
+            self.assertTrue(roots._inotify_enabled())
+            self.assertIsNone(roots._update_from_events())
+            self.assertFalse(roots._inotify_enabled())
+            self.assertNotIn('roots.watcher', roots.__context__)
+
+            # The update walks the file_roots and does not try to watch them again
+            roots.update()
+            self.assertEqual(add_watch.call_count, 1)
+            self.assertTrue(os.path.isfile(
+                os.path.join(self.opts['cachedir'], 'roots', 'mtime_map')))
+
+    def test_update_other_process(self):
+        failed_path = roots._inotify_failed_path()
+        os.makedirs(os.path.dirname(failed_path))
+        with salt.utils.files.fopen(failed_path, 'w'):
+            pass
+        add_watch = FakeInotify.WatchManager.return_value.add_watch
+        add_watch.reset_mock()
+        with patch.dict(self.opts, {'__fileserver_update': False}):
+            roots.update()
+        add_watch.assert_not_called()
+        self.assertNotIn('roots.watcher', roots.__context__)
+        self.assertTrue(os.path.isfile(failed_path))
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.opts['cachedir'], 'roots', 'mtime_map')))
+
+    def test_watch_created_dir_failed(self):
+        roots._update_from_events()
+        self._write('new/five')
+        self._events((FakeInotify.IN_CREATE, 'new', True))
+        get_wd = MagicMock(return_value=None)
+        with patch.object(FakeInotify.WatchManager.return_value, 'get_wd', get_wd):
+            self.assertIsNone(roots._update_from_events())
+        self.assertFalse(roots._inotify_enabled())
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class RootsHashCacheTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderModuleMockMixin):
+    '''
+    Serving the file hashes from the shared hash cache
+    '''
+    def setup_loader_modules(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.root = os.path.join(self.tmp_dir, 'root')
+        os.makedirs(self.root)
+        self.opts = self.get_temp_config('master')
+        self.opts.update({'cachedir': os.path.join(self.tmp_dir, 'cache'),
+                          'file_roots': {'base': [self.root]}})
+        patcher = patch.dict(salt.fileserver._HASH_CACHES, {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return {roots: {'__opts__': self.opts}}
+
+    def _write(self, data):
+        with salt.utils.files.fopen(os.path.join(self.root, 'testfile'), 'w') as fp_:
+            fp_.write(data)
+
+    def _file_hash(self):
+        load = {'saltenv': 'base', 'path': 'testfile'}
+        return roots.file_hash(load, roots.find_file('testfile'))
+
+    def test_file_hash_cached(self):
+        self._write('one')
+        get_hash = MagicMock(side_effect=salt.utils.hashutils.get_hash)
+        with patch('salt.utils.hashutils.get_hash', get_hash):
+            ret = self._file_hash()
+            self.assertEqual(ret, {'hash_type': 'sha256',
+                                   'hsum': salt.utils.hashutils.sha256_digest('one')})
+            self.assertEqual(self._file_hash(), ret)
+            self.assertEqual(get_hash.call_count, 1)
+
+            # Another process mapping the same table gets the cached hash
+            salt.fileserver._HASH_CACHES.clear()
+            self.assertEqual(self._file_hash(), ret)
+            self.assertEqual(get_hash.call_count, 1)
+
+            self._write('three')
+            self.assertEqual(self._file_hash()['hsum'],
+                             salt.utils.hashutils.sha256_digest('three'))
+            self.assertEqual(get_hash.call_count, 2)
+
+    def test_file_hash_cache_disabled(self):
+        self.opts['fileserver_hash_cache_size'] = 0
+        self._write('one')
+        get_hash = MagicMock(side_effect=salt.utils.hashutils.get_hash)
+        with patch('salt.utils.hashutils.get_hash', get_hash):
+            self._file_hash()
+            self._file_hash()
+        self.assertEqual(get_hash.call_count, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.opts['cachedir'], 'fileserver')))
+
+    def test_corrupted_slot(self):
+        self._write('one')
+        self._file_hash()
+        cache = salt.fileserver._hash_cache(self.opts)
+        cache.map[:] = b'\x01' * len(cache.map)
+        get_hash = MagicMock(side_effect=salt.utils.hashutils.get_hash)
+        with patch('salt.utils.hashutils.get_hash', get_hash):
+            self.assertEqual(self._file_hash()['hsum'],
+                             salt.utils.hashutils.sha256_digest('one'))
+        self.assertEqual(get_hash.call_count, 1)
@@ -17,6 +17,8 @@ import collections
 import sys
 import imp
 import copy
+import threading
+import time
 
 # Import Salt Testing libs
 from tests.support.unit import TestCase
@@ -25,6 +27,7 @@ from tests.support.paths import TMP
 
 # Import Salt libs
 import salt.config
+import salt.loader
 import salt.utils.files
 import salt.utils.stringutils
 # pylint: disable=import-error,no-name-in-module,redefined-builtin
@@ -955,3 +958,117 @@ class LazyLoaderDeepSubmodReloadingTest(TestCase):
                 self.update_lib(lib)
                 self.loader.clear()
                 self._verify_libs()
+
+
+class LazyGrainsCacheTest(TestCase):
+    '''
+    Test the cache of the results of the expensive grain functions
+    '''
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.opts = {'cachedir': self.cachedir,
+                     'grains_lazy': {'core.fqdns': 3600, 'zfs.*': 0}}
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+        del self.opts
+        del self.calls
+
+    def _grain(self, *args):
+        self.calls.append(args)
+        return {'fqdns': ['minion.example.com']}
+
+    def _call(self, key):
+        cache = salt.loader._LazyGrainsCache(self.opts)
+        ret = cache.call(key, self._grain)
+        cache.save()
+        return ret
+
+    def test_cached(self):
+        '''
+        The result is reused across grains loads until it expires
+        '''
+        for _ in range(2):
+            self.assertEqual(self._call('core.fqdns'), {'fqdns': ['minion.example.com']})
+        self.assertEqual(len(self.calls), 1)
+
+        with patch('time.time', return_value=time.time() + 3601):
+            self._call('core.fqdns')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_not_cached(self):
+        '''
+        The other grain functions and the ones cached for 0 seconds run on
+        every grains load
+        '''
+        for key in ('core.os_data', 'zfs.zfs'):
+            self._call(key)
+            self._call(key)
+        self.assertEqual(len(self.calls), 4)
+
+    def test_refresh_grains_cache(self):
+        '''
+        refresh_grains_cache ignores the cached results
+        '''
+        self._call('core.fqdns')
+        self.opts['refresh_grains_cache'] = True
+        self._call('core.fqdns')
+        self.assertEqual(len(self.calls), 2)
+
+
+class GrainFuncsRunTest(TestCase):
+    '''
+    Test running the grain functions concurrently
+    '''
+    def setUp(self):
+        self.opts = {'cachedir': TMP, 'grains_workers': 4, 'grains_timeout': 0}
+        self.lazy_cache = salt.loader._LazyGrainsCache(self.opts)
+        self.funcs = {
+            'core.one': lambda: {'one': 1},
+            'core.fail': lambda: {}['missing'],
+            'custom.two': lambda: {'two': 2},
+            'custom.proxy': lambda proxy: {'proxy': proxy},
+        }
+        self.keys = sorted(self.funcs)
+
+    def tearDown(self):
+        del self.opts
+        del self.lazy_cache
+        del self.funcs
+        del self.keys
+
+    def test_concurrent(self):
+        '''
+        The results of the concurrent and sequential runs are the same
+        '''
+        results = salt.loader._run_grain_funcs(
+            self.opts, self.funcs, self.keys, self.lazy_cache, 'myproxy')
+        self.opts['grains_workers'] = 0
+        sequential = salt.loader._run_grain_funcs(
+            self.opts, self.funcs, self.keys, self.lazy_cache, 'myproxy')
+        for ret in (results, sequential):
+            self.assertEqual(sorted(ret), self.keys)
+            self.assertEqual(ret['core.one'][:2], ('ok', {'one': 1}))
+            self.assertEqual(ret['custom.two'][:2], ('ok', {'two': 2}))
+            self.assertEqual(ret['custom.proxy'][:2], ('ok', {'proxy': 'myproxy'}))
+            self.assertEqual(ret['core.fail'][0], 'error')
+            self.assertIs(ret['core.fail'][1][0], KeyError)
+
+    def test_timeout(self):
+        '''
+        A hung grain function is skipped after grains_timeout seconds
+        '''
+        self.opts['grains_workers'] = 2
+        self.opts['grains_timeout'] = 1
+        hung = threading.Event()
+        self.addCleanup(hung.set)
+        self.funcs['custom.hung'] = lambda: hung.wait(30)
+        self.funcs['custom.hung2'] = lambda: hung.wait(30)
+        start = time.time()
+        results = salt.loader._run_grain_funcs(
+            self.opts, self.funcs, sorted(self.funcs), self.lazy_cache, None)
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual(results['custom.hung'][0], 'timeout')
+        self.assertEqual(results['custom.hung2'][0], 'timeout')
+        self.assertEqual(results['custom.two'][:2], ('ok', {'two': 2}))
@@ -18,6 +18,7 @@ from tests.support.mock import (
 
 # Import Salt libs
 from salt.exceptions import SaltException
+import salt.loader
 import salt.modules.grains as grainsmod
 import salt.utils.dictupdate as dictupdate
 
@@ -630,3 +631,14 @@ class GrainsModuleTestCase(TestCase, LoaderModuleMockMixin):
             self.assertTrue(res)
             res = grainsmod.equals('b:z', 'aval')
             self.assertFalse(res)
+
+    def test_timings(self):
+        with patch.dict(salt.loader.GRAINS_TIMINGS, {'core.os_data': 0.5,
+                                                     'core.fqdns': 2.0001,
+                                                     'disks.disks': 0.1},
+                        clear=True):
+            self.assertEqual(list(grainsmod.timings().items()),
+                             [('core.fqdns', 2.0),
+                              ('core.os_data', 0.5),
+                              ('disks.disks', 0.1)])
+            self.assertEqual(list(grainsmod.timings(top=1)), ['core.fqdns'])
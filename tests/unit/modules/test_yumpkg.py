@@ -3,6 +3,8 @@
 # Import Python Libs
 from __future__ import absolute_import
 import os
+import shutil
+import tempfile
 
 # Import Salt Testing Libs
 from tests.support.mixins import LoaderModuleMockMixin
@@ -18,6 +20,8 @@ from tests.support.mock import (
 # Import Salt libs
 import salt.modules.yumpkg as yumpkg
 import salt.modules.pkg_resource as pkg_resource
+import salt.utils.files
+import salt.utils.pkg.rpm
 
 LIST_REPOS = {
     'base': {
@@ -119,6 +123,47 @@ class YumTestCase(TestCase, LoaderModuleMockMixin):
                 self.assertTrue(pkgs.get(pkg_name))
                 self.assertEqual(pkgs[pkg_name], [pkg_version])
 
+    def test_list_pkgs_cache(self):
+        '''
+        Test that the package list is only read again from the rpm database
+        once the database changed
+        '''
+        def _add_data(data, key, value):
+            data.setdefault(key, []).append(value)
+
+        cachedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cachedir, ignore_errors=True)
+        rpmdb = os.path.join(cachedir, 'Packages')
+        with salt.utils.files.fopen(rpmdb, 'w') as fp_:
+            fp_.write('1')
+
+        rpm_run = MagicMock(return_value=os.linesep.join([
+            'alsa-lib_|-(none)_|-1.1.1_|-1.el7_|-x86_64_|-(none)_|-1487838475',
+            'shadow-utils_|-2_|-4.1.5.1_|-24.el7_|-x86_64_|-(none)_|-1487838481',
+        ]))
+        with patch.dict(yumpkg.__opts__, {'cachedir': cachedir, 'pkg_list_cache': True}), \
+             patch.object(salt.utils.pkg.rpm, 'DB_PATHS', (rpmdb,)), \
+             patch.dict(yumpkg.__salt__, {'cmd.run': rpm_run}), \
+             patch.dict(yumpkg.__salt__, {'pkg_resource.add_pkg': _add_data}), \
+             patch.dict(yumpkg.__salt__, {'pkg_resource.format_pkg_list': pkg_resource.format_pkg_list}), \
+             patch.dict(yumpkg.__salt__, {'pkg_resource.stringify': MagicMock()}):
+            expected = {'alsa-lib': ['1.1.1-1.el7'],
+                        'shadow-utils': ['2:4.1.5.1-24.el7']}
+            self.assertEqual(yumpkg.list_pkgs(versions_as_list=True), expected)
+            self.assertEqual(rpm_run.call_count, 1)
+
+            # A later job reuses the package list
+            yumpkg.__context__.pop('pkg.list_pkgs')
+            self.assertEqual(yumpkg.list_pkgs(versions_as_list=True), expected)
+            self.assertEqual(rpm_run.call_count, 1)
+
+            # Until the rpm database changes
+            yumpkg.__context__.pop('pkg.list_pkgs')
+            with salt.utils.files.fopen(rpmdb, 'w') as fp_:
+                fp_.write('12')
+            self.assertEqual(yumpkg.list_pkgs(versions_as_list=True), expected)
+            self.assertEqual(rpm_run.call_count, 2)
+
     def test_list_pkgs_with_attr(self):
         '''
         Test packages listing with the attr parameter
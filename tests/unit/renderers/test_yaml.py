@@ -9,6 +9,8 @@ from tests.support.unit import TestCase
 
 # Import Salt libs
 import salt.renderers.yaml as yaml
+from salt.exceptions import SaltRenderError
+from salt.ext import six
 
 
 class YAMLRendererTestCase(TestCase, LoaderModuleMockMixin):
@@ -27,3 +29,16 @@ class YAMLRendererTestCase(TestCase, LoaderModuleMockMixin):
         result = yaml.render(data)
 
         self.assertEqual(result, u'python unicode string')
+
+    def test_yaml_render_ordered(self):
+        data = 'b: 1\na: 2\nc: 3\n'
+        result = yaml.render(data)
+
+        self.assertEqual(list(result), ['b', 'a', 'c'])
+
+    def test_yaml_render_tab_error(self):
+        data = 'a:\n\t- b\n'
+        with self.assertRaises(SaltRenderError) as exc:
+            yaml.render(data)
+
+        self.assertIn('Illegal tab character', six.text_type(exc.exception))
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the segmented job cache (segment_cache).
+'''
+
+# Import Python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import datetime
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.paths import TMP
+from tests.support.unit import TestCase, skipIf
+from tests.support.mock import (
+    NO_MOCK,
+    NO_MOCK_REASON,
+)
+
+# Import Salt libs
+import salt.utils.platform
+import salt.returners.segment_cache as segment_cache
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(salt.utils.platform.is_windows(), 'segment_cache requires fcntl')
+class SegmentCacheTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the segment_cache returner
+    '''
+    def setup_loader_modules(self):
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.cachedir, ignore_errors=True)
+        self.addCleanup(segment_cache._INDEX.clear)
+        return {segment_cache: {'__opts__': {'cachedir': self.cachedir,
+                                             'keep_jobs': 24,
+                                             'hash_type': 'sha256',
+                                             'serial': 'msgpack'}}}
+
+    def _run_job(self, fun='test.ping', minions=('alpha', 'beta'), nocache=False):
+        jid = segment_cache.prep_jid(nocache=nocache)
+        load = {'jid': jid, 'fun': fun, 'arg': [], 'tgt': 'x', 'tgt_type': 'glob',
+                'user': 'root'}
+        segment_cache.save_load(jid, load, minions=list(minions))
+        for minion in minions:
+            segment_cache.returner({'jid': jid, 'id': minion, 'return': True,
+                                    'retcode': 0, 'success': True})
+        return jid
+
+    def test_job(self):
+        '''
+        The load and the returns of a job can be read back
+        '''
+        jid = self._run_job()
+        load = segment_cache.get_load(jid)
+        self.assertEqual(load['fun'], 'test.ping')
+        self.assertEqual(load['Minions'], ['alpha', 'beta'])
+        self.assertEqual(segment_cache.get_jid(jid), {
+            'alpha': {'return': True, 'retcode': 0, 'success': True},
+            'beta': {'return': True, 'retcode': 0, 'success': True},
+        })
+        self.assertEqual(segment_cache.get_load('20000101000000000000'), {})
+        self.assertEqual(segment_cache.get_jid('20000101000000000000'), {})
+
+    def test_duplicate_return(self):
+        '''
+        An extra return from the same minion is dropped
+        '''
+        jid = self._run_job(minions=['alpha'])
+        ret = segment_cache.returner({'jid': jid, 'id': 'alpha', 'return': False})
+        self.assertFalse(ret)
+        self.assertTrue(segment_cache.get_jid(jid)['alpha']['return'])
+
+    def test_nocache(self):
+        '''
+        Returns of nocache jobs are not stored
+        '''
+        jid = self._run_job(nocache=True)
+        self.assertEqual(segment_cache.get_jid(jid), {})
+
+    def test_returner_batch(self):
+        '''
+        A batch of returns is stored, dropping the duplicate returns
+        '''
+        jid1 = self._run_job(minions=['alpha'])
+        jid2 = self._run_job(minions=[])
+        segment_cache.returner_batch([
+            {'jid': jid1, 'id': 'alpha', 'return': False},
+            {'jid': jid1, 'id': 'beta', 'return': True},
+            {'jid': jid2, 'id': 'alpha', 'return': 1},
+            {'jid': jid2, 'id': 'alpha', 'return': 2},
+        ])
+        self.assertEqual(segment_cache.get_jid(jid1),
+                         {'alpha': {'return': True, 'retcode': 0, 'success': True},
+                          'beta': {'return': True}})
+        self.assertEqual(segment_cache.get_jid(jid2), {'alpha': {'return': 1}})
+
+    def test_returner_batch_job_records(self):
+        '''
+        The jid and the load of a job unknown to the job cache are stored
+        along with a batch of its returns
+        '''
+        jid = '20180101000000000000'
+        segment_cache.returner_batch([
+            {'jid': jid, 'id': 'alpha', 'fun': 'test.ping', 'return': True},
+            {'jid': jid, 'id': 'beta', 'fun': 'test.ping', 'return': True},
+        ])
+        segment_cache.returner_batch([
+            {'jid': jid, 'id': 'gamma', 'fun': 'test.ping', 'return': True},
+        ])
+        _, entries = segment_cache._jid_entries(jid)
+        self.assertEqual(sorted(entry[0] for entry in entries),
+                         ['jid', 'load', 'return', 'return', 'return'])
+        self.assertEqual(segment_cache.get_load(jid)['fun'], 'test.ping')
+        self.assertEqual(sorted(segment_cache.get_jid(jid)), ['alpha', 'beta', 'gamma'])
+
+    def test_store_job_records(self):
+        '''
+        The jid and the load of a job are recorded once, however many returns
+        pass them again
+        '''
+        jid = self._run_job(minions=[])
+        for minion in ('alpha', 'beta', 'gamma'):
+            self.assertEqual(segment_cache.prep_jid(False, passed_jid=jid), jid)
+            segment_cache.save_load(jid, {'jid': jid, 'id': minion, 'return': True})
+            segment_cache.returner({'jid': jid, 'id': minion, 'return': True})
+        _, entries = segment_cache._jid_entries(jid)
+        self.assertEqual(sorted(entry[0] for entry in entries),
+                         ['jid', 'load', 'minions', 'return', 'return', 'return'])
+        self.assertEqual(segment_cache.get_load(jid)['fun'], 'test.ping')
+
+    def test_syndic_minions(self):
+        '''
+        The minion lists of all the syndic masters are merged
+        '''
+        jid = self._run_job(minions=['alpha'])
+        segment_cache.save_minions(jid, ['gamma'], syndic_id='syndic1')
+        self.assertEqual(segment_cache.get_load(jid)['Minions'], ['alpha', 'gamma'])
+
+    def test_get_jids(self):
+        '''
+        Jobs are listed and filtered
+        '''
+        jids = [self._run_job(), self._run_job(fun='saltutil.find_job'), self._run_job()]
+        self.assertEqual(sorted(segment_cache.get_jids()), sorted(jids))
+        ret = segment_cache.get_jids_filter(5)
+        self.assertEqual([job['JID'] for job in ret], [jids[0], jids[2]])
+        ret = segment_cache.get_jids_filter(1, filter_find_job=False)
+        self.assertEqual([job['JID'] for job in ret], [jids[2]])
+
+    def test_endtime(self):
+        '''
+        The end time of a job is stored
+        '''
+        jid = self._run_job()
+        self.assertFalse(segment_cache.get_endtime(jid))
+        segment_cache.update_endtime(jid, '2018, Jan 01 00:00:00.000000')
+        self.assertEqual(segment_cache.get_endtime(jid), '2018, Jan 01 00:00:00.000000')
+
+    def test_clean_old_jobs(self):
+        '''
+        Only the expired segments are removed
+        '''
+        old = (datetime.datetime.now() - datetime.timedelta(hours=26)).strftime('%Y%m%d%H%M%S%f')
+        old_jid = segment_cache.prep_jid(passed_jid=old)
+        jid = self._run_job()
+        segment_cache.clean_old_jobs()
+        segments = os.listdir(os.path.join(self.cachedir, 'job_segments'))
+        self.assertNotIn(old_jid[:10] + '.seg', segments)
+        self.assertIn(jid[:10] + '.seg', segments)
+        self.assertEqual(segment_cache.get_load(jid)['fun'], 'test.ping')
+
+    def test_prune_index(self):
+        '''
+        The in-memory index of the segments removed by another process is
+        dropped
+        '''
+        old = (datetime.datetime.now() - datetime.timedelta(hours=26)).strftime('%Y%m%d%H%M%S%f')
+        segment_cache.prep_jid(passed_jid=old)
+        segment_cache.get_load(old)
+        self.assertIn(old[:10], segment_cache._INDEX)
+        for ext in (segment_cache.INDEX_EXT, segment_cache.SEGMENT_EXT):
+            os.remove(segment_cache._segment_path(old[:10], ext))
+        jid = self._run_job()
+        self.assertEqual(list(segment_cache._INDEX), [jid[:10]])
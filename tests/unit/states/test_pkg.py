@@ -15,6 +15,7 @@ from tests.support.mock import (
 # Import Salt Libs
 from salt.ext import six
 import salt.states.pkg as pkg
+import salt.utils.state
 
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
@@ -176,3 +177,88 @@ class PkgTestCase(TestCase, LoaderModuleMockMixin):
                 ret = pkg.uptodate('dummy', test=True, pkgs=[pkgname for pkgname in six.iterkeys(self.pkgs)])
                 self.assertIsNone(ret['result'])
                 self.assertDictEqual(ret['changes'], pkgs)
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class PkgAggregateTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Test cases for salt.states.pkg.mod_aggregate
+    '''
+    def setup_loader_modules(self):
+        return {
+            pkg: {
+                '__utils__': {'state.gen_tag': salt.utils.state.gen_tag}
+            }
+        }
+
+    @staticmethod
+    def _chunk(name, fun='installed', **kwargs):
+        chunk = {'state': 'pkg', 'fun': fun, 'name': name, '__id__': name,
+                 '__sls__': 'pkgs', '__env__': 'base'}
+        chunk.update(kwargs)
+        return chunk
+
+    def test_aggregate_installed_and_latest(self):
+        '''
+        The packages of the installed and latest chunks are installed together
+        '''
+        chunks = [self._chunk('pkga'),
+                  self._chunk('pkgb', version='1.2'),
+                  self._chunk('pkgc', fun='latest'),
+                  self._chunk('pkgd', fun='removed')]
+        low = pkg.mod_aggregate(chunks[0], chunks, {})
+        self.assertEqual(low['pkgs'],
+                         ['pkga', {'pkgb': '1.2'}, {'pkgc': 'latest'}])
+        self.assertTrue(chunks[1]['__agg__'])
+        self.assertTrue(chunks[2]['__agg__'])
+        self.assertNotIn('__agg__', chunks[3])
+
+    def test_aggregate_latest(self):
+        '''
+        The installed chunks are not upgraded by a latest chunk
+        '''
+        chunks = [self._chunk('pkga', fun='latest'),
+                  self._chunk('pkgb'),
+                  self._chunk('pkgc', fun='latest', pkgs=['pkgd', 'pkge'])]
+        low = pkg.mod_aggregate(chunks[0], chunks, {})
+        self.assertEqual(low['pkgs'], ['pkga', 'pkgd', 'pkge'])
+
+    def test_aggregate_options(self):
+        '''
+        Only the chunks with the same options and without conditions are
+        aggregated
+        '''
+        chunks = [self._chunk('pkga', refresh=True),
+                  self._chunk('pkgb', refresh=True, order=10),
+                  self._chunk('pkgc'),
+                  self._chunk('pkgd', refresh=True, fromrepo='epel'),
+                  self._chunk('pkge', refresh=True, unless='true'),
+                  self._chunk('pkgf', refresh=True, watch=[{'id': 'pkga'}])]
+        low = pkg.mod_aggregate(chunks[0], chunks, {})
+        self.assertEqual(low['pkgs'], ['pkga', 'pkgb'])
+
+    def test_aggregate_requisites(self):
+        '''
+        Only the chunks whose requisites are met or aggregated too are
+        aggregated
+        '''
+        chunks = [self._chunk('pkga'),
+                  self._chunk('pkgb', require=[{'pkg': 'pkga'}]),
+                  self._chunk('pkgc', require=[{'file': 'repo'}]),
+                  self._chunk('pkgd', require=[{'file': 'done'}]),
+                  self._chunk('pkge', require=[{'file': 'failed'}]),
+                  self._chunk('pkgf', require=[{'id': 'pkgc'}]),
+                  self._chunk('pkgg', require=[{'sls': 'missing'}])]
+        for name in ('repo', 'done', 'failed'):
+            chunks.append({'state': 'file', 'fun': 'managed', 'name': name,
+                           '__id__': name, '__sls__': 'files',
+                           '__env__': 'base'})
+        running = {
+            'file_|-done_|-done_|-managed': {'result': True},
+            'file_|-failed_|-failed_|-managed': {'result': False},
+        }
+        low = pkg.mod_aggregate(chunks[0], chunks, running)
+        self.assertEqual(low['pkgs'], ['pkga', 'pkgb', 'pkgd'])
+        for chunk in chunks[2:7]:
+            if chunk['name'] != 'pkgd':
+                self.assertNotIn('__agg__', chunk)
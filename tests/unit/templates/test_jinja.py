@@ -9,6 +9,7 @@ import datetime
 import os
 import pprint
 import re
+import shutil
 import tempfile
 
 # Import Salt Testing libs
@@ -28,7 +29,9 @@ from salt.ext.six.moves import builtins
 
 import salt.utils.json
 from salt.utils.decorators.jinja import JinjaFilter
+import salt.utils.jinja
 from salt.utils.jinja import (
+    SaltBytecodeCache,
     SaltCacheLoader,
     SerializerExtension,
     ensure_sequence_filter
@@ -521,6 +524,114 @@ class TestJinjaDefaultOptions(TestCase):
         self.assertEqual(rendered, 'onetwothree')
 
 
+class TestJinjaBytecodeCache(TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        # The loader reads the templates from the file_roots when they are
+        # the pillar_roots
+        file_roots = {'test': [os.path.join(TEMPLATES_DIR, 'files', 'test')]}
+        self.local_opts = {
+            'cachedir': self.cachedir,
+            'file_client': 'remote',
+            'file_roots': file_roots,
+            'pillar_roots': file_roots,
+            'jinja_bytecode_cache': True,
+        }
+        self.tmplpath = os.path.join(TEMPLATES_DIR, 'files', 'test', 'hello_import')
+        with salt.utils.files.fopen(self.tmplpath) as fp_:
+            self.tmplstr = salt.utils.stringutils.to_unicode(fp_.read())
+
+    def tearDown(self):
+        salt.utils.jinja._BYTECODE_CACHES.clear()
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def render(self, tmplstr=None, opts=None):
+        fc = MockFileClient()
+        with patch.object(SaltCacheLoader, 'file_client', MagicMock(return_value=fc)):
+            return render_jinja_tmpl(
+                self.tmplstr if tmplstr is None else tmplstr,
+                dict(opts=opts or self.local_opts, saltenv='test', salt={}),
+                tmplpath=self.tmplpath)
+
+    def count_compiles(self, *args, **kwargs):
+        compile_ = Environment.compile
+        compiles = []
+
+        def _compile(env, source, *c_args, **c_kwargs):
+            compiles.append(source)
+            return compile_(env, source, *c_args, **c_kwargs)
+
+        with patch.object(Environment, 'compile', _compile):
+            out = self.render(*args, **kwargs)
+        return out, len(compiles)
+
+    def test_cached_render(self):
+        '''
+        The template and the imported macros are only compiled once
+        '''
+        self.assertEqual(self.count_compiles(),
+                         ('Hey world !a b !' + os.linesep, 2))
+        self.assertEqual(self.count_compiles(),
+                         ('Hey world !a b !' + os.linesep, 0))
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.cachedir, 'jinja'))), 2)
+
+    def test_cached_on_disk(self):
+        '''
+        A new process loads the compiled templates from the cachedir
+        '''
+        self.render()
+        salt.utils.jinja._BYTECODE_CACHES.clear()
+        self.assertEqual(self.count_compiles(),
+                         ('Hey world !a b !' + os.linesep, 0))
+
+    def test_changed_source(self):
+        '''
+        A changed template source is compiled again
+        '''
+        self.render()
+        self.assertEqual(self.count_compiles(tmplstr='{{ 1 + 1 }}'), ('2', 1))
+        self.assertEqual(self.count_compiles(tmplstr='{{ 1 + 1 }}'), ('2', 0))
+
+    def test_environment_options(self):
+        '''
+        The compiled code is not shared between different environment options
+        '''
+        tmplstr = '%- set myvar = 1\n{{ 2 }}'
+        self.assertEqual(self.count_compiles(tmplstr=tmplstr),
+                         ('%- set myvar = 1\n2', 1))
+        opts = dict(self.local_opts,
+                    jinja_env={'line_statement_prefix': '%'})
+        self.assertEqual(self.count_compiles(tmplstr=tmplstr, opts=opts),
+                         ('2', 1))
+
+    def test_corrupt_cache(self):
+        '''
+        Unreadable cache files are ignored
+        '''
+        self.render()
+        salt.utils.jinja._BYTECODE_CACHES.clear()
+        cachedir = os.path.join(self.cachedir, 'jinja')
+        for fn_ in os.listdir(cachedir):
+            with salt.utils.files.fopen(os.path.join(cachedir, fn_), 'wb') as fp_:
+                fp_.write(b'garbage')
+        self.assertEqual(self.count_compiles(),
+                         ('Hey world !a b !' + os.linesep, 2))
+
+    def test_disabled(self):
+        '''
+        Without jinja_bytecode_cache every render compiles the templates
+        '''
+        opts = dict(self.local_opts, jinja_bytecode_cache=False)
+        self.assertEqual(self.count_compiles(opts=opts)[1], 2)
+        self.assertEqual(self.count_compiles(opts=opts)[1], 2)
+        self.assertFalse(os.path.exists(os.path.join(self.cachedir, 'jinja')))
+        self.assertIsInstance(
+            salt.utils.jinja.get_bytecode_cache(self.local_opts),
+            SaltBytecodeCache)
+
+
 class TestCustomExtensions(TestCase):
 
     def __init__(self, *args, **kws):
@@ -7,12 +7,19 @@
 from __future__ import absolute_import
 import errno
 import os
+import shutil
+import tempfile
 
 # Import Salt Testing libs
-from tests.support.mock import patch, Mock
+from tests.support.mock import patch, Mock, MagicMock
+from tests.support.paths import TMP
 from tests.support.unit import TestCase
 
 # Import Salt libs
+import salt.config
+import salt.fileclient
+import salt.fileserver
+import salt.utils.files
 from salt.ext.six.moves import range
 from salt.fileclient import Client
 
@@ -50,3 +57,144 @@ class FileclientTestCase(TestCase):
                 with self.assertRaises(OSError):
                     with Client(self.opts)._cache_loc('testfile') as c_ref_itr:
                         assert c_ref_itr == '/__test__/files/base/testfile'
+
+
+class RemoteClientTransferTestCase(TestCase):
+    '''
+    Fetching files from the master several chunks per request, only the
+    blocks which changed, or several small files at a time
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        file_roots = os.path.join(self.tmp_dir, 'roots')
+        os.makedirs(file_roots)
+        self.path = os.path.join(file_roots, 'big')
+        self._write(os.urandom(10 * 1024 + 100))
+
+        master_opts = salt.config.master_config(None)
+        master_opts.update({'cachedir': os.path.join(self.tmp_dir, 'master'),
+                            'file_roots': {'base': [file_roots]},
+                            'fileserver_backend': ['roots'],
+                            'file_buffer_size': 1024,
+                            'file_transfer_window': 4})
+        self.fs_ = salt.fileserver.Fileserver(master_opts)
+        self.opts = salt.config.minion_config(None)
+        self.opts['cachedir'] = os.path.join(self.tmp_dir, 'minion')
+
+    def _write(self, contents):
+        self.contents = contents
+        with salt.utils.files.fopen(self.path, 'wb') as fp_:
+            fp_.write(contents)
+
+    def _client(self):
+        self.loads = []
+
+        def _send(load, **kwargs):
+            self.loads.append(dict(load))
+            return getattr(self.fs_, load['cmd'].lstrip('_'))(dict(load))
+        channel = MagicMock()
+        channel.send.side_effect = _send
+        with patch('salt.transport.Channel.factory', MagicMock(return_value=channel)):
+            return salt.fileclient.RemoteClient(self.opts)
+
+    def _get_file(self, window, gzip=None):
+        self.opts['file_transfer_window'] = window
+        dest = self._client().get_file('salt://big', gzip=gzip)
+        with salt.utils.files.fopen(dest, 'rb') as fp_:
+            self.assertEqual(fp_.read(), self.contents)
+        return [load for load in self.loads if load['cmd'].startswith('_serve_file')]
+
+    def test_one_chunk_per_request(self):
+        loads = self._get_file(1)
+        self.assertEqual([load['loc'] for load in loads],
+                         [1024 * idx for idx in range(11)] + [10340])
+        self.assertNotIn('window', loads[0])
+
+    def test_window(self):
+        loads = self._get_file(8)
+        # The master caps the window to four chunks
+        self.assertEqual([load['loc'] for load in loads],
+                         [0, 4096, 8192, 10340])
+        self.assertEqual(loads[0]['window'], 8)
+
+    def test_window_gzip(self):
+        loads = self._get_file(4, gzip=5)
+        self.assertEqual(len(loads), 4)
+        self.assertEqual(loads[0]['gzip'], 5)
+
+    def test_delta(self):
+        self.opts['file_buffer_size'] = 4096
+        self.opts['file_delta_min_size'] = 1
+        self._write(os.urandom(16 * 4096))
+        self._get_file(1)
+        # Change one block, swap two others and append to the file
+        blocks = [self.contents[idx:idx + 4096]
+                  for idx in range(0, len(self.contents), 4096)]
+        blocks[2] = os.urandom(4096)
+        blocks[5], blocks[6] = blocks[6], blocks[5]
+        self._write(b''.join(blocks) + os.urandom(100))
+
+        loads = self._get_file(1, gzip=5)
+        # The master sends at most four of its 1024 bytes chunks per reply,
+        # so the two changed blocks come in separate replies
+        self.assertEqual([(load['cmd'], load['loc']) for load in loads],
+                         [('_serve_file_delta', 0),
+                          ('_serve_file_delta', 3),
+                          ('_serve_file_delta', 17)])
+        self.assertEqual(len(loads[0]['hashes']), 16)
+        blocks = []
+        for load in loads:
+            blocks.extend(self.fs_.serve_file_delta(dict(load))['blocks'])
+        self.assertEqual(
+            [block if isinstance(block, int) else None for block in blocks],
+            [0, 1, None, 3, 4, 6, 5] + list(range(7, 16)) + [None])
+
+    def test_delta_refused(self):
+        self.opts['file_buffer_size'] = 1024
+        self.opts['file_delta_min_size'] = 1
+        self._get_file(1)
+        self._write(os.urandom(10 * 1024))
+        # The master refuses blocks smaller than 4096 bytes
+        loads = self._get_file(1)
+        self.assertEqual(loads[0]['cmd'], '_serve_file_delta')
+        self.assertEqual(loads[1]['cmd'], '_serve_file')
+        self.assertEqual(
+            os.listdir(os.path.join(self.opts['cachedir'], 'files', 'base')),
+            ['big'])
+
+    def test_cache_dir(self):
+        tree = os.path.join(os.path.dirname(self.path), 'tree')
+        os.makedirs(tree)
+        for idx in range(20):
+            with salt.utils.files.fopen(os.path.join(tree, str(idx)), 'wb') as fp_:
+                fp_.write(os.urandom(100 * idx))
+        self.opts['file_buffer_size'] = 1024
+        self.opts['file_bundle_size'] = 4096
+
+        cached = self._client().cache_dir('salt://tree')
+        self.assertEqual(sorted(os.path.basename(path) for path in cached),
+                         sorted(str(idx) for idx in range(20)))
+        for path in cached:
+            with salt.utils.files.fopen(path, 'rb') as fp_, \
+                    salt.utils.files.fopen(os.path.join(tree, os.path.basename(path)), 'rb') as sfp_:
+                self.assertEqual(fp_.read(), sfp_.read())
+        # The files larger than the 1024 bytes chunks are fetched one by one
+        cmds = [load['cmd'] for load in self.loads]
+        self.assertEqual(cmds.count('_file_manifest'), 1)
+        self.assertEqual(cmds.count('_serve_file_bundle'), 2)
+        self.assertEqual(len([load for load in self.loads
+                              if load['cmd'] == '_serve_file' and load['loc'] == 0]), 9)
+
+        with salt.utils.files.fopen(os.path.join(tree, '3'), 'wb') as fp_:
+            fp_.write(b'changed')
+        self.assertEqual(len(self._client().cache_dir('salt://tree')), 20)
+        self.assertEqual([load['cmd'] for load in self.loads],
+                         ['_file_manifest', '_serve_file_bundle'])
+        self.assertEqual(self.loads[1]['paths'], ['tree/3'])
+
+    def test_cache_dir_without_manifest(self):
+        self.fs_.file_manifest = MagicMock(return_value=False)
+        self.assertEqual(self._client().cache_master(),
+                         [os.path.join(self.opts['cachedir'], 'files', 'base', 'big')])
+        self.assertIn('_file_list', [load['cmd'] for load in self.loads])
@@ -331,3 +331,41 @@ class ClearFuncsTestCase(TestCase):
                 patch('salt.utils.master.get_values_of_matching_keys', MagicMock(return_value=['test'])), \
                 patch('salt.utils.minions.CkMinions.auth_check', MagicMock(return_value=False)):
             self.assertEqual(mock_ret, self.clear_funcs.publish(load))
+
+
+class ReturnBatcherTestCase(TestCase):
+    '''
+    TestCase for salt.master.ReturnBatcher class
+    '''
+
+    def setUp(self):
+        opts = salt.config.master_config(None)
+        opts['return_batch_size'] = 2
+        self.io_loop = MagicMock()
+        self.batcher = salt.master.ReturnBatcher(opts, MagicMock(), MagicMock(), io_loop=self.io_loop)
+
+    def test_put(self):
+        '''
+        A flush is scheduled once, when the batch is full
+        '''
+        with patch('salt.utils.job.store_job_batch', MagicMock()) as store:
+            self.batcher.put({'id': 'a'})
+            self.assertEqual(self.io_loop.add_callback.call_count, 0)
+            self.batcher.put({'id': 'b'})
+            self.batcher.put({'id': 'c'})
+            self.io_loop.add_callback.assert_called_once_with(self.batcher.flush)
+            store.assert_not_called()
+
+    def test_flush(self):
+        '''
+        The queued returns are stored in batches of return_batch_size
+        '''
+        with patch('salt.utils.job.store_job_batch', MagicMock()) as store:
+            for id_ in 'abc':
+                self.batcher.put({'id': id_})
+            self.batcher.flush()
+            self.assertEqual([call[0][1] for call in store.call_args_list],
+                             [[{'id': 'a'}, {'id': 'b'}], [{'id': 'c'}]])
+            self.assertEqual(self.batcher.queue, [])
+            self.batcher.flush()
+            self.assertEqual(store.call_count, 2)
@@ -179,6 +179,55 @@ class MinionTestCase(TestCase):
             finally:
                 minion.destroy()
 
+    def test_job_pool(self):
+        '''
+        Tests that the _handle_decoded_payload function runs the jobs of the
+        job_pool_functions in an idle job pool worker, and the other jobs in
+        a new process
+        '''
+        conn = MagicMock()
+        conn.poll.return_value = False
+        with patch('salt.minion.Minion.ctx', MagicMock(return_value={})), \
+                patch('salt.minion.multiprocessing.Pipe', MagicMock(return_value=(conn, MagicMock()))), \
+                patch('salt.utils.process.SignalHandlingMultiprocessingProcess.start', MagicMock(return_value=True)), \
+                patch('salt.utils.process.SignalHandlingMultiprocessingProcess.join', MagicMock(return_value=True)), \
+                patch('salt.utils.process.SignalHandlingMultiprocessingProcess.is_alive', MagicMock(return_value=True)), \
+                patch('salt.utils.process.SignalHandlingMultiprocessingProcess.terminate', MagicMock()):
+            mock_opts = copy.copy(salt.config.DEFAULT_MINION_OPTS)
+            mock_opts['job_pool_size'] = 1
+            mock_opts['job_pool_functions'] = ['test.*']
+            start = salt.utils.process.SignalHandlingMultiprocessingProcess.start
+            join = salt.utils.process.SignalHandlingMultiprocessingProcess.join
+
+            io_loop = tornado.ioloop.IOLoop()
+            minion = salt.minion.Minion(mock_opts, jid_queue=None, io_loop=io_loop)
+            minion.functions = {}
+            try:
+                # The worker is forked on the first job and runs it
+                io_loop.run_sync(lambda: minion._handle_decoded_payload({'fun': 'test.ping', 'jid': '1'}))
+                self.assertEqual(start.call_count, 1)
+                self.assertEqual(join.call_count, 0)
+                self.assertEqual(conn.send.call_args[0][0][0]['jid'], '1')
+
+                # The worker is busy, the job runs in a new process
+                io_loop.run_sync(lambda: minion._handle_decoded_payload({'fun': 'test.ping', 'jid': '2'}))
+                self.assertEqual(start.call_count, 2)
+                self.assertEqual(join.call_count, 1)
+
+                # The job is not run in the pool
+                io_loop.run_sync(lambda: minion._handle_decoded_payload({'fun': 'foo.bar', 'jid': '3'}))
+                self.assertEqual(start.call_count, 3)
+                self.assertEqual(join.call_count, 2)
+
+                # The worker finished its job and runs the next one
+                conn.poll.side_effect = [True, False]
+                conn.recv.return_value = '1'
+                io_loop.run_sync(lambda: minion._handle_decoded_payload({'fun': 'test.ping', 'jid': '4'}))
+                self.assertEqual(start.call_count, 3)
+                self.assertEqual(conn.send.call_args[0][0][0]['jid'], '4')
+            finally:
+                minion.destroy()
+
     def test_beacons_before_connect(self):
         '''
         Tests that the 'beacons_before_connect' option causes the beacons to be initialized before connect.
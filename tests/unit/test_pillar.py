@@ -10,6 +10,8 @@
 
 # Import python libs
 from __future__ import absolute_import
+import os
+import shutil
 import tempfile
 
 # Import Salt Testing libs
@@ -19,6 +21,8 @@ from tests.support.paths import TMP
 
 # Import salt libs
 import salt.pillar
+import salt.config
+import salt.utils.files
 import salt.utils.stringutils
 import salt.exceptions
 
@@ -765,3 +769,126 @@ class AsyncRemotePillarTestCase(TestCase):
              'pillar_override': {},
              'extra_minion_data': {'path_to_add': 'fake_data'}},
             dictkey='pillar')
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class CompiledPillarCacheTestCase(TestCase):
+    '''
+    Tests for the input keyed compiled pillar cache in salt.pillar
+    '''
+    def setUp(self):
+        self.root = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.sls = os.path.join(self.root, 'top.sls')
+        with salt.utils.files.fopen(self.sls, 'w') as fp_:
+            fp_.write('base: {}')
+        self.opts = {'pillar_roots': {'base': [self.root]},
+                     'pillar_roots_fingerprint_interval': 0,
+                     'pillar_compiled_cache_ttl': 3600,
+                     'pillar_compiled_cache_ext_pillar_ttl': {'git': 300},
+                     'ext_pillar': []}
+        self.addCleanup(salt.pillar._ROOTS_FINGERPRINTS.clear)
+        self.store = {}
+        cache = MagicMock()
+        cache.fetch.side_effect = lambda bank, key: self.store.get(key)
+        cache.store.side_effect = lambda bank, key, data: self.store.__setitem__(key, data)
+        patcher = patch('salt.cache.factory', MagicMock(return_value=cache))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.compiled = []
+
+    def _compile_pillar(self, grains=None):
+        def fetch_pillar(*args, **kwargs):
+            self.compiled.append(1)
+            return {'count': len(self.compiled)}
+        pillar = salt.pillar.CompiledPillarCache(self.opts, grains or {'os': 'Debian'},
+                                                 'minion', 'base')
+        with patch.object(pillar, 'fetch_pillar', fetch_pillar):
+            return pillar.compile_pillar()
+
+    def test_cache_hit(self):
+        self.assertEqual(self._compile_pillar(), {'count': 1})
+        self.assertEqual(self._compile_pillar(), {'count': 1})
+
+    def test_inputs_change(self):
+        self._compile_pillar()
+        self.assertEqual(self._compile_pillar(grains={'os': 'RedHat'}), {'count': 2})
+        os.utime(self.sls, (0, 0))
+        self.assertEqual(self._compile_pillar(grains={'os': 'RedHat'}), {'count': 3})
+        self.assertEqual(self._compile_pillar(grains={'os': 'RedHat'}), {'count': 3})
+
+    def test_master_opts_change(self):
+        self._compile_pillar()
+        self.opts['renderer'] = 'yaml'
+        self.assertEqual(self._compile_pillar(), {'count': 2})
+        self.opts['pillar_source_merging_strategy'] = 'recurse'
+        self.assertEqual(self._compile_pillar(), {'count': 3})
+        self.opts['unrelated'] = True
+        self.assertEqual(self._compile_pillar(), {'count': 3})
+
+    def test_fingerprint_interval(self):
+        fingerprint = salt.pillar.pillar_roots_fingerprint(self.opts['pillar_roots'], 60)
+        os.utime(self.sls, (0, 0))
+        with patch('salt.utils.path.os_walk', MagicMock()) as os_walk:
+            self.assertEqual(
+                salt.pillar.pillar_roots_fingerprint(self.opts['pillar_roots'], 60),
+                fingerprint)
+            os_walk.assert_not_called()
+        self.assertNotEqual(
+            salt.pillar.pillar_roots_fingerprint(self.opts['pillar_roots']),
+            fingerprint)
+
+    def test_ext_pillar_ttl(self):
+        self.opts['ext_pillar'] = [{'git': []}]
+        pillar = salt.pillar.CompiledPillarCache(self.opts, {}, 'minion', 'base')
+        self.assertEqual(pillar.ttl(), 300)
+        self.opts['ext_pillar'].append({'cmd_yaml': 'cat /tmp/x'})
+        self.assertEqual(pillar.ttl(), 0)
+        self._compile_pillar()
+        self.assertEqual(self._compile_pillar(), {'count': 2})
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class PillarRenderCacheTestCase(TestCase):
+    '''
+    Tests for the shared pillar SLS render cache in salt.pillar
+    '''
+    def setUp(self):
+        self.root = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.cachedir, ignore_errors=True)
+        self.addCleanup(setattr, salt.pillar.Pillar, 'sls_render_cache', None)
+        self.files = {}
+        for name, content in (('common', 'common: {{ sls }}'),
+                              ('osdep', 'os: {{ grains["os"] }}'),
+                              ('defaults', 'value: {{ value }}')):
+            path = os.path.join(self.root, name + '.sls')
+            with salt.utils.files.fopen(path, 'w') as fp_:
+                fp_.write(content)
+            self.files[name] = path
+        self.opts = salt.config.master_config(None)
+        self.opts.update({'pillar_roots': {'base': [self.root]},
+                          'cachedir': self.cachedir,
+                          'extension_modules': os.path.join(self.cachedir, 'extmods'),
+                          'pillar_render_cache': True})
+
+    def _render(self, name, grains, defaults=None):
+        with patch('salt.pillar.salt.fileclient.get_file_client', autospec=True):
+            pillar = salt.pillar.Pillar(self.opts, grains, 'minion', 'base')
+        return pillar.render_sls(self.files[name], 'base', name, defaults or {})
+
+    def test_render_cache(self):
+        debian = {'os': 'Debian'}
+        redhat = {'os': 'RedHat'}
+        self.assertEqual(self._render('common', debian), {'common': 'common'})
+        self.assertEqual(self._render('osdep', debian), {'os': 'Debian'})
+        self.assertEqual(self._render('defaults', debian, {'value': 1}), {'value': 1})
+        self.assertEqual(len(salt.pillar.Pillar.sls_render_cache), 2)
+
+        with patch('salt.pillar.compile_template', MagicMock()) as compile_template:
+            self.assertEqual(self._render('common', redhat), {'common': 'common'})
+            self.assertEqual(self._render('defaults', redhat, {'value': 1}), {'value': 1})
+            compile_template.assert_not_called()
+        self.assertEqual(self._render('osdep', redhat), {'os': 'RedHat'})
+        self.assertEqual(self._render('defaults', redhat, {'value': 2}), {'value': 2})
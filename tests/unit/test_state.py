@@ -8,6 +8,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 import copy
 import os
 import tempfile
+import textwrap
 
 # Import Salt Testing libs
 import tests.integration as integration
@@ -22,6 +23,7 @@ from tests.support.mixins import AdaptedConfigurationTestCaseMixin
 # Import Salt libs
 import salt.exceptions
 import salt.state
+import salt.utils.files
 from salt.utils.odict import OrderedDict, DefaultOrderedDict
 from salt.utils.decorators import state as statedecorators
 
@@ -120,6 +122,30 @@ class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
                                                    'state2,state3')
         self.assertEqual(matches, {'env': ['state2', 'state3']})
 
+    def test_auto_order(self):
+        high = OrderedDict()
+        high['auto'] = {'test': ['succeed_without_changes'], '__sls__': 'conc', '__env__': 'base'}
+        high['explicit'] = {'test': ['succeed_without_changes', {'order': 10001}],
+                            '__sls__': 'conc', '__env__': 'base'}
+        self.highstate._handle_iorder(copy.deepcopy(high))
+        self.assertEqual(self.highstate.state.auto_ordered, set())
+        high = self.highstate._handle_iorder(high)
+        self.assertEqual(high['auto']['test'], ['succeed_without_changes', {'order': 10001}])
+        chunks = self.highstate.state.compile_high_data(high)
+        self.assertFalse(any(set(chunk) - set(['__sls__', '__env__', '__id__', 'name',
+                                                'state', 'fun', 'order'])
+                             for chunk in chunks))
+        self.assertEqual(self.highstate.state.explicit_orders, set())
+
+        self.highstate.opts['state_concurrency'] = 2
+        self.highstate.state.opts['state_concurrency'] = 2
+        high['auto']['test'] = ['succeed_without_changes']
+        self.highstate._handle_iorder(high)
+        self.assertEqual(self.highstate.state.auto_ordered, set([('auto', 'test')]))
+        self.highstate.state.compile_high_data(high)
+        self.assertEqual(self.highstate.state.explicit_orders,
+                         set(['test_|-explicit_|-explicit_|-succeed_without_changes']))
+
     def test_show_state_usage(self):
         # monkey patch sub methods
         self.highstate.avail = {
@@ -672,3 +698,298 @@ class StateFormatSlotsTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
             self.state_obj.format_slots(cdata)
         mock.assert_not_called()
         self.assertEqual(cdata, sls_data)
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class StateRequisiteIndexTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
+    '''
+    TestCase for the lookup of requisites in the chunks and high data indexes
+    '''
+    def setUp(self):
+        with patch('salt.state.State._gather_pillar'):
+            minion_opts = self.get_temp_config('minion')
+            self.state_obj = salt.state.State(minion_opts)
+        self.chunks = [
+            {'state': 'pkg', '__id__': 'nginx', 'name': 'nginx', '__sls__': 'web'},
+            {'state': 'file', '__id__': 'nginx_conf', 'name': '/etc/nginx.conf', '__sls__': 'web.conf'},
+            {'state': 'service', '__id__': 'nginx_svc', 'name': 'nginx', '__sls__': 'web'},
+            {'state': 'file', '__id__': 'motd', 'name': '/etc/motd', '__sls__': 'base'},
+        ]
+
+    def _find(self, req_key, req_val):
+        return [chunk['__id__'] for chunk in
+                self.state_obj._find_requisite(self.chunks, req_key, req_val)]
+
+    def test_find_requisite(self):
+        self.assertEqual(self._find('id', 'nginx'), ['nginx', 'nginx_svc'])
+        self.assertEqual(self._find('service', 'nginx'), ['nginx_svc'])
+        self.assertEqual(self._find('file', '/etc/motd'), ['motd'])
+        self.assertEqual(self._find('file', 'nginx_conf'), ['nginx_conf'])
+        self.assertEqual(self._find('sls', 'web'), ['nginx', 'nginx_svc'])
+        self.assertEqual(self._find('pkg', 'missing'), [])
+        self.assertEqual(self._find('id', None), [])
+
+    def test_find_requisite_glob(self):
+        self.assertEqual(self._find('file', '/etc/*'), ['nginx_conf', 'motd'])
+        self.assertEqual(self._find('id', 'nginx*'), ['nginx', 'nginx_conf', 'nginx_svc'])
+        self.assertEqual(self._find('sls', 'web*'), ['nginx', 'nginx_conf', 'nginx_svc'])
+
+    def test_find_requisite_reindex(self):
+        self.assertEqual(self._find('id', 'motd'), ['motd'])
+        self.chunks.append({'state': 'file', '__id__': 'issue', 'name': '/etc/issue', '__sls__': 'base'})
+        self.assertEqual(self._find('sls', 'base'), ['motd', 'issue'])
+        self.chunks = list(self.chunks)
+        self.assertEqual(self._find('file', '/etc/issue'), ['issue'])
+        self.assertIs(self.state_obj._chunk_index['chunks'], self.chunks)
+
+    def test_find_requisite_invalid(self):
+        with self.assertRaises(salt.exceptions.SaltRenderError):
+            self._find('file', OrderedDict([('test1', 'test')]))
+
+    def test_find_name_index(self):
+        high = OrderedDict([
+            ('nginx', {'pkg': ['installed', {'order': 1}], '__sls__': 'web', '__env__': 'base'}),
+            ('conf', {'file': ['managed', {'name': '/etc/nginx.conf'}], '__sls__': 'web', '__env__': 'base'}),
+            ('motd', {'file': ['managed', {'name': '/etc/motd'}, {'source': ['a', 'b']}],
+                      '__sls__': 'base', '__env__': 'base'}),
+        ])
+        index = salt.state.index_high(high)
+        for name, state in (('nginx', 'pkg'), ('/etc/motd', 'file'), ('/etc/nginx.conf', 'file'),
+                            ('web', 'sls'), ('missing', 'file'), ('/etc/motd', 'pkg')):
+            self.assertEqual(salt.state.find_name(name, state, high, index),
+                             salt.state.find_name(name, state, high))
+        for sls in ('web', 'base', 'missing'):
+            self.assertEqual(salt.state.find_sls_ids(sls, high, index),
+                             salt.state.find_sls_ids(sls, high))
+        self.assertEqual(salt.state.find_name('/etc/motd', 'file', high, index), [('motd', 'file')])
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class IncrementalHighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
+    '''
+    TestCase for reusing the SLS renders and skipping the converged states
+    '''
+    def setUp(self):
+        root_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.state_tree_dir = os.path.join(root_dir, 'state_tree')
+        cache_dir = os.path.join(root_dir, 'cachedir')
+        for dpath in (root_dir, self.state_tree_dir, cache_dir):
+            if not os.path.isdir(dpath):
+                os.makedirs(dpath)
+        self._write('top.sls', '''\
+            base:
+              '*':
+                - tracked
+                - untracked
+            ''')
+        self._write('map.jinja', "{% set greeting = 'hello' %}")
+        self._write('tracked.sls', '''\
+            {% from 'map.jinja' import greeting %}
+            tracked:
+              test.succeed_without_changes:
+                - name: {{ greeting }} {{ grains['id'] }}
+            ''')
+        self._write('untracked.sls', '''\
+            untracked:
+              test.succeed_with_changes:
+                - name: {{ salt['test.echo']('echo') }}
+            ''')
+
+        overrides = {}
+        overrides['root_dir'] = root_dir
+        overrides['state_events'] = False
+        overrides['id'] = 'match'
+        overrides['file_client'] = 'local'
+        overrides['file_roots'] = dict(base=[self.state_tree_dir])
+        overrides['cachedir'] = cache_dir
+        overrides['test'] = False
+        overrides['state_render_cache'] = True
+        overrides['state_assume_converged'] = True
+        self.config = self.get_temp_config('minion', **overrides)
+        self.config['grains'] = {'id': 'match'}
+        self.addCleanup(delattr, self, 'config')
+
+    def _write(self, name, contents):
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, name), 'w') as fp_:
+            fp_.write(textwrap.dedent(contents))
+
+    def _render(self):
+        '''
+        Render the highstate and return it with the SLS files rendered
+        '''
+        highstate = salt.state.HighState(self.config)
+        highstate.push_active()
+        self.addCleanup(highstate.pop_active)
+        rendered = []
+        compile_template = salt.state.compile_template
+
+        def _compile_template(template, *args, **kwargs):
+            rendered.append(os.path.basename(template))
+            return compile_template(template, *args, **kwargs)
+
+        with patch('salt.state.compile_template', _compile_template):
+            high, errors = highstate.render_highstate({'base': ['tracked', 'untracked']})
+        self.assertEqual(errors, [])
+        return high, sorted(rendered)
+
+    def test_render_cache(self):
+        high, rendered = self._render()
+        self.assertEqual(rendered, ['tracked.sls', 'untracked.sls'])
+        self.assertIn({'name': 'hello match'}, high['tracked']['test'])
+
+        cached_high, rendered = self._render()
+        self.assertEqual(rendered, ['untracked.sls'])
+        self.assertEqual(cached_high, high)
+
+        self._write('map.jinja', "{% set greeting = 'hi' %}")
+        high, rendered = self._render()
+        self.assertEqual(rendered, ['tracked.sls', 'untracked.sls'])
+        self.assertIn({'name': 'hi match'}, high['tracked']['test'])
+
+        self.config['grains']['id'] = 'other'
+        high, rendered = self._render()
+        self.assertEqual(rendered, ['tracked.sls', 'untracked.sls'])
+        self.assertIn({'name': 'hi other'}, high['tracked']['test'])
+
+    def test_assume_converged(self):
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(self.config)
+        high = OrderedDict()
+        high['converged'] = {'test': ['succeed_without_changes'], '__sls__': 'conv', '__env__': 'base'}
+        high['changed'] = {'test': ['succeed_with_changes'], '__sls__': 'conv', '__env__': 'base'}
+        ret = state_obj.call_high(copy.deepcopy(high))
+        self.assertEqual(state_obj.converged, set())
+
+        ret = state_obj.call_high(copy.deepcopy(high))
+        ret = dict((tag.split('_|-')[1], state) for tag, state in ret.items())
+        self.assertTrue(ret['converged']['result'])
+        self.assertIn('previous state run', ret['converged']['comment'])
+        self.assertEqual(ret['changed']['comment'], 'Success!')
+
+        high['converged']['test'].append({'extra': 'changed'})
+        ret = state_obj.call_high(copy.deepcopy(high))
+        ret = dict((tag.split('_|-')[1], state) for tag, state in ret.items())
+        self.assertEqual(ret['converged']['comment'], 'Success!')
+
+    def test_assume_converged_sources(self):
+        self._write('motd', 'hello')
+        target = os.path.join(os.path.dirname(self.state_tree_dir), 'motd')
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(self.config)
+        high = OrderedDict()
+        high['motd'] = {'file': ['managed', {'name': target}, {'source': 'salt://motd'}],
+                        '__sls__': 'conv', '__env__': 'base'}
+        for _ in range(3):
+            ret = state_obj.call_high(copy.deepcopy(high))
+        ret = next(iter(ret.values()))
+        self.assertIn('previous state run', ret['comment'])
+
+        self._write('motd', 'hi')
+        ret = state_obj.call_high(copy.deepcopy(high))
+        ret = next(iter(ret.values()))
+        self.assertTrue(ret['result'])
+        self.assertIn('diff', ret['changes'])
+        with salt.utils.files.fopen(target) as fp_:
+            self.assertEqual(fp_.read(), 'hi')
+
+    def test_assume_converged_triggers(self):
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(self.config)
+        high = OrderedDict()
+        high['dep'] = {'test': ['succeed_without_changes'], '__sls__': 'conv', '__env__': 'base'}
+        high['handler'] = {'test': ['succeed_with_changes', {'onchanges': [{'test': 'dep'}]}],
+                           '__sls__': 'conv', '__env__': 'base'}
+        high['failed'] = {'test': ['succeed_without_changes'], '__sls__': 'conv', '__env__': 'base'}
+        high['onfail'] = {'test': ['succeed_with_changes', {'onfail': [{'test': 'failed'}]}],
+                          '__sls__': 'conv', '__env__': 'base'}
+        high['after'] = {'test': ['succeed_without_changes', {'require': [{'test': 'dep'}]}],
+                         '__sls__': 'conv', '__env__': 'base'}
+        state_obj.call_high(copy.deepcopy(high))
+        state_obj.call_high(copy.deepcopy(high))
+        self.assertEqual(
+            state_obj.converged,
+            set(['test_|-dep_|-dep_|-succeed_without_changes',
+                 'test_|-failed_|-failed_|-succeed_without_changes',
+                 'test_|-after_|-after_|-succeed_without_changes']))
+
+        high['dep']['test'][0] = 'succeed_with_changes'
+        high['failed']['test'][0] = 'fail_without_changes'
+        ret = state_obj.call_high(copy.deepcopy(high))
+        ret = dict((tag.split('_|-')[1], state) for tag, state in ret.items())
+        self.assertEqual(ret['handler']['comment'], 'Success!')
+        self.assertTrue(ret['handler']['changes'])
+        self.assertEqual(ret['onfail']['comment'], 'Success!')
+        # The requisite changed, so the state is run again
+        self.assertEqual(ret['after']['comment'], 'Success!')
+
+
+class StateConcurrencyTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
+    '''
+    TestCase for running the state chunks concurrently
+    '''
+    def setUp(self):
+        with patch('salt.state.State._gather_pillar'):
+            minion_opts = self.get_temp_config('minion')
+            minion_opts['state_concurrency'] = 2
+            self.state_obj = salt.state.State(minion_opts, jid='20181017000000000000')
+
+    def _high(self):
+        high = OrderedDict()
+        for name in ('one', 'two', 'three'):
+            high[name] = {'test': ['succeed_with_changes'], '__sls__': 'conc', '__env__': 'base'}
+        high['after'] = {'test': ['succeed_without_changes',
+                                  {'require': [{'test': 'one'}, {'test': 'three'}]}],
+                         '__sls__': 'conc', '__env__': 'base'}
+        high['watcher'] = {'test': ['succeed_without_changes',
+                                    {'watch': [{'test': 'two'}]}],
+                           '__sls__': 'conc', '__env__': 'base'}
+        high['failed'] = {'test': ['fail_without_changes'], '__sls__': 'conc', '__env__': 'base'}
+        high['onfail'] = {'test': ['succeed_with_changes', {'onfail': [{'test': 'failed'}]}],
+                          '__sls__': 'conc', '__env__': 'base'}
+        high['final'] = {'test': ['succeed_without_changes', {'order': 'last'}],
+                         '__sls__': 'conc', '__env__': 'base'}
+        return high
+
+    def test_call_high_concurrently(self):
+        ret = self.state_obj.call_high(self._high())
+        ret = dict((tag.split('_|-')[1], state) for tag, state in ret.items())
+        for name in ('one', 'two', 'three', 'after', 'watcher', 'onfail', 'final'):
+            self.assertTrue(ret[name]['result'], name)
+            self.assertNotIn('proc', ret[name])
+        self.assertFalse(ret['failed']['result'])
+        self.assertEqual(ret['watcher']['comment'], 'Watch statement fired.')
+        self.assertGreater(ret['after']['__run_num__'], ret['one']['__run_num__'])
+        self.assertGreater(ret['after']['__run_num__'], ret['three']['__run_num__'])
+        self.assertEqual(ret['final']['__run_num__'],
+                         max(state['__run_num__'] for state in ret.values()))
+
+    def test_explicit_order(self):
+        flag = os.path.join(tempfile.mkdtemp(dir=integration.TMP), 'early')
+        high = OrderedDict()
+        high['late'] = {'cmd': ['run', {'name': 'test -f {0}'.format(flag)},
+                                {'shell': '/bin/sh'}, {'order': 10}],
+                        '__sls__': 'conc', '__env__': 'base'}
+        high['free'] = {'test': ['succeed_without_changes'], '__sls__': 'conc', '__env__': 'base'}
+        high['early'] = {'cmd': ['run', {'name': 'sleep 1 && touch {0}'.format(flag)},
+                                 {'shell': '/bin/sh'}, {'order': 2}],
+                         '__sls__': 'conc', '__env__': 'base'}
+        high['first'] = {'test': ['succeed_without_changes', {'order': 'first'}],
+                         '__sls__': 'conc', '__env__': 'base'}
+        high['auto'] = {'test': ['succeed_without_changes', {'order': 10000}],
+                        '__sls__': 'conc', '__env__': 'base'}
+        self.state_obj.auto_ordered.add(('auto', 'test'))
+        ret = self.state_obj.call_high(high)
+        ret = dict((tag.split('_|-')[1], state) for tag, state in ret.items())
+        self.assertTrue(ret['late']['result'])
+        self.assertLess(ret['first']['__run_num__'], ret['early']['__run_num__'])
+        self.assertLess(ret['late']['__run_num__'], ret['free']['__run_num__'])
+        self.assertLess(ret['late']['__run_num__'], ret['auto']['__run_num__'])
+
+    def test_concurrent_deps(self):
+        chunks = self.state_obj.compile_high_data(self._high())
+        deps = dict((chunk['__id__'], self.state_obj._concurrent_deps(chunk, chunks))
+                    for chunk in chunks)
+        self.assertEqual(deps['after'], set(['test_|-one_|-one_|-succeed_with_changes',
+                                             'test_|-three_|-three_|-succeed_with_changes']))
+        self.assertEqual(deps['onfail'], set(['test_|-failed_|-failed_|-fail_without_changes']))
+        self.assertEqual(deps['one'], set())
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for the framing of the transport messages
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import 3rd-party libs
+import msgpack
+
+# Import Salt libs
+import salt.transport.frame
+
+# Import Salt Testing libs
+from tests.support.unit import TestCase
+
+
+class FrameMsgPartsTestCase(TestCase):
+    '''
+    The split framing has to put the same bytes on the wire as frame_msg
+    '''
+    def _join(self, parts):
+        head, body = parts
+        return head + body
+
+    def test_bytes_body(self):
+        for length in (0, 31, 32, 255, 256, 65535, 65536):
+            body = b'x' * length
+            self.assertEqual(
+                self._join(salt.transport.frame.frame_msg_parts(body, header={'mid': 1})),
+                salt.transport.frame.frame_msg(body, header={'mid': 1}))
+            self.assertEqual(
+                self._join(salt.transport.frame.frame_msg_ipc_parts(body)),
+                salt.transport.frame.frame_msg_ipc(body))
+
+    def test_bytes_body_is_not_copied(self):
+        body = b'x' * 1024
+        _, framed_body = salt.transport.frame.frame_msg_parts(body)
+        self.assertIs(framed_body, body)
+
+    def test_packed_body(self):
+        body = {'enc': 'aes', 'load': b'\x00\xff' * 100}
+        self.assertEqual(
+            self._join(salt.transport.frame.frame_msg_parts(body)),
+            salt.transport.frame.frame_msg(body))
+        self.assertEqual(
+            self._join(salt.transport.frame.frame_msg_ipc_parts(body, header={'mid': 1})),
+            salt.transport.frame.frame_msg_ipc(body, header={'mid': 1}))
+
+    def test_unpack(self):
+        unpacker = msgpack.Unpacker()
+        for parts in (salt.transport.frame.frame_msg_parts(b'payload', header={'mid': 1}),
+                      salt.transport.frame.frame_msg_parts({'a': 1})):
+            for part in parts:
+                unpacker.feed(part)
+        framed_msgs = [salt.transport.frame.decode_embedded_strs(msg) for msg in unpacker]
+        self.assertEqual(framed_msgs, [{'head': {'mid': 1}, 'body': 'payload'},
+                                       {'head': {}, 'body': {'a': 1}}])
@@ -17,6 +17,7 @@ from salt.ext import six
 import salt.utils.platform
 import salt.utils.process
 import salt.transport.server
+import salt.transport.tcp
 import salt.transport.client
 import salt.exceptions
 from salt.ext.six.moves import range
@@ -310,3 +311,41 @@ class SaltMessageClientPoolTest(AsyncTestCase):
 
         with self.assertRaises(tornado.ioloop.TimeoutError):
             test_connect(self)
+
+
+class TCPPubServerChannelTest(TestCase):
+    '''
+    Tests around the targeting of the publishes
+    '''
+    def setUp(self):
+        self.opts = {'serial': 'msgpack',
+                     'sign_pub_messages': False,
+                     'sock_dir': '/tmp/master',
+                     'publish_topic_targeting': True}
+        with patch('salt.utils.minions.CkMinions'):
+            self.channel = salt.transport.tcp.TCPPubServerChannel(self.opts)
+        self.channel.ckminions.check_minions.return_value = {'minions': ['web1'],
+                                                             'missing': []}
+
+    def _publish(self, load):
+        pub_sock = MagicMock()
+        with patch('salt.master.SMaster.secrets', {'aes': {'secret': MagicMock()}}, create=True), \
+                patch('salt.crypt.Crypticle', return_value=MagicMock(dumps=MagicMock(return_value=b'crypted'))), \
+                patch('salt.utils.async.SyncWrapper', return_value=pub_sock):
+            self.channel.publish(load)
+        return pub_sock.send.call_args[0][0]
+
+    def test_publish_glob_targets_matched_minions(self):
+        int_payload = self._publish({'tgt': 'web*', 'tgt_type': 'glob'})
+        self.assertEqual(int_payload['topic_lst'], ['web1'])
+
+    def test_publish_grain_is_broadcast(self):
+        int_payload = self._publish({'tgt': 'os:Linux', 'tgt_type': 'grain'})
+        self.assertNotIn('topic_lst', int_payload)
+
+    def test_publish_topic_targeting_disabled(self):
+        self.opts['publish_topic_targeting'] = False
+        int_payload = self._publish({'tgt': 'web*', 'tgt_type': 'glob'})
+        self.assertNotIn('topic_lst', int_payload)
+        int_payload = self._publish({'tgt': ['web1', 'web2'], 'tgt_type': 'list'})
+        self.assertEqual(int_payload['topic_lst'], ['web1', 'web2'])
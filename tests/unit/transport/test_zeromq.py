@@ -22,13 +22,17 @@ if not hasattr(zmq.eventloop.ioloop, 'ZMQIOLoop'):
     zmq.eventloop.ioloop.ZMQIOLoop = zmq.eventloop.ioloop.IOLoop
 from tornado.testing import AsyncTestCase
 import tornado.gen
+import tornado.ioloop
 
 # Import Salt libs
 import salt.config
 from salt.ext import six
+import salt.payload
 import salt.utils.process
+import salt.transport
 import salt.transport.server
 import salt.transport.client
+import salt.transport.zeromq
 import salt.exceptions
 from salt.ext.six.moves import range
 from salt.transport.zeromq import AsyncReqMessageClientPool
@@ -305,3 +309,94 @@ class AsyncReqMessageClientPoolTest(TestCase):
     def test_destroy(self):
         self.message_client_pool.destroy()
         self.assertEqual([], self.message_client_pool.message_clients)
+
+
+class WorkerPoolRoutingTest(TestCase):
+    '''
+    Tests around the routing of the requests to the worker pools
+    '''
+    def setUp(self):
+        self.opts = {'worker_threads': 5,
+                     'sock_dir': '/tmp/master',
+                     'tcp_master_workers': 4515,
+                     'serial': 'msgpack',
+                     'worker_pools': {'returns': {'worker_threads': 2,
+                                                  'commands': ['_return', '_minion_event']},
+                                      'pillar': {'commands': ['_pillar']},
+                                      'bad/name': {'commands': ['_serve_file']}}}
+        self.channel = salt.transport.zeromq.ZeroMQReqServerChannel(self.opts)
+        self.channel._router_serial = salt.payload.Serial(self.opts)
+
+    def test_iter_worker_pools(self):
+        self.assertEqual(list(salt.transport.iter_worker_pools(self.opts)),
+                         [('default', 5, []),
+                          ('pillar', 1, ['_pillar']),
+                          ('returns', 2, ['_return', '_minion_event'])])
+        self.assertEqual(salt.transport.worker_pool_routes(self.opts),
+                         {'_pillar': 'pillar',
+                          '_return': 'returns',
+                          '_minion_event': 'returns'})
+
+    def test_worker_uri(self):
+        self.assertEqual(self.channel._worker_uri(), 'ipc:///tmp/master/workers.ipc')
+        self.assertEqual(self.channel._worker_uri('returns'), 'ipc:///tmp/master/workers-returns.ipc')
+        self.opts['ipc_mode'] = 'tcp'
+        self.assertEqual(self.channel._worker_uri('default'), 'tcp://127.0.0.1:4515')
+        self.assertEqual(self.channel._worker_uri('returns'), 'tcp://127.0.0.1:4517')
+
+    def test_request_cmd(self):
+        dumps = self.channel._router_serial.dumps
+        self.assertEqual(self.channel._request_cmd(dumps({'enc': 'clear', 'load': {'cmd': '_auth'}})), '_auth')
+        self.assertEqual(self.channel._request_cmd(dumps({'enc': 'aes', 'load': b'x', 'cmd': '_return'})), '_return')
+        self.assertIsNone(self.channel._request_cmd(dumps({'enc': 'aes', 'load': b'x'})))
+        self.assertIsNone(self.channel._request_cmd(b'\xc1'))
+
+
+class PublishTopicsTest(TestCase):
+    '''
+    Tests around the targeting of the publishes to topics
+    '''
+    def setUp(self):
+        self.ckminions = MagicMock()
+        self.ckminions.check_minions.return_value = {'minions': ['web1', 'web2'],
+                                                     'missing': []}
+
+    def test_publish_topics(self):
+        opts = {}
+        self.assertEqual(
+            salt.transport.publish_topics(opts, self.ckminions, {'tgt': 'web*', 'tgt_type': 'glob'}),
+            ['web1', 'web2'])
+        self.ckminions.check_minions.assert_called_once_with('web*', tgt_type='glob')
+        self.assertEqual(
+            salt.transport.publish_topics(opts, self.ckminions, {'tgt': ['db1'], 'tgt_type': 'list'}),
+            ['db1'])
+        self.assertEqual(
+            salt.transport.publish_topics(opts, self.ckminions, {'tgt': 'web1,web2', 'tgt_type': 'list'}),
+            ['web1', 'web2'])
+        self.assertIsNone(
+            salt.transport.publish_topics(opts, self.ckminions, {'tgt': 'os:Linux', 'tgt_type': 'grain'}))
+
+    def test_publish_topics_order_masters(self):
+        opts = {'order_masters': True}
+        self.assertIsNone(
+            salt.transport.publish_topics(opts, self.ckminions, {'tgt': ['db1'], 'tgt_type': 'list'}))
+        self.ckminions.check_minions.assert_not_called()
+
+    def test_decode_messages(self):
+        opts = {'id': 'web1', 'zmq_filtering': True}
+        channel = salt.transport.zeromq.AsyncZeroMQPubChannel.__new__(
+            salt.transport.zeromq.AsyncZeroMQPubChannel)
+        channel.hexid = salt.transport.zeromq.publish_topic(opts['id'])
+        channel.serial = salt.payload.Serial(opts)
+        channel._decode_payload = MagicMock(side_effect=lambda payload: tornado.gen.maybe_future(payload))
+        payload = channel.serial.dumps({'enc': 'aes', 'load': 'x'})
+
+        decoded = tornado.ioloop.IOLoop().run_sync(
+            lambda: channel._decode_messages([salt.transport.zeromq.publish_topic('web1'), payload]))
+        self.assertEqual(decoded, {'enc': 'aes', 'load': 'x'})
+        decoded = tornado.ioloop.IOLoop().run_sync(
+            lambda: channel._decode_messages([salt.transport.zeromq.BROADCAST_TOPIC, payload]))
+        self.assertEqual(decoded, {'enc': 'aes', 'load': 'x'})
+        decoded = tornado.ioloop.IOLoop().run_sync(
+            lambda: channel._decode_messages([salt.transport.zeromq.publish_topic('web2'), payload]))
+        self.assertIsNone(decoded)
@@ -15,11 +15,13 @@ import shutil
 
 # Import Salt Testing libs
 from tests.support.unit import TestCase
+from tests.support.mock import patch, MagicMock
 
 # Import salt libs
 import salt.config
 import salt.loader
 import salt.utils.cache as cache
+import salt.utils.files
 
 
 class CacheDictTestCase(TestCase):
@@ -93,3 +95,54 @@ class CacheContextTestCase(TestCase):
 
         self.assertEqual(cache_test_func()['called'], 0)
         self.assertEqual(cache_test_func()['called'], 1)
+
+
+class ListdirCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name in ('minion2', 'Minion1', '.hidden'):
+            with salt.utils.files.fopen(os.path.join(self.dir, name), 'w'):
+                pass
+        os.mkdir(os.path.join(self.dir, 'subdir'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_list(self):
+        '''
+        Only regular, non-hidden files are listed, sorted ignoring case
+        '''
+        listing = cache.ListdirCache(self.dir)
+        self.assertEqual(listing.list(), ['Minion1', 'minion2'])
+
+    def test_list_cached(self):
+        '''
+        The directory is only read again when its mtime changed
+        '''
+        listing = cache.ListdirCache(self.dir)
+        # Pretend the directory was last modified a while ago
+        past = time.time() - 60
+        os.utime(self.dir, (past, past))
+        self.assertEqual(listing.list(), ['Minion1', 'minion2'])
+        with patch('os.listdir', MagicMock(side_effect=AssertionError)):
+            self.assertEqual(listing.list(), ['Minion1', 'minion2'])
+        with salt.utils.files.fopen(os.path.join(self.dir, 'minion3'), 'w'):
+            pass
+        self.assertEqual(listing.list(), ['Minion1', 'minion2', 'minion3'])
+
+
+class LRUCacheTestCase(TestCase):
+    '''
+    Test the LRUCache class
+    '''
+    def test_lru(self):
+        lru = cache.LRUCache(size=2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        self.assertEqual(lru.get('a'), 1)
+        lru.put('c', 3)
+        self.assertNotIn('b', lru)
+        self.assertEqual(lru.get('b', 'missing'), 'missing')
+        self.assertEqual(len(lru), 2)
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
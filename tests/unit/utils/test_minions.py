@@ -2,8 +2,13 @@
 
 # Import python libs
 from __future__ import absolute_import, unicode_literals
+import os
+import shutil
+import tempfile
 
 # Import Salt Libs
+import salt.utils.data
+import salt.utils.files
 import salt.utils.minions as minions
 
 # Import Salt Testing Libs
@@ -366,3 +371,154 @@ class CkMinionsTestCase(TestCase):
         args = ['1', '2']
         ret = self.ckminions.auth_check(auth_list, 'test.arg', args, 'runner')
         self.assertTrue(ret)
+
+
+MINION_DATA = {
+    'web1': {'grains': {'os': 'Ubuntu', 'roles': ['web', 'db'],
+                        'ip_interfaces': {'eth0': ['10.0.0.1']}},
+             'pillar': {'app': {'version': '1.2:3'}}},
+    'web2': {'grains': {'os': 'CentOS', 'roles': ['web'],
+                        'ip_interfaces': {'eth0': ['10.0.0.2']}},
+             'pillar': {'app': {'version': '2'}}},
+    'db1': {'grains': {'os': 'ubuntu', 'disks': [{'name': 'sda'}]},
+            'pillar': {}},
+    'nodata': None,
+}
+
+
+class MinionDataIndexTestCase(TestCase):
+    '''
+    TestCase for salt.utils.minions.MinionDataIndex
+    '''
+    def setUp(self):
+        self.cache = MagicMock()
+        self.cache.fetch.side_effect = lambda bank, key: MINION_DATA[bank.split('/')[1]]
+        self.index = minions.MinionDataIndex({}, self.cache)
+        self.index.sync(set(MINION_DATA))
+
+    def test_search_matches_subdict_match(self):
+        '''
+        Every search through the index must return the same minions as a
+        full scan with subdict_match
+        '''
+        searches = [
+            ('grains', 'os:Ubuntu', {}),
+            ('grains', 'os:ubu*', {}),
+            ('grains', 'os:(Ubuntu|CentOS)', {'regex_match': True}),
+            ('grains', 'roles:web', {}),
+            ('grains', 'roles:0:web', {}),
+            ('grains', 'roles:1:db', {}),
+            ('grains', 'ip_interfaces:eth0:10.0.0.*', {}),
+            ('grains', 'ip_interfaces:eth0', {}),
+            ('grains', 'disks:name:sda', {}),
+            ('grains', 'os', {}),
+            ('pillar', 'app:version:1.2:3', {}),
+            ('pillar', 'app:version:2', {'exact_match': True}),
+            ('pillar', 'app:version:*', {}),
+        ]
+        for search_type, expr, kwargs in searches:
+            expected = set(
+                id_ for id_, mdata in MINION_DATA.items()
+                if mdata is not None and salt.utils.data.subdict_match(
+                    mdata.get(search_type), expr, delimiter=':', **kwargs)
+            )
+            ret = self.index.search(search_type, expr, ':', **kwargs)
+            self.assertEqual(ret, expected, '{0} {1}'.format(search_type, expr))
+
+    def test_non_canonical_list_index(self):
+        '''
+        Expressions using list indexes the index cannot represent are not
+        resolved through the index
+        '''
+        self.assertIsNone(self.index.search('grains', 'roles:-1:db', ':'))
+
+    def test_update(self):
+        '''
+        Updated and removed minions are reflected in the index
+        '''
+        self.index.add('web2', {'grains': {'os': 'Ubuntu'}})
+        self.assertEqual(self.index.search('grains', 'os:Ubuntu', ':'),
+                         set(['web1', 'web2', 'db1']))
+        self.index.sync(set(['web1', 'db1']))
+        self.assertEqual(self.index.search('grains', 'os:Ubuntu', ':'),
+                         set(['web1', 'db1']))
+        self.assertEqual(self.index.minions, set(['web1', 'db1']))
+
+    def test_check_cache_minions(self):
+        '''
+        Grain targeting goes through the index when it is enabled
+        '''
+        opts = {'minion_data_cache': True, 'minion_data_index': True,
+                'minion_data_index_refresh': 60, 'cache': 'index_test',
+                'cachedir': '/tmp', 'pki_dir': '/tmp'}
+        with patch('salt.cache.factory', MagicMock(return_value=self.cache)):
+            ckminions = minions.CkMinions(opts)
+        self.cache.list.return_value = list(MINION_DATA)
+        with patch.dict(minions.MinionDataIndex.instances, {}):
+            ret = ckminions._check_cache_minions('os:Ubuntu', ':', False, 'grains')
+            self.assertEqual(sorted(ret['minions']), ['db1', 'web1'])
+            with patch('salt.utils.minions.CkMinions._accepted_minions',
+                       MagicMock(return_value=sorted(MINION_DATA) + ['new'])):
+                ret = ckminions._check_cache_minions('os:Ubuntu', ':', True, 'grains')
+            self.assertEqual(sorted(ret['minions']), ['db1', 'new', 'nodata', 'web1'])
+
+
+class CompoundMinionsTestCase(TestCase):
+    '''
+    TestCase for the compound matcher of salt.utils.minions.CkMinions
+    '''
+    def setUp(self):
+        self.cache = MagicMock()
+        self.cache.list.return_value = ['web1', 'web2', 'db1']
+        self.cache.fetch.side_effect = lambda bank, key: MINION_DATA[bank.split('/')[1]]
+        self.pki_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.pki_dir, 'minions'))
+        for minion_id in ('db1', 'nodata', 'web1', 'web2'):
+            with salt.utils.files.fopen(os.path.join(self.pki_dir, 'minions', minion_id), 'w'):
+                pass
+        opts = {'minion_data_cache': True, 'key_cache': '', 'pki_dir': self.pki_dir}
+        with patch('salt.cache.factory', MagicMock(return_value=self.cache)):
+            self.ckminions = minions.CkMinions(opts)
+
+    def tearDown(self):
+        shutil.rmtree(self.pki_dir)
+
+    def _check(self, expr):
+        ret = self.ckminions.check_minions(expr, 'compound')
+        return sorted(ret['minions'])
+
+    def test_parse_compound(self):
+        '''
+        Operator precedence and implicit closing of parentheses
+        '''
+        self.assertEqual(
+            minions.parse_compound('a or b and not c'.split()),
+            ('or', [('term', 'a'), ('and', [('term', 'b'), ('not', ('term', 'c'))])])
+        )
+        self.assertEqual(
+            minions.parse_compound('( a or b'.split()),
+            ('or', [('term', 'a'), ('term', 'b')])
+        )
+        for expr in ('and a', 'a b', '( and a )', 'a )', 'N@group', ''):
+            self.assertRaises(ValueError, minions.parse_compound, expr.split(), {'N': None})
+
+    def test_compound(self):
+        '''
+        Compound expressions are evaluated with the usual precedence
+        '''
+        self.assertEqual(self._check('G@os:Ubuntu'), ['db1', 'nodata', 'web1'])
+        self.assertEqual(self._check('G@os:Ubuntu and web*'), ['web1'])
+        self.assertEqual(self._check('web* and not G@os:Ubuntu'), ['web2'])
+        self.assertEqual(self._check('L@db1 or web2 and G@os:CentOS'), ['db1', 'web2'])
+        self.assertEqual(self._check('not ( L@web1,web2 or E@db.* )'), ['nodata'])
+        self.assertEqual(self._check('web* or'), [])
+
+    def test_compound_reads_sources_once(self):
+        '''
+        The minion data cache is read at most once per minion and cache
+        backed terms only check the minions matched by cheaper ones
+        '''
+        self.assertEqual(self._check('G@os:Ubuntu and I@app:version:* and L@web1,db1'), ['web1'])
+        self.assertEqual(sorted(call[0][0] for call in self.cache.fetch.call_args_list),
+                         ['minions/db1', 'minions/web1'])
+        self.assertEqual(self.cache.list.call_count, 1)
@@ -10,7 +10,8 @@ import textwrap
 
 # Import Salt Libs
 from yaml.constructor import ConstructorError
-from salt.utils.yamlloader import SaltYamlSafeLoader
+from salt.utils.yamlloader import SaltYamlSafeLoader, SaltYamlCSafeLoader
+import salt.utils.yamlloader
 import salt.utils.files
 from salt.ext import six
 
@@ -27,12 +28,12 @@ class YamlLoaderTestCase(TestCase):
     '''
     TestCase for salt.utils.yamlloader module
     '''
+    loader = SaltYamlSafeLoader
 
-    @staticmethod
-    def render_yaml(data):
+    def render_yaml(self, data):
         '''
         Takes a YAML string, puts it into a mock file, passes that to the YAML
-        SaltYamlSafeLoader and then returns the rendered/parsed YAML data
+        loader and then returns the rendered/parsed YAML data
         '''
         if six.PY2:
             # On Python 2, data read from a filehandle will not already be
@@ -43,7 +44,7 @@ class YamlLoaderTestCase(TestCase):
             data = salt.utils.data.encode(data)
         with patch('salt.utils.files.fopen', mock_open(read_data=data)) as mocked_file:
             with salt.utils.files.fopen(mocked_file) as mocked_stream:
-                return SaltYamlSafeLoader(mocked_stream).get_data()
+                return self.loader(mocked_stream).get_data()
 
     @staticmethod
     def raise_error(value):
@@ -149,3 +150,31 @@ class YamlLoaderTestCase(TestCase):
                   b: {'a': u'\\u0414'}''')),
             {'foo': {'a': u'\u0414', 'b': {'a': u'\u0414'}}}
         )
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not salt.utils.yamlloader.HAS_LIBYAML, 'libyaml is not available')
+class YamlCLoaderTestCase(YamlLoaderTestCase):
+    '''
+    TestCase for the libyaml based loader of the salt.utils.yamlloader module
+    '''
+    loader = SaltYamlCSafeLoader
+
+    def test_fast_load_ordered(self):
+        '''
+        Test loading into the given dictclass
+        '''
+        ret = salt.utils.yamlloader.fast_load(
+            'b: 1\na: {d: 2, c: 3}\n', dictclass=collections.OrderedDict)
+        self.assertEqual(list(ret), ['b', 'a'])
+        self.assertIsInstance(ret['a'], collections.OrderedDict)
+        self.assertEqual(list(ret['a']), ['d', 'c'])
+
+    def test_fast_load_error(self):
+        '''
+        Test that errors are reported by the pure Python loader, with the
+        YAML document they are found in
+        '''
+        with self.assertRaises(ConstructorError) as exc:
+            salt.utils.yamlloader.fast_load('p1: alpha\np1: beta\n')
+        self.assertIsNotNone(exc.exception.problem_mark.buffer)